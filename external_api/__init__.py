@@ -1,14 +1,31 @@
 import os
 
 from external_api.data_sources import *
-from external_api.function_utils import MCP_FUNCTION_LIST_JSON_FILE, ToolResult, load_function_proxys
+from external_api.function_utils import MCP_FUNCTION_LIST_JSON_FILE, FunctionProxy, ToolResult, load_function_index
 
-proxies = {}
-_, proxies = load_function_proxys(os.path.join(os.path.dirname(__file__), MCP_FUNCTION_LIST_JSON_FILE))
-globals().update(proxies)
+_FUNCTION_LIST_FILE = os.path.join(os.path.dirname(__file__), MCP_FUNCTION_LIST_JSON_FILE)
+
+
+def __getattr__(name: str):
+    # PEP 562: 函数代理在首次访问时才创建，并缓存到模块全局变量中
+    function_index = load_function_index(_FUNCTION_LIST_FILE)
+    if name == "__all__":
+        return ["ToolResult"] + list(function_index.keys())
+    if name == "proxies":
+        return {function_name: __getattr__(function_name) for function_name in function_index}
+
+    function_info = function_index.get(name)
+    if function_info is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    proxy = globals()[name] = FunctionProxy(function_info)
+    return proxy
+
+
+def __dir__():
+    return sorted(set(globals()) | set(load_function_index(_FUNCTION_LIST_FILE)))
 
-__all__ = ["ToolResult"] + list(proxies.keys())
 
 if __name__ == "__main__":
-    print(__all__)
+    print(__getattr__("__all__"))
     print(globals())
@@ -0,0 +1,3 @@
+"""
+external_api 的本地基准测试与测试用服务
+"""
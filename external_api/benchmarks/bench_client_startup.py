@@ -0,0 +1,50 @@
+"""
+ApiClient 冷启动耗时
+
+每个场景在独立的子进程中执行:
+    - get_client:    仅创建 ApiClient（按需加载时只建立发现索引）
+    - first_source:  创建 ApiClient 并访问一个数据源（典型任务）
+    - all_sources:   创建 ApiClient 并加载全部数据源（等价于旧的全量加载行为）
+
+用法:
+    python -m external_api.benchmarks.bench_client_startup [--runs 10]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+SETUP = "from external_api.data_sources.client import get_client"
+
+SCENARIOS = {
+    "get_client": "get_client()",
+    "first_source": "get_client().yahoo_finance",
+    "all_sources": "c = get_client(); [getattr(c, name) for name in list(c._source_index)]",
+}
+
+TIMER = "{setup}; import time; _t = time.perf_counter(); {code}; print(time.perf_counter() - _t)"
+
+
+def measure(code: str, runs: int) -> list[float]:
+    repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+    env = dict(os.environ, PYTHONPATH=repo_root)
+    timings = []
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, "-c", TIMER.format(setup=SETUP, code=code)], cwd=repo_root, env=env)
+        timings.append(float(output.decode().strip().splitlines()[-1]))
+    return timings
+
+
+def main(runs: int):
+    for name, code in SCENARIOS.items():
+        timings = measure(code, runs)
+        print(f"{name:<13} median={statistics.median(timings) * 1000:7.1f}ms  min={min(timings) * 1000:7.1f}ms  runs={runs}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+    main(args.runs)
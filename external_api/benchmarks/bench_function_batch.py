@@ -0,0 +1,65 @@
+"""
+FunctionProxy 逐次调用与批量调用的吞吐对比
+
+用法:
+    python -m external_api.benchmarks.bench_function_batch [--calls 200] [--latency 0.01]
+"""
+
+import argparse
+import asyncio
+import time
+
+from external_api.benchmarks.function_server import LocalFunctionServer
+from external_api.function_utils import FunctionProxy, batch
+
+FUNCTION_INFO = {
+    "name": "bench_echo",
+    "parameters": [{"name": "index", "type": "int", "description": "Call index"}],
+    "kind": "basic",
+}
+
+
+async def run_per_call(proxy: FunctionProxy, calls: int) -> float:
+    start = time.perf_counter()
+    results = await asyncio.gather(*(proxy(i) for i in range(calls)))
+    elapsed = time.perf_counter() - start
+    assert all(not r.is_error for r in results), [r.message for r in results if r.is_error][:1]
+    return elapsed
+
+
+async def run_batched(proxy: FunctionProxy, calls: int) -> float:
+    start = time.perf_counter()
+    async with batch():
+        results = await asyncio.gather(*(proxy(i) for i in range(calls)))
+    elapsed = time.perf_counter() - start
+    assert all(not r.is_error for r in results), [r.message for r in results if r.is_error][:1]
+    assert [r.message for r in results] == [f'{{"index": {i}}}' for i in range(calls)]
+    return elapsed
+
+
+async def main(calls: int, latency: float):
+    server = LocalFunctionServer(latency=latency)
+    port = await server.start()
+    proxy = FunctionProxy(FUNCTION_INFO)
+    proxy.server_port = port
+    try:
+        per_call = await run_per_call(proxy, calls)
+        per_call_requests = server.request_count
+
+        server.request_count = 0
+        batched = await run_batched(proxy, calls)
+        batched_requests = server.request_count
+    finally:
+        await server.stop()
+
+    print(f"calls={calls} latency={latency * 1000:.1f}ms")
+    print(f"per-call: {per_call:.3f}s  {calls / per_call:,.0f} calls/s  http_requests={per_call_requests}")
+    print(f"batched : {batched:.3f}s  {calls / batched:,.0f} calls/s  http_requests={batched_requests}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.01)
+    args = parser.parse_args()
+    asyncio.run(main(args.calls, args.latency))
@@ -0,0 +1,46 @@
+"""
+external_api 冷启动 import 耗时对比
+
+每个场景在独立的子进程中执行，以测量真实的冷启动开销:
+    - lazy:  import external_api 并访问两个函数代理（典型 agent 用法）
+    - eager: import external_api 后物化全部函数代理并加载 aiohttp（等价于旧的 import 期行为）
+
+用法:
+    python -m external_api.benchmarks.bench_import [--runs 10]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+SCENARIOS = {
+    "lazy": "import external_api; external_api.twitter_search_tweets; external_api.yahoo_get_stock_quote",
+    "eager": "import external_api; external_api.proxies; import aiohttp",
+}
+
+TIMER = "import time; _t = time.perf_counter(); {code}; print(time.perf_counter() - _t)"
+
+
+def measure(code: str, runs: int) -> list[float]:
+    repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+    env = dict(os.environ, PYTHONPATH=repo_root, PYTHONDONTWRITEBYTECODE="")
+    timings = []
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, "-c", TIMER.format(code=code)], cwd=repo_root, env=env)
+        timings.append(float(output.decode().strip().splitlines()[-1]))
+    return timings
+
+
+def main(runs: int):
+    for name, code in SCENARIOS.items():
+        timings = measure(code, runs)
+        print(f"{name:<6} median={statistics.median(timings) * 1000:7.1f}ms  min={min(timings) * 1000:7.1f}ms  runs={runs}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+    main(args.runs)
@@ -0,0 +1,227 @@
+"""
+数据源响应解码与解析耗时
+
+用合成的大响应体（默认每个数据源 2000 条）分别测量:
+    - decode: 用各个可用的 JSON 后端（json / orjson / msgspec）解码响应体
+    - parse:  数据源解析方法把解码后的对象转换为返回格式，按条目平均
+
+覆盖 Twitter._parse_tweet_with_ref、Pinterest._parse_pins、
+TripAdvisor._parse_location_details 和 Booking._parse_hotel_detail。
+
+用法:
+    python -m external_api.benchmarks.bench_parsers [--items 2000] [--runs 5]
+"""
+
+import argparse
+import gc
+import importlib.util
+import json
+import statistics
+import time
+
+from external_api.data_sources import json_codec
+from external_api.data_sources.booking_source import BookingSource
+from external_api.data_sources.client import config
+from external_api.data_sources.pinterest_source import PinterestSource
+from external_api.data_sources.tripadvisor_source import TripAdvisorSource
+from external_api.data_sources.twitter_source import TwitterSource
+
+
+def make_user(i: int):
+    return {
+        "user_id": 1000 + i,
+        "username": f"user{i}",
+        "name": f"User {i}",
+        "creation_date": "Tue Mar 04 12:26:23 +0000 2025",
+        "description": "lorem ipsum " * 8,
+        "location": "Somewhere",
+        "external_url": f"https://example.com/{i}",
+        "profile_pic_url": f"https://img.example.com/{i}.jpg",
+        "follower_count": i * 7,
+        "following_count": i * 3,
+        "number_of_tweets": i * 11,
+        "is_verified": i % 2 == 0,
+        "is_blue_verified": i % 3 == 0,
+    }
+
+
+def make_tweet(i: int, depth: int = 0):
+    tweet = {
+        "tweet_id": 10**15 + i,
+        "creation_date": "Tue Mar 04 12:26:23 +0000 2025",
+        "text": "tweet text " * 20,
+        "language": "en",
+        "media_url": [f"https://img.example.com/m{i}.jpg"],
+        "video_url": None,
+        "retweet_count": i,
+        "reply_count": i % 13,
+        "favorite_count": i * 2,
+        "quote_count": i % 5,
+        "views": i * 100,
+        "bookmark_count": i % 7,
+        "user": make_user(i),
+    }
+    if depth == 0 and i % 2 == 0:
+        retweet = make_tweet(i + 1, depth + 1)
+        retweet["quoted_status"] = make_tweet(i + 2, depth + 1)
+        tweet.update({"retweet_tweet_id": retweet["tweet_id"], "retweet_status": retweet})
+    return tweet
+
+
+def make_pin(i: int):
+    video = {"url": f"https://v.example.com/{i}.m3u8", "duration": 15000, "width": 720, "height": 1280}
+    return {
+        "id": str(i),
+        "title": f"Pin {i}",
+        "description": "pin description " * 10,
+        "alt_text": "alt",
+        "auto_alt_text": "auto alt",
+        "images": {size: {"url": f"https://i.example.com/{size}/{i}.jpg", "width": 736} for size in ("orig", "736x", "474x", "236x")},
+        "videos": {"video_list": {"V_HLSV4": video, "V_720P": dict(video), "V_EXP3": dict(video)}} if i % 3 == 0 else None,
+        "reaction_counts": {"1": i},
+        "pinner": {
+            "id": str(10**6 + i),
+            "username": f"pinner{i}",
+            "full_name": f"Pinner {i}",
+            "image_large_url": f"https://i.example.com/p/{i}.jpg",
+            "follower_count": i * 5,
+        },
+        "board": {"id": str(i), "name": "board", "pin_count": i},
+    }
+
+
+def make_location(i: int):
+    return {
+        "location_id": str(i),
+        "name": f"Location {i}",
+        "description": "location description " * 30,
+        "web_url": f"https://example.com/l/{i}",
+        "address_obj": {
+            "street1": f"{i} Main St",
+            "city": "City",
+            "state": "State",
+            "country": "Country",
+            "postalcode": "12345",
+            "address_string": f"{i} Main St, City",
+        },
+        "ancestors": [{"level": level, "name": level.title(), "location_id": str(j)} for j, level in enumerate(("city", "state", "country"))],
+        "latitude": "1.23",
+        "longitude": "4.56",
+        "timezone": "UTC",
+        "phone": "+1 555 0100",
+        "ranking_data": {
+            "geo_location_id": "1",
+            "ranking_string": f"#{i} of 5000",
+            "geo_location_name": "City",
+            "ranking_out_of": "5000",
+            "ranking": str(i),
+        },
+        "rating": "4.5",
+        "num_reviews": str(i * 3),
+        "review_rating_count": {str(k): str(k * 10) for k in range(1, 6)},
+        "subratings": {str(k): {"name": f"rate_{k}", "localized_name": f"Rate {k}", "value": "4.5"} for k in range(6)},
+        "photo_count": "100",
+        "see_all_photos": f"https://example.com/l/{i}/photos",
+        "price_level": "$$",
+        "amenities": ["wifi", "parking", "pool"] * 5,
+        "category": {"name": "hotel", "localized_name": "Hotel"},
+        "subcategory": [{"name": "hotel", "localized_name": "Hotel"}],
+        "styles": ["Modern"],
+        "neighborhood_info": [],
+        "trip_types": [{"name": t, "localized_name": t.title(), "value": "10"} for t in ("business", "couples", "solo", "family", "friends")],
+        "awards": [],
+    }
+
+
+def make_hotel(i: int, rooms: int = 20):
+    return {
+        "hotel_id": i,
+        "hotel_name": f"Hotel {i}",
+        "url": f"https://example.com/h/{i}",
+        "review_nr": i * 4,
+        "raw_data": {"reviewScore": 8.7},
+        "city": "City",
+        "district": "Center",
+        "facilities_block": {"facilities": [{"name": f"facility {k}", "icon": "x"} for k in range(20)]},
+        "hotel_important_information_with_codes": [{"phrase": f"info {k}", "code": k} for k in range(5)],
+        "rooms": {
+            str(r): {
+                "photos": [{"url_max1280": f"https://i.example.com/{i}/{r}/{k}.jpg", "url_original": ""} for k in range(8)],
+                "children_and_beds_text": {"allow_children": 1, "children_at_the_property": [{"text": "Children welcome"}]},
+                "description": "room description " * 10,
+                "bed_configurations": [{"bed_types": [{"name_with_count": "1 double bed", "description": "Double", "count": 1}]}],
+            }
+            for r in range(rooms)
+        },
+    }
+
+
+def build_cases(items: int):
+    twitter = TwitterSource(config)
+    pinterest = PinterestSource(config)
+    tripadvisor = TripAdvisorSource(config)
+    booking = BookingSource(config)
+    hotels = max(1, items // 20)
+    return [
+        (
+            "twitter",
+            {"results": [make_tweet(i) for i in range(items)]},
+            lambda data: [twitter._parse_tweet_with_ref(tweet) for tweet in data["results"]],
+            items,
+        ),
+        ("pinterest", {"data": [make_pin(i) for i in range(items)]}, pinterest._parse_pins, items),
+        (
+            "tripadvisor",
+            {"data": [make_location(i) for i in range(items)]},
+            lambda data: [tripadvisor._parse_location_details(location) for location in data["data"]],
+            items,
+        ),
+        (
+            "booking",
+            {"data": [make_hotel(i) for i in range(hotels)]},
+            lambda data: [booking._parse_hotel_detail(hotel) for hotel in data["data"]],
+            hotels,
+        ),
+    ]
+
+
+def timeit(func, runs: int) -> float:
+    timings = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(runs):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return statistics.median(timings)
+
+
+def main(items: int, runs: int):
+    backends = [name for name in ("json", "orjson", "msgspec") if importlib.util.find_spec(name)]
+    print(f"backends: {', '.join(backends)}  items={items}  runs={runs}")
+    for name, payload, parse, count in build_cases(items):
+        body = json.dumps(payload).encode("utf-8")
+        decode_times = {}
+        for backend in backends:
+            json_codec.set_backend(backend)
+            decode_times[backend] = timeit(lambda: json_codec.loads(body), runs)
+        data = json_codec.loads(body)
+        parse_time = timeit(lambda: parse(data), runs)
+        decode_report = "  ".join(
+            f"{backend}={elapsed * 1000:7.1f}ms ({decode_times['json'] / elapsed:4.1f}x)" for backend, elapsed in decode_times.items()
+        )
+        print(
+            f"{name:<12} body={len(body) / 2**20:6.1f}MiB  decode: {decode_report}  "
+            f"parse={parse_time * 1000:7.1f}ms ({parse_time / count * 1e6:6.1f}us/item)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    main(args.items, args.runs)
@@ -0,0 +1,341 @@
+"""
+全部数据源公开方法的离线基准测试
+
+ReplayServer 作为本地上游替身回放夹具，对九个数据源的每个公开方法以给定并发调用 N 次，
+报告吞吐（次/秒）、p50/p99 延迟和失败次数。夹具来源:
+    - 默认：合成的响应（每页 --items 条），覆盖全部方法
+    - --fixtures DIR：回放 --record 录制的真实响应（没有完全匹配时退回同一路径的响应）
+    - --record DIR：对真实代理执行一遍全部调用并把响应保存到 DIR（需要网络）
+
+响应缓存和本地索引（TripAdvisor 附近搜索、价格历史）在每个方法开始前清空，
+带缓存的方法因此包含一次未命中和后续命中，cache 列为命中率。
+
+用法:
+    python -m external_api.benchmarks.bench_sources [--calls 50] [--concurrency 8] [--latency 0.02]
+        [--jitter 0.01] [--error-rate 0] [--slow-rate 0] [--items 20] [--only twitter,yahoo_finance]
+"""
+
+import argparse
+import asyncio
+import inspect
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from external_api.benchmarks.bench_parsers import make_hotel, make_location, make_pin, make_tweet, make_user
+from external_api.data_sources.client import config, get_client
+from external_api.data_sources.geo_index import get_geo_index
+from external_api.data_sources.replay import FixtureStore, RecordingTransport, ReplayServer, canonical_body
+from external_api.data_sources.response_cache import get_response_cache
+
+START, END = "2024-01-01", "2024-03-01"
+SYMBOLS = ["AAPL", "MSFT", "GOOG", "AMZN"]
+
+# 每个数据源方法的调用参数
+CALLS: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "booking": {
+        "search_flights": {"from_code": "BOM.AIRPORT", "to_code": "DEL.AIRPORT", "depart_date": "2025-06-01"},
+        "search_hotels_by_dest_name": {"dest_name": "Paris", "arrival_date": "2025-06-01", "departure_date": "2025-06-03"},
+        "search_hotel_details": {"hotel_id": "1", "arrival_date": "2025-06-01", "departure_date": "2025-06-03"},
+        "search_hotels_details": {"hotel_ids": ["1", "2", "3", "4"], "arrival_date": "2025-06-01", "departure_date": "2025-06-03"},
+    },
+    "commodities": {
+        "get_supported_commodities": {},
+        "get_commodities_price": {"commodity_code": "COCOA", "currency_code": "USD"},
+        "get_commodities_price_history": {"commodity_code": "COCOA", "currency_code": "USD"},
+    },
+    "metal": {
+        "get_metal_price": {"currency_code": "USD"},
+        "get_metal_price_history": {"metal": "gold", "currency_code": "USD"},
+    },
+    "patent": {
+        "search_patents": {"query": "battery", "num_results": 20},
+        "iter_search_patents": {"query": "battery", "num_results": 20},
+    },
+    "pinterest": {
+        "get_user_info": {"username": "pinner"},
+        "search_pins": {"keyword": "garden", "num": 20},
+        "iter_search_pins": {"keyword": "garden", "max_items": 60, "page_size": 20},
+    },
+    "scholar": {
+        "search_scholar": {"query": "transformers", "num_results": 20},
+        "iter_search_scholar": {"query": "transformers", "num_results": 20},
+    },
+    "tripadvisor": {
+        "search_locations": {"searchQuery": "Macau"},
+        "search_nearby_locations": {"latitude": 22.1, "longitude": 113.5},
+        "get_location_details": {"locationId": 1},
+        "get_location_reviews": {"locationId": 1},
+        "get_location_photos": {"locationId": 1},
+        "get_location_profile": {"locationId": 1},
+        "get_location_profiles": {"locationIds": [1, 2, 3, 4]},
+    },
+    "twitter": {
+        "get_user_info": {"username": "user1"},
+        "get_user_tweets": {"username": "user1", "limit": 20},
+        "search_tweets": {"query": "python", "limit": 20},
+        "iter_search_tweets": {"query": "python", "max_items": 60, "page_size": 20},
+        "iter_user_tweets": {"username": "user1", "max_items": 60, "page_size": 20},
+    },
+    "yahoo_finance": {
+        "get_stock_price": {"symbol": "AAPL", "start_date": START, "end_date": END},
+        "get_multiple_stocks_price": {"symbols": SYMBOLS, "start_date": START, "end_date": END},
+        "iter_multiple_stocks_price": {"symbols": SYMBOLS, "start_date": START, "end_date": END},
+        "get_stock_info": {"symbol": "AAPL"},
+        "get_financial_data": {"symbol": "AAPL"},
+        "get_stock_insights": {"symbol": "AAPL"},
+        "get_stock_statistics": {"symbol": "AAPL"},
+        "get_stock_news": {"symbol": "AAPL"},
+    },
+}
+
+
+def _raw(value: float) -> Dict[str, Any]:
+    return {"raw": value, "fmt": f"{value:.2f}"}
+
+
+def make_chart(start: int, days: int) -> Dict[str, Any]:
+    timestamps = [start + 86400 * i + 52200 for i in range(days)]
+    quote = {name: [100.0 + i for i in range(days)] for name in ("open", "high", "low", "close")}
+    quote["volume"] = [1000 * i for i in range(days)]
+    return {"chart": {"result": [{"meta": {}, "timestamp": timestamps, "indicators": {"quote": [quote]}}], "error": None}}
+
+
+def make_flight(i: int) -> Dict[str, Any]:
+    leg = {
+        "flightInfo": {"carrierInfo": {"marketingCarrier": "AI"}, "flightNumber": 100 + i},
+        "departureAirport": {"code": "BOM"},
+        "arrivalAirport": {"code": "DEL"},
+        "departureTime": "2025-06-01T08:00:00",
+        "arrivalTime": "2025-06-01T10:00:00",
+        "totalTime": 7200,
+        "flightStops": [],
+    }
+    return {"segments": [{"legs": [leg]}], "priceBreakdown": {"total": {"units": 100 + i, "nanos": 500000000, "currencyCode": "USD"}}}
+
+
+def build_fixtures(store: FixtureStore, items: int):
+    """为每个数据源方法访问的路径生成合成响应（不区分查询参数，由 ReplayServer 按路径回放）"""
+    host = {name: config[f"{name}_base_url"] for name in ("booking", "commodities", "metal", "pinterest", "tripadvisor", "twitter", "yahoo")}
+    serper = config["serper_base_url"]
+    timestamp = int(time.mktime(time.strptime(START, "%Y-%m-%d")))
+
+    store.add("GET", host["booking"], "/api/v1/flights/searchFlights", {"status": True, "data": {"flightOffers": [make_flight(i) for i in range(items)]}})
+    store.add(
+        "GET",
+        host["booking"],
+        "/api/v1/hotels/searchDestination",
+        {"status": True, "data": [{"dest_id": "-1", "search_type": "city", "name": "Paris", "city_name": "Paris", "country": "France", "label": "Paris", "latitude": 48.8, "longitude": 2.3}]},
+    )
+    store.add(
+        "GET",
+        host["booking"],
+        "/api/v1/hotels/searchHotels",
+        {
+            "status": True,
+            "data": {
+                "hotels": [
+                    {
+                        "hotel_id": i,
+                        "property": {
+                            "name": f"Hotel {i}",
+                            "latitude": 48.8,
+                            "longitude": 2.3,
+                            "reviewScore": 8.5,
+                            "priceBreakdown": {"grossPrice": {"value": 100 + i, "currency": "USD"}},
+                        },
+                    }
+                    for i in range(items)
+                ]
+            },
+        },
+    )
+    store.add("GET", host["booking"], "/api/v1/hotels/getHotelDetails", {"status": True, "data": make_hotel(1)})
+
+    store.add("GET", host["commodities"], "/v1/supported", {"success": True, "supported_commodities": [{"commodity_code": "COCOA"}], "supported_currencies": []})
+    store.add("GET", host["commodities"], "/v1/market-data", {"success": True, "base_currency": "USD", "rates": {"COCOA": {"current": 1.5}}})
+    store.add(
+        "POST",
+        host["metal"],
+        "/web-crawling/api/gold-index",
+        {
+            "data": {
+                metal: {"currency": "USD", "name": metal.title(), "results": [{"bid": 1, "mid": 2, "high": 3, "low": 0, "originalTime": "2025-04-25T17:00:00Z", "unit": "OUNCE"}]}
+                for metal in ("gold", "silver", "platinum")
+            }
+        },
+    )
+
+    store.add("POST", serper, "/patents", {"organic": [{"title": f"Patent {i}", "publicationNumber": f"US{i}"} for i in range(items)]})
+    store.add("POST", serper, "/scholar", {"organic": [{"title": f"Paper {i}", "link": f"https://example.com/{i}"} for i in range(items)]})
+
+    store.add("POST", host["pinterest"], "/pinterest/pins/advance", {"data": [make_pin(i) for i in range(items)], "nextPageCursor": "next"})
+    store.add("GET", host["pinterest"], "/pinterest/users/relevance", {"data": [{"id": "1", "username": "pinner", "last_pin_save_time": "Tue, 04 Mar 2025 12:26:23 +0000"}]})
+
+    locations = [dict(make_location(i), latitude="22.1", longitude="113.5") for i in range(1, items + 1)]
+    store.add("GET", host["tripadvisor"], "/api/v1/location/search", {"data": locations})
+    store.add("GET", host["tripadvisor"], "/api/v1/location/nearby_search", {"data": [dict(location, distance="0.1", bearing="north") for location in locations[:10]]})
+    review = {"published_date": "2025-04-24T22:29:34Z", "text": "review " * 30, "rating": 5, "owner_response": {"published_date": "2025-04-24T22:29:34Z"}}
+    for location_id in range(1, 5):
+        store.add("GET", host["tripadvisor"], f"/api/v1/location/{location_id}/details", make_location(location_id))
+        store.add("GET", host["tripadvisor"], f"/api/v1/location/{location_id}/reviews", {"data": [review] * min(items, 10)})
+        store.add("GET", host["tripadvisor"], f"/api/v1/location/{location_id}/photos", {"data": [{"published_date": "2021-02-26T00:50:50.206Z"}] * min(items, 10)})
+
+    store.add("GET", host["twitter"], "/search/search", {"results": [make_tweet(i) for i in range(items)], "continuation_token": "next"})
+    store.add("GET", host["twitter"], "/user/tweets", {"results": [make_tweet(i) for i in range(items)], "continuation_token": "next"})
+    store.add("GET", host["twitter"], "/user/details", make_user(1))
+
+    store.add("GET", host["yahoo"], "/stock/v3/get-chart", make_chart(timestamp, 40))
+    summary = {
+        "summaryDetail": {name: _raw(1.5) for name in ("marketCap", "trailingPE", "forwardPE", "dividendYield", "beta", "volume", "averageVolume")},
+        "financialData": {name: _raw(2.5) for name in ("currentPrice", "targetHighPrice", "totalRevenue", "grossMargins")},
+        "defaultKeyStatistics": {name: _raw(3.5) for name in ("enterpriseValue", "forwardPE", "priceToBook", "beta", "sharesOutstanding")},
+    }
+    store.add("GET", host["yahoo"], "/stock/get-fundamentals", {"quoteSummary": {"result": [summary], "error": None}})
+    store.add("GET", host["yahoo"], "/stock/v4/get-statistics", {"quoteSummary": {"result": [summary], "error": None}})
+    store.add(
+        "GET",
+        host["yahoo"],
+        "/stock/v3/get-insights",
+        {
+            "finance": {
+                "result": {
+                    "instrumentInfo": {"technicalEvents": {"provider": "x", "shortTermOutlook": {"direction": "Bullish", "score": 3}}, "keyTechnicals": {"support": 1}, "valuation": {}},
+                    "companySnapshot": {"company": {"innovativeness": 0.5}},
+                    "recommendation": {"targetPrice": 200, "rating": "BUY"},
+                },
+                "error": None,
+            }
+        },
+    )
+    store.add(
+        "POST",
+        host["yahoo"],
+        "/news/v2/list",
+        {
+            "data": {
+                "main": {
+                    "stream": [
+                        {"content": {"id": str(i), "title": f"News {i}", "pubDate": "2025-04-24T22:29:34Z", "provider": {"displayName": "Wire"}, "finance": {"stockTickers": [{"symbol": "AAPL"}]}}}
+                        for i in range(items)
+                    ]
+                }
+            }
+        },
+        body=canonical_body(data=""),
+    )
+
+
+async def call_method(func: Callable, kwargs: Dict[str, Any]) -> bool:
+    """调用一次数据源方法，返回是否成功（异步生成器要求全部产出项成功）"""
+    if inspect.isasyncgenfunction(inspect.unwrap(func)):
+        ok = True
+        async for item in func(**kwargs):
+            ok = ok and not (isinstance(item, dict) and item.get("success") is False)
+        return ok
+    result = await func(**kwargs)
+    return not (isinstance(result, dict) and result.get("success") is False)
+
+
+async def bench_method(func: Callable, kwargs: Dict[str, Any], calls: int, concurrency: int) -> Tuple[float, List[float], int]:
+    latencies: List[float] = []
+    failures = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                ok = await call_method(func, kwargs)
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            failures += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return time.perf_counter() - started, latencies, failures
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def check_coverage(client) -> List[str]:
+    """返回没有基准参数的公开方法"""
+    missing = []
+    for source_name in client._source_index:
+        source = getattr(client, source_name)
+        for capability in source.get_capabilities():
+            if capability["name"] not in CALLS.get(source_name, {}):
+                missing.append(f"{source_name}.{capability['name']}")
+    return missing
+
+
+async def main(args):
+    client = get_client()
+    missing = check_coverage(client)
+    if missing:
+        print(f"WARNING: no benchmark arguments for {', '.join(missing)}")
+    only = set(args.only.split(",")) if args.only else None
+    selected = [(source, method, kwargs) for source, methods in CALLS.items() for method, kwargs in methods.items() if not only or source in only]
+
+    if args.record:
+        transport = RecordingTransport(args.record, proxy_url=config["external_api_proxy_url"], timeout=config["timeout"])
+        client.set_transport(transport)
+        for source, method, kwargs in selected:
+            ok = await call_method(getattr(getattr(client, source), method), kwargs)
+            print(f"recorded {source}.{method}: {'ok' if ok else 'failed'}")
+        print(f"{transport.recorded} responses saved to {args.record}")
+        await transport.close()
+        return
+
+    store = FixtureStore(args.fixtures) if args.fixtures else FixtureStore()
+    if not args.fixtures:
+        build_fixtures(store, args.items)
+    server = ReplayServer(
+        store,
+        latency=args.latency,
+        latency_jitter=args.jitter,
+        slow_rate=args.slow_rate,
+        slow_latency=args.slow_latency,
+        error_rate=args.error_rate,
+        seed=0,
+    )
+    await server.start()
+    client.set_proxy_url(server.url)
+    print(f"replay server {server.url}  fixtures={len(store)}  latency={args.latency}s jitter={args.jitter}s error_rate={args.error_rate}")
+    print(f"{'method':<45} {'calls':>5} {'fail':>5} {'calls/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'cache':>6}")
+    try:
+        for source, method, kwargs in selected:
+            get_response_cache().clear()
+            get_geo_index().clear()
+            func = getattr(getattr(client, source), method)
+            elapsed, latencies, failures = await bench_method(func, kwargs, args.calls, args.concurrency)
+            stats = get_response_cache().stats().get(source, {}).get(method)
+            cache = f"{stats['hit_ratio']:.0%}" if stats else "-"
+            print(
+                f"{source + '.' + method:<45} {args.calls:>5} {failures:>5} {args.calls / elapsed:>9.1f} "
+                f"{percentile(latencies, 0.5) * 1000:>9.1f} {percentile(latencies, 0.99) * 1000:>9.1f} {cache:>6}"
+            )
+        print(f"server requests={server.request_count} misses={server.miss_count} injected_errors={server.injected_errors}")
+    finally:
+        await server.stop()
+        await client.transport.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=50, help="calls per method")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.02, help="base upstream latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.01, help="uniform extra latency (s)")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of slow responses")
+    parser.add_argument("--slow-latency", type=float, default=1.0, help="extra latency of slow responses (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of injected 503 responses")
+    parser.add_argument("--items", type=int, default=20, help="items per synthetic page")
+    parser.add_argument("--only", default="", help="comma separated source names")
+    parser.add_argument("--fixtures", default="", help="replay recorded fixtures from this directory")
+    parser.add_argument("--record", default="", help="record real responses into this directory (needs network)")
+    asyncio.run(main(parser.parse_args()))
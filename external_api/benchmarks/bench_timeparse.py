@@ -0,0 +1,84 @@
+"""
+时间戳规范化：逐条 strptime 与 timeparse 快速解析的对比
+
+对每种上游格式生成 N 个随机时间字符串（默认 10 万），比较:
+    - strptime: datetime.strptime(value, fmt).strftime("%Y-%m-%d %H:%M:%S")（各数据源原来的写法）
+    - normalize: timeparse.normalize 逐条调用
+    - batch:     timeparse.normalize_many 批量调用
+以及 Unix 时间戳格式化:
+    - fromtimestamp: datetime.fromtimestamp(ts).strftime(...) 逐条调用
+    - format_timestamps: 批量格式化
+
+用法:
+    python -m external_api.benchmarks.bench_timeparse [--items 100000] [--runs 5]
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timezone
+
+from external_api.data_sources import timeparse
+
+OUTPUT_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def make_values(fmt: str, items: int):
+    rng = random.Random(0)
+    start = 1577836800
+    values = []
+    for _ in range(items):
+        dt = datetime.fromtimestamp(start + rng.randint(0, 5 * 365 * 86400), timezone.utc)
+        value = dt.strftime(fmt.replace("%f", "%%f").replace("%z", "+0000"))
+        values.append(value.replace("%f", f"{rng.randint(0, 999):03d}"))
+    return values
+
+
+def timeit(func, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def report(name: str, baseline: float, elapsed: float, items: int):
+    print(f"  {name:<18} {elapsed * 1000:8.1f}ms  {elapsed / items * 1e9:7.0f}ns/item  speedup={baseline / elapsed:5.1f}x")
+
+
+def main(items: int, runs: int):
+    formats = {
+        "iso": timeparse.ISO_Z,
+        "iso_ms": timeparse.ISO_MS_Z,
+        "twitter": timeparse.TWITTER,
+        "rfc2822": timeparse.RFC2822,
+    }
+    for name, fmt in formats.items():
+        values = make_values(fmt, items)
+        expected = [datetime.strptime(value, fmt).strftime(OUTPUT_FORMAT) for value in values]
+        assert timeparse.normalize_many(values, fmt) == expected
+        print(f"{name} ({values[0]})  items={items}")
+        baseline = timeit(lambda: [datetime.strptime(value, fmt).strftime(OUTPUT_FORMAT) for value in values], runs)
+        report("strptime", baseline, baseline, items)
+        report("normalize", baseline, timeit(lambda: [timeparse.normalize(value, fmt) for value in values], runs), items)
+        report("normalize_many", baseline, timeit(lambda: timeparse.normalize_many(values, fmt), runs), items)
+
+    rng = random.Random(0)
+    timestamps = sorted(1577836800 + rng.randint(0, 5 * 365 * 86400) for _ in range(items))
+    print(f"timestamps  items={items}")
+    baseline = timeit(lambda: [datetime.fromtimestamp(ts, timezone.utc).strftime(OUTPUT_FORMAT) for ts in timestamps], runs)
+    report("fromtimestamp utc", baseline, baseline, items)
+    report("format_timestamps", baseline, timeit(lambda: timeparse.format_timestamps(timestamps), runs), items)
+    baseline = timeit(lambda: [datetime.fromtimestamp(ts).strftime("%Y-%m-%d") for ts in timestamps], runs)
+    report("fromtimestamp date", baseline, baseline, items)
+    report("format local date", baseline, timeit(lambda: timeparse.format_timestamps(timestamps, date_only=True, local=True), runs), items)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    main(args.items, args.runs)
@@ -0,0 +1,80 @@
+"""
+Yahoo 价格序列输出格式对比
+
+用合成的 get-chart 列式响应（默认 10 万根 K 线，含少量缺失值）比较
+get_stock_price 的三种 output_format 在解析阶段的耗时和峰值内存:
+    - records: 每根 K 线一个 dict（默认格式）
+    - numpy:   每个字段一个 NumPy 数组
+    - pandas:  以 UTC 时间为索引的 DataFrame
+
+用法:
+    python -m external_api.benchmarks.bench_yahoo_price_formats [--bars 100000] [--runs 5]
+"""
+
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+
+from external_api.data_sources.client import config
+from external_api.data_sources.yahoo_source import PRICE_FIELDS, YahooFinanceSource
+
+
+def make_chart(bars: int, missing_ratio: float = 0.001):
+    """生成 1 分钟间隔的合成行情，按 missing_ratio 随机置空（模拟 Yahoo 返回的 null）"""
+    rng = random.Random(0)
+    start = 1704067200
+    timestamps = [start + 60 * i for i in range(bars)]
+    quote = {}
+    for field in PRICE_FIELDS:
+        if field == "volume":
+            column = [rng.randint(0, 10**6) for _ in range(bars)]
+        else:
+            column = [round(100 + rng.random() * 10, 4) for _ in range(bars)]
+        for i in range(bars):
+            if rng.random() < missing_ratio:
+                column[i] = None
+        quote[field] = column
+    return timestamps, quote
+
+
+def measure(build, timestamps, quote, runs: int):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        build(timestamps, quote)
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    result = build(timestamps, quote)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return timings, peak
+
+
+def main(bars: int, runs: int):
+    source = YahooFinanceSource(config)
+    timestamps, quote = make_chart(bars)
+    builders = {
+        "records": source._build_price_records,
+        "numpy": source._build_price_arrays,
+        "pandas": source._build_price_frame,
+    }
+    baseline = None
+    for name, build in builders.items():
+        timings, peak = measure(build, timestamps, quote, runs)
+        median = statistics.median(timings)
+        baseline = baseline or median
+        print(
+            f"{name:<8} median={median * 1000:8.1f}ms  min={min(timings) * 1000:8.1f}ms  "
+            f"peak={peak / 2**20:7.1f}MiB  speedup={baseline / median:5.1f}x  bars={bars}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bars", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    main(args.bars, args.runs)
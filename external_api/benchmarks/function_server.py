@@ -0,0 +1,98 @@
+"""
+本地函数服务替身
+
+实现与真实函数服务相同的 /execute 与 /execute_batch 接口，用于在没有真实服务的环境下
+验证 FunctionProxy 的行为及进行基准测试。每个请求的 message 为其参数的 JSON 回显；
+函数 raise_error 返回错误，函数 large_result 返回 size 字节的大结果。
+batch_endpoint=False 时不提供 /execute_batch，模拟不支持批量调用的旧服务。
+"""
+
+import asyncio
+import json
+from typing import Any, Dict
+
+from aiohttp import web
+
+
+class LocalFunctionServer:
+    """本地函数服务，可配置每次往返的模拟延迟"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.01, batch_endpoint: bool = True):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.batch_endpoint = batch_endpoint
+        self.request_count = 0
+        self.call_count = 0
+        self._runner: web.AppRunner | None = None
+
+    def _execute_one(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        self.call_count += 1
+        if request.get("function_name") == "raise_error":
+            return {"request_id": request["request_id"], "is_error": True, "message": "requested error"}
+        if request.get("function_name") == "large_result":
+            # 超过 aiohttp 逐行读取缓冲区上限（2**17 字节）的结果，参数 size 控制字节数
+            size = int(request.get("parameters", {}).get("size", 300_000))
+            return {"request_id": request["request_id"], "is_error": False, "message": "x" * size}
+        return {
+            "request_id": request["request_id"],
+            "is_error": False,
+            "message": json.dumps(request.get("parameters", {}), ensure_ascii=False, sort_keys=True),
+        }
+
+    async def handle_execute(self, request: web.Request) -> web.StreamResponse:
+        self.request_count += 1
+        body = await request.json()
+        if body.get("stream") and "application/x-ndjson" in request.headers.get("Accept", ""):
+            return await self._stream_execute(request, body)
+        await asyncio.sleep(self.latency)
+        return web.json_response(self._execute_one(body))
+
+    async def _stream_execute(self, request: web.Request, body: Dict[str, Any]) -> web.StreamResponse:
+        """以 NDJSON 逐块返回结果: 参数 chunks 控制部分结果数量，每块间隔 latency"""
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        for i in range(int(body.get("parameters", {}).get("chunks", 3))):
+            await asyncio.sleep(self.latency)
+            await response.write(json.dumps({"type": "partial", "message": f"chunk {i}"}).encode() + b"\n")
+        final = {"type": "final", **self._execute_one(body)}
+        await response.write(json.dumps(final).encode() + b"\n")
+        await response.write_eof()
+        return response
+
+    async def handle_execute_batch(self, request: web.Request) -> web.Response:
+        self.request_count += 1
+        body = await request.json()
+        await asyncio.sleep(self.latency)
+        return web.json_response({"results": [self._execute_one(item) for item in body.get("requests", [])]})
+
+    async def start(self) -> int:
+        app = web.Application()
+        app.router.add_post("/execute", self.handle_execute)
+        if self.batch_endpoint:
+            app.router.add_post("/execute_batch", self.handle_execute_batch)
+
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # 端口为 0 时由系统分配，回填实际端口
+        self.port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+        return self.port
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+if __name__ == "__main__":
+
+    async def main():
+        server = LocalFunctionServer(port=12306)
+        await server.start()
+        print(f"Local function server listening on {server.host}:{server.port}")
+        while True:
+            await asyncio.sleep(3600)
+
+    asyncio.run(main())
@@ -4,13 +4,20 @@
 类的继承关系:
 BaseApi (基类)
 """
+import copy
 import inspect
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 import os
 
+from .debug_trace import get_debug_trace
+from .desc_cache import get_desc_cache
+from .metrics import note_request_error
+from .resilience import DEFAULT_POLICY, ResiliencePolicy, execute, request_host
+from .transport import HttpTransport, get_default_transport
 
-EXCLUDE_METHODS = ['get_capabilities', 'get_api_info', 'source_name', 'get_source_info']
+EXCLUDE_METHODS = ['get_capabilities', 'get_api_info', 'source_name', 'get_source_info', 'transport', 'set_transport',
+                   'resilience_policy', 'set_resilience_policy']
 
 class BaseAPI(ABC):
     """
@@ -47,14 +54,108 @@ class BaseAPI(ABC):
         """
         pass
 
+    @property
+    def transport(self) -> HttpTransport:
+        """
+        获取数据源使用的 HTTP 传输层，未注入时使用默认的共享传输层
+
+        Returns:
+            HttpTransport: 传输层实例
+        """
+        transport = getattr(self, "_transport", None)
+        if transport is None:
+            transport = self._transport = get_default_transport()
+        return transport
+
+    def set_transport(self, transport: HttpTransport):
+        """
+        注入 HTTP 传输层
+
+        Args:
+            transport: 传输层实例
+        """
+        self._transport = transport
+
+    @property
+    def resilience_policy(self) -> ResiliencePolicy:
+        """
+        获取数据源请求使用的弹性策略（重试、对冲、熔断），未设置时使用默认策略
+
+        Returns:
+            ResiliencePolicy: 弹性策略
+        """
+        return getattr(self, "_resilience_policy", None) or DEFAULT_POLICY
+
+    def set_resilience_policy(self, policy: ResiliencePolicy):
+        """
+        设置数据源请求使用的弹性策略
+
+        Args:
+            policy: 弹性策略
+        """
+        self._resilience_policy = policy
+
+    async def _request_json(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        json: Any = None,
+        data: Any = None,
+        policy: Optional[ResiliencePolicy] = None,
+    ) -> Any:
+        """
+        通过共享传输层发送请求并解析 JSON 响应，按 resilience_policy 重试、对冲和熔断（见 resilience 模块）
+
+        Args:
+            policy: 只用于本次请求的弹性策略，默认使用 resilience_policy
+
+        Raises:
+            aiohttp.ClientError: 请求失败或响应状态码错误（熔断打开时为 CircuitOpenError）
+            asyncio.TimeoutError: 请求超时
+        """
+        transport = self.transport
+        try:
+            result = await execute(
+                request_host(url, headers),
+                method,
+                lambda: transport.request_json(method, url, headers=headers, params=params, json=json, data=data),
+                policy or self.resilience_policy,
+            )
+        except Exception as e:
+            note_request_error(e)
+            raise
+        # 每个响应只在这里记录一次，各数据源的解析函数不再单独记录
+        self._trace("response", result, method=method, url=url)
+        return result
+
+    def _trace(self, event: str, payload: Any = None, **fields: Any):
+        """
+        记录一条调试事件到全局调试追踪缓冲区（默认关闭，见 debug_trace 模块）
+
+        Args:
+            event: 事件名称
+            payload: 载荷对象或返回载荷的无参函数，只有被采样时才会格式化
+            **fields: 附加字段
+        """
+        debug_trace = get_debug_trace()
+        if debug_trace.enabled:
+            debug_trace.record(self.source_name, event, payload, **fields)
+
     def get_capabilities(self) -> List[Dict[str, Any]]:
         """
         获取数据源所有能力的描述
-        通过扫描实例方法及其文档字符串自动获取能力描述
+        通过扫描实例方法及其文档字符串自动获取能力描述，结果按数据源类缓存
 
         Returns:
             List[Dict[str, Any]]: 数据源提供的所有方法的描述列表
         """
+        capabilities = get_desc_cache().get_or_compute("capabilities", self.__class__, self._scan_capabilities)
+        return copy.deepcopy(capabilities)
+
+    def _scan_capabilities(self) -> List[Dict[str, Any]]:
         # 获取所有公开方法（不包括内置方法和私有方法）
         capabilities = []
         for attr_name in dir(self):
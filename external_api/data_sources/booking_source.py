@@ -5,14 +5,27 @@ Booking.com flight search data source implementation
 import asyncio
 import logging
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import aiohttp
 
 from .base import BaseAPI
+from .concurrency import DEFAULT_MAX_CONCURRENCY, gather_bounded
+from .response_cache import cached
 
 logger = logging.getLogger("booking_source")
 
+# Hotel detail payloads with more list elements than this (rooms, photos, facilities, ...) are parsed in a worker thread
+PARSE_IN_THREAD_THRESHOLD = 500
+
+# Local sort keys used when hotels from several pages or destinations are merged, (key, reverse)
+HOTEL_SORT_KEYS = {
+    "price": (lambda hotel: hotel["price"]["amount"], False),
+    "bayesian_review_score": (lambda hotel: hotel["review_score"], True),
+    "class_descending": (lambda hotel: hotel["rating"], True),
+    "class_ascending": (lambda hotel: hotel["rating"], False),
+}
+
 
 class BookingSource(BaseAPI):
     """Booking.com data source"""
@@ -29,6 +42,7 @@ class BookingSource(BaseAPI):
             "X-Biz-Id": "matrix-agent",
             "X-Request-Timeout": str(config["timeout"] - 5),
         }
+        self._max_concurrency = config.get("booking_max_concurrency", DEFAULT_MAX_CONCURRENCY)
 
     @property
     def source_name(self) -> str:
@@ -160,12 +174,7 @@ class BookingSource(BaseAPI):
 
             # Send request
             try:
-                async with aiohttp.ClientSession(trust_env=True) as session:
-                    async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                        # Check response status
-                        response.raise_for_status()
-                        data = await response.json()
-
+                data = await self._request_json("GET", request_url, headers=self.headers, params=params)
             except asyncio.TimeoutError:
                 error_msg = f"Request timeout (timeout={self._timeout}s)"
                 logger.error(error_msg)
@@ -233,6 +242,7 @@ class BookingSource(BaseAPI):
             logger.exception(e)
             return {"success": False, "error": error_msg}
 
+    @cached(ttl=7 * 24 * 3600, stale_ttl=30 * 24 * 3600)
     async def _search_hotel_destinations(self, query: str) -> Dict[str, Any]:
         """
         Search for hotel destinations
@@ -280,12 +290,7 @@ class BookingSource(BaseAPI):
 
             # 发送请求
             try:
-                async with aiohttp.ClientSession(trust_env=True) as session:
-                    async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                        # 检查响应状态
-                        response.raise_for_status()
-                        data = await response.json()
-
+                data = await self._request_json("GET", request_url, headers=self.headers, params=params)
             except asyncio.TimeoutError:
                 error_msg = f"Request timeout (timeout={self._timeout}s)"
                 logger.error(error_msg)
@@ -449,12 +454,7 @@ class BookingSource(BaseAPI):
 
             # 发送请求
             try:
-                async with aiohttp.ClientSession(trust_env=True) as session:
-                    async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                        # 检查响应状态
-                        response.raise_for_status()
-                        data = await response.json()
-
+                data = await self._request_json("GET", request_url, headers=self.headers, params=params)
             except asyncio.TimeoutError:
                 error_msg = f"Request timeout (timeout={self._timeout}s)"
                 logger.error(error_msg)
@@ -520,9 +520,12 @@ class BookingSource(BaseAPI):
         currency_code: str = "USD",
         sort_by: str = "bayesian_review_score",
         categories_filter: Optional[str] = None,
+        num_pages: int = 1,
+        num_destinations: int = 1,
     ) -> Dict[str, Any]:
         """
-        Search for hotels by destination name
+        Search for hotels by destination name. Result pages (and optionally several matching destinations) are fetched concurrently,
+        then merged, de-duplicated and sorted locally by sort_by.
 
         Args:
             dest_name(str): Destination name, e.g.: shanghai
@@ -547,17 +550,23 @@ class BookingSource(BaseAPI):
             categories_filter(Optional[str]): Star rating filter, options:
                 - class::1: One star, ..., class::5: Five stars
                 - Multiple selection allowed, comma separated, e.g.: class::1,class::2
+            num_pages(int): Number of result pages to fetch starting from page_number, default is 1
+            num_destinations(int): Number of top matching destinations to search, default is 1
 
         Returns:
             Dict[str, Any]: Dictionary containing hotel search results, e.g.
             {
                 "success": True,                   # Whether successful
                 "data": {                          # If successful, contains the following fields
-                    "destination": {               # Matched destination information
+                    "destination": {               # Best matched destination information
                         "name": "Shanghai",        # Destination name
                         "dest_id": "-1924465",     # Destination ID
                         "search_type": "city"      # Search type
                     },
+                    "destinations": [...],         # All searched destinations, same format as destination
+                    "failed_requests": [           # Pages that failed, the other pages are still returned
+                        {"dest_id": "-1924465", "page_number": 2, "error": "..."}
+                    ],
                     "hotels": [                    # Hotel list
                         {
                             "hotel_id": "123456",  # Hotel ID
@@ -595,50 +604,77 @@ class BookingSource(BaseAPI):
         #     ...     print(f"Search successful")
         # """
         try:
-            # 先搜索目的地信息
-            dest_result = await self._search_hotel_destinations(dest_name)
+            # 先搜索目的地信息（目的地解析结果长期缓存，命中时不发请求）
+            dest_result = await self._search_hotel_destinations(" ".join(dest_name.lower().split()))
             if not dest_result["success"]:
                 return dest_result
 
             if not dest_result["data"]["destinations"]:
                 return {"success": False, "error": f"No matching destination found: {dest_name}"}
 
-            # 使用第一个匹配的目的地
-            destination = dest_result["data"]["destinations"][0]
-            dest_id = destination["dest_id"]
-            search_type = destination["search_type"].upper()
-
-            # 搜索酒店
-            hotels_result = await self._search_hotels_by_destid(
-                dest_id=dest_id,
-                search_type=search_type,
-                arrival_date=arrival_date,
-                departure_date=departure_date,
-                adults=adults,
-                children_age=children_age,
-                room_qty=room_qty,
-                page_number=page_number,
-                price_min=price_min,
-                price_max=price_max,
-                languagecode=languagecode,
-                currency_code=currency_code,
-                sort_by=sort_by,
-                categories_filter=categories_filter,
-            )
-
-            if not hotels_result["success"]:
-                return hotels_result
+            # 使用前 num_destinations 个匹配的目的地，每个目的地请求 num_pages 页，所有请求并发执行
+            destinations = dest_result["data"]["destinations"][: max(1, num_destinations)]
+            requests = [
+                (destination, page)
+                for destination in destinations
+                for page in range(page_number, page_number + max(1, num_pages))
+            ]
+
+            async def search_page(request: Tuple[Dict[str, Any], int]) -> Dict[str, Any]:
+                destination, page = request
+                return await self._search_hotels_by_destid(
+                    dest_id=destination["dest_id"],
+                    search_type=destination["search_type"].upper(),
+                    arrival_date=arrival_date,
+                    departure_date=departure_date,
+                    adults=adults,
+                    children_age=children_age,
+                    room_qty=room_qty,
+                    page_number=page,
+                    price_min=price_min,
+                    price_max=price_max,
+                    languagecode=languagecode,
+                    currency_code=currency_code,
+                    sort_by=sort_by,
+                    categories_filter=categories_filter,
+                )
+
+            results = await gather_bounded(requests, search_page, self._max_concurrency)
+
+            # 按目的地和页码顺序合并，去重
+            hotels: List[Dict[str, Any]] = []
+            seen_ids = set()
+            failed_requests = []
+            for (destination, page), hotels_result in zip(requests, results):
+                if not hotels_result["success"]:
+                    failed_requests.append({"dest_id": destination["dest_id"], "page_number": page, "error": hotels_result["error"]})
+                    continue
+                for hotel in hotels_result["data"]["hotels"]:
+                    if hotel["hotel_id"] not in seen_ids:
+                        seen_ids.add(hotel["hotel_id"])
+                        hotels.append(hotel)
+
+            if len(failed_requests) == len(requests):
+                return {"success": False, "error": failed_requests[0]["error"]}
+
+            # 合并了多个请求时在本地重新排序，缺少排序字段的酒店排在最后
+            if len(requests) > 1 and sort_by in HOTEL_SORT_KEYS:
+                key, reverse = HOTEL_SORT_KEYS[sort_by]
+                present = [hotel for hotel in hotels if key(hotel) is not None]
+                missing = [hotel for hotel in hotels if key(hotel) is None]
+                hotels = sorted(present, key=key, reverse=reverse) + missing
+
+            def describe(destination: Dict[str, Any]) -> Dict[str, Any]:
+                return {"name": destination["name"], "dest_id": destination["dest_id"], "search_type": destination["search_type"]}
 
             # 在返回结果中添加目的地信息
             return {
                 "success": True,
                 "data": {
-                    "destination": {
-                        "name": destination["name"],
-                        "dest_id": destination["dest_id"],
-                        "search_type": destination["search_type"],
-                    },
-                    "hotels": hotels_result["data"]["hotels"],
+                    "destination": describe(destinations[0]),
+                    "destinations": [describe(destination) for destination in destinations],
+                    "hotels": hotels,
+                    "failed_requests": failed_requests,
                 },
             }
 
@@ -648,6 +684,7 @@ class BookingSource(BaseAPI):
             logger.exception(e)
             return {"success": False, "error": error_msg}
 
+    @cached(ttl=30 * 60)
     async def search_hotel_details(
         self,
         hotel_id: str,
@@ -767,12 +804,7 @@ class BookingSource(BaseAPI):
             request_url = f"{self.proxy_url}/api/v1/hotels/getHotelDetails"
 
             try:
-                async with aiohttp.ClientSession(trust_env=True) as session:
-                    async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                        # 检查响应状态
-                        response.raise_for_status()
-                        data = await response.json()
-
+                data = await self._request_json("GET", request_url, headers=self.headers, params=params)
             except asyncio.TimeoutError:
                 error_msg = f"Request timeout (timeout={self._timeout}s)"
                 logger.error(error_msg)
@@ -788,7 +820,12 @@ class BookingSource(BaseAPI):
                 logger.error(f"API returned error: {error_msg}")
                 return {"success": False, "error": error_msg}
 
-            hotel_detail = self._parse_hotel_detail(data.get("data", {}))
+            detail_data = data.get("data", {})
+            # 大的详情数据放到线程中解析，避免长时间阻塞事件循环上的其他请求
+            if self._payload_size(detail_data) > PARSE_IN_THREAD_THRESHOLD:
+                hotel_detail = await asyncio.to_thread(self._parse_hotel_detail, detail_data)
+            else:
+                hotel_detail = self._parse_hotel_detail(detail_data)
             return {"success": True, "data": hotel_detail}
         except Exception as e:
             error_msg = f"Error occurred while searching hotel details: {str(e)}"
@@ -796,6 +833,91 @@ class BookingSource(BaseAPI):
             logger.exception(e)
             return {"success": False, "error": error_msg}
 
+    async def search_hotels_details(
+        self,
+        hotel_ids: List[str],
+        arrival_date: str,
+        departure_date: str,
+        adults: int = 1,
+        children_age: Optional[str] = None,
+        room_qty: int = 1,
+        units: str = "metric",
+        temperature_unit: str = "c",
+        languagecode: str = "en-us",
+        currency_code: str = "EUR",
+        max_concurrency: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Get details of multiple hotels at once, e.g. to build a comparison table from search_hotels_by_dest_name results.
+        Hotels are fetched concurrently, recently fetched details are reused.
+
+        Args:
+            hotel_ids(List[str]): Hotel ID list, duplicates are fetched once
+            arrival_date(str): Check-in date, format: YYYY-MM-DD
+            departure_date(str): Check-out date, format: YYYY-MM-DD
+            adults(int): Number of adults, default is 1
+            children_age(Optional[str]): Children's ages, comma separated, e.g.: 0,17
+            room_qty(int): Number of rooms, default is 1
+            units(str): Units, default is metric
+            temperature_unit(str): Temperature unit, default is c, options: c or f, where c = Celsius, f = Fahrenheit
+            languagecode(str): Language code, default en-us
+            currency_code(str): Currency code, default EUR
+            max_concurrency(Optional[int]): Maximum number of hotels fetched at the same time, default is 8
+
+        Returns:
+            Dict[str, Any]: Dictionary containing hotel details, e.g.
+            {
+                "success": True,                   # Whether successful (False only if every hotel failed)
+                "data": {                          # If successful, contains the following fields
+                    "count": 2,                    # Number of hotels with details
+                    "hotels": [...],               # Hotel details in input order, same format as search_hotel_details()["data"]
+                    "failed_hotels": [             # Hotels that failed
+                        {"hotel_id": "191606", "error": "..."}
+                    ]
+                }
+            }
+        """
+        try:
+            unique_ids = list(dict.fromkeys(str(hotel_id) for hotel_id in hotel_ids))
+            if not unique_ids:
+                return {"success": True, "data": {"count": 0, "hotels": [], "failed_hotels": []}}
+
+            async def fetch(hotel_id: str) -> Dict[str, Any]:
+                return await self.search_hotel_details(
+                    hotel_id=hotel_id,
+                    arrival_date=arrival_date,
+                    departure_date=departure_date,
+                    adults=adults,
+                    children_age=children_age,
+                    room_qty=room_qty,
+                    units=units,
+                    temperature_unit=temperature_unit,
+                    languagecode=languagecode,
+                    currency_code=currency_code,
+                )
+
+            results = await gather_bounded(unique_ids, fetch, max_concurrency or self._max_concurrency)
+
+            hotels = []
+            failed_hotels = []
+            for hotel_id, result in zip(unique_ids, results):
+                if result["success"]:
+                    hotels.append(result["data"])
+                else:
+                    failed_hotels.append({"hotel_id": hotel_id, "error": result["error"]})
+
+            if not hotels:
+                error_msg = "All hotel details retrieval failed:\n" + "\n".join(f"{item['hotel_id']}: {item['error']}" for item in failed_hotels)
+                return {"success": False, "error": error_msg}
+
+            return {"success": True, "data": {"count": len(hotels), "hotels": hotels, "failed_hotels": failed_hotels}}
+
+        except Exception as e:
+            error_msg = f"Error occurred while searching hotels details: {str(e)}"
+            logger.error(error_msg)
+            logger.exception(e)
+            return {"success": False, "error": error_msg}
+
     def _parse_hotel_detail(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """解析酒店详情"""
         facilities = []
@@ -827,8 +949,9 @@ class BookingSource(BaseAPI):
                 if isinstance(value, list):
                     children_and_beds_text[key] = []
                     for item in value:
-                        if len(item.get("text", "")) > 0:
-                            children_and_beds_text[key].append(item.get("text", ""))
+                        text = item.get("text", "")
+                        if len(text) > 0:
+                            children_and_beds_text[key].append(text)
                 elif isinstance(value, int):
                     children_and_beds_text[key] = value
 
@@ -849,6 +972,8 @@ class BookingSource(BaseAPI):
             }
             rooms[roomId] = room
 
+        city = data.get("city", "")
+        district = data.get("district", "")
         hotel_detail = {
             "hotel_id": data.get("hotel_id", ""),  # 酒店 id
             "hotel_name": data.get("hotel_name", ""),  # 酒店名称
@@ -860,8 +985,8 @@ class BookingSource(BaseAPI):
             "latitude": data.get("latitude", ""),  # 经度
             "longitude": data.get("longitude", ""),  # 纬度
             "address": data.get("address", ""),  # 地址
-            "city": data.get("city", ""),  # 城市名
-            "district": data.get("district", "") if data.get("district", "") != data.get("city", "") else "",  # 地址所在区
+            "city": city,  # 城市名
+            "district": district if district != city else "",  # 地址所在区
             "countrycode": data.get("countrycode", ""),  # 国家代码
             "country_trans": data.get("country_trans", ""),  # 国家名
             "currency_code": data.get("currency_code", ""),  # 货币代码
@@ -881,7 +1006,14 @@ class BookingSource(BaseAPI):
             "hotel_important_information": hotel_important_information,
             "rooms": rooms,
         }
-        return {"success": True, "data": hotel_detail}
+        return hotel_detail
+
+    def _payload_size(self, data: Dict[str, Any]) -> int:
+        """粗略估计详情数据的大小：各房间的照片和床型数量加上设施和注意事项的数量"""
+        size = len(data.get("facilities_block", {}).get("facilities", [])) + len(data.get("hotel_important_information_with_codes", []))
+        for room in data.get("rooms", {}).values():
+            size += 1 + len(room.get("photos", [])) + len(room.get("bed_configurations", []))
+        return size
 
     def _format_duration(self, seconds: int) -> str:
         """Convert seconds to hours and minutes format"""
@@ -6,15 +6,19 @@ import importlib
 import inspect
 import logging
 import os
-import pkgutil
 import threading
 from enum import Enum
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
 
 from docstring_parser import parse
 
 from .base import EXCLUDE_METHODS, BaseAPI
+from .desc_cache import get_desc_cache
+from .metrics import instrument_source
+from .resilience import ResiliencePolicy
+from .source_index import build_source_index
+from .transport import HttpTransport
 
 # 用于在shell中设置LLM_GATEWAY_BASE_URL环境变量
 LLM_GATEWAY_BASE_URL_ENV_NAME = "LLM_GATEWAY_BASE_URL"
@@ -78,37 +82,86 @@ class ApiClient:
                 return
             self._sources: Dict[str, BaseAPI] = {}
             self._functions: Dict[str, BaseAPI] = {}
+            self._load_lock = threading.RLock()
+            # 所有数据源共享同一个传输层（连接池）
+            self.transport = HttpTransport(timeout=config["timeout"])
             self._load_data_sources()
             self._initialized = True
 
     def _load_data_sources(self):
         """
-        动态加载所有可用的数据源
-        通过扫描data_sources目录下的所有模块来加载数据源
+        建立数据源发现索引
+        通过解析data_sources目录下的模块得到 source_name -> (模块, 类) 的映射，
+        数据源在首次访问时才会被导入和实例化
         """
-        current_dir = Path(__file__).parent
-        for module_info in pkgutil.iter_modules([str(current_dir)]):
-            type_dict = self._sources
-            if module_info.name.endswith("_function"):
-                type_dict = self._functions
-            elif not module_info.name.endswith("_source"):
-                continue
+        index = build_source_index(str(Path(__file__).parent), "external_api.data_sources", self._exclude_sources)
+        self._source_index: Dict[str, Tuple[str, str]] = index["data_source"]
+        self._function_index: Dict[str, Tuple[str, str]] = index["function"]
+
+    def _get_api(self, api_type: ApiType, api_name: str) -> Optional[BaseAPI]:
+        """
+        获取数据源实例，首次访问时导入模块并实例化
+
+        Args:
+            api_type: ApiType - data source type
+            api_name: str - data source name
+
+        Returns:
+            Optional[BaseAPI]: 数据源实例，不存在或加载失败时返回 None
+        """
+        if api_type == ApiType.DATA_SOURCE:
+            loaded, index = self._sources, self._source_index
+        else:
+            loaded, index = self._functions, self._function_index
 
+        api = loaded.get(api_name)
+        if api is not None or api_name not in index:
+            return api
+
+        with self._load_lock:
+            if api_name in loaded:
+                return loaded[api_name]
+
+            module_name, class_name = index[api_name]
             try:
-                module = importlib.import_module(f".{module_info.name}", package="external_api.data_sources")
-                for item_name in dir(module):
-                    item = getattr(module, item_name)
-                    if (
-                        isinstance(item, type)
-                        and issubclass(item, BaseAPI)
-                        and item != BaseAPI
-                        and item.__name__ not in self._exclude_sources
-                    ):
-                        source = item(config)
-                        type_dict[source.source_name] = source
+                module = importlib.import_module(f".{module_name}", package="external_api.data_sources")
+                api = getattr(module, class_name)(config)
+                api.set_transport(self.transport)
+                api.set_resilience_policy(ResiliencePolicy.from_config(config, api_name))
+                instrument_source(api, [name for name in dir(api) if not name.startswith("_") and name not in EXCLUDE_METHODS])
             except Exception as e:
-                logger.error(f"加载数据源模块 {module_info.name} 失败: {str(e)}\n")
+                logger.error(f"加载数据源模块 {module_name} 失败: {str(e)}\n")
                 logger.exception(e)
+                index.pop(api_name, None)
+                return None
+
+            loaded[api_name] = api
+            return api
+
+    def set_transport(self, transport: HttpTransport):
+        """
+        替换所有数据源共享的传输层（包括已加载的数据源），如 replay.RecordingTransport
+
+        Args:
+            transport: 传输层实例
+        """
+        with self._load_lock:
+            self.transport = transport
+            for api in [*self._sources.values(), *self._functions.values()]:
+                api.set_transport(transport)
+
+    def set_proxy_url(self, proxy_url: str):
+        """
+        修改所有数据源访问的代理地址（包括已加载的数据源），如指向 replay.ReplayServer
+
+        Args:
+            proxy_url: 代理地址
+        """
+        with self._load_lock:
+            config["external_api_proxy_url"] = proxy_url
+            for api in [*self._sources.values(), *self._functions.values()]:
+                if hasattr(api, "proxy_url"):
+                    api.proxy_url = proxy_url
 
     def get_function_desc(self, function_name: str) -> str:
         """
@@ -145,17 +198,27 @@ class ApiClient:
         Returns:
             str: Readable description of the data source and its API
         """
-        output_lines = ["# Available data sources (refer to the python code examples, write python code to call them)\n"]
-
-        # Directly use the mapping value to get the data source instance
-        if api_type == ApiType.DATA_SOURCE:
-            api = self._sources.get(api_name)
-        else:
-            api = self._functions.get(api_name)
+        api = self._get_api(api_type, api_name)
 
         if not api:
             return f"# {api_type.value} {api_name} does not exist"
 
+        # The description only depends on the class, so it is rendered once and memoized
+        return get_desc_cache().get_or_compute("desc", api.__class__, lambda: self._render_desc(api, api_name))
+
+    def _render_desc(self, api: BaseAPI, api_name: str) -> str:
+        """
+        Render the description of a data source from its docstrings
+
+        Args:
+            api: BaseAPI - data source instance
+            api_name: str - data source name
+
+        Returns:
+            str: Readable description of the data source and its API
+        """
+        output_lines = ["# Available data sources (refer to the python code examples, write python code to call them)\n"]
+
         api_info = api.get_api_info()
 
         # Add data source title and description
@@ -226,6 +289,15 @@ class ApiClient:
 
         return "\n".join(output_lines)
 
+    def get_data_source_names(self) -> List[str]:
+        """
+        Get the names of all discovered data sources (without loading them)
+
+        Returns:
+            List[str]: Data source names, usable as attributes of the client
+        """
+        return list(self._source_index)
+
     def get_data_sources_basic_info(self) -> Dict[str, Dict[str, str]]:
         """
         Get basic information of all data sources, only including name and description
@@ -235,11 +307,15 @@ class ApiClient:
         """
         result = {}
 
-        for name, source in self._sources.items():
+        for name in list(self._source_index):
             # yahoo_finance和twitter 已通过 tool 实现，这里不展示
             if name in ["yahoo_finance", "twitter", "booking", "pinterest", "tripadvisor"]:
                 continue
 
+            source = self._get_api(ApiType.DATA_SOURCE, name)
+            if source is None:
+                continue
+
             source_info = source.get_api_info()
 
             # Get display name and description
@@ -256,7 +332,7 @@ class ApiClient:
         获取所有数据源的所有方法的描述
         """
         result = []
-        for function_name, function in self._functions.items():
+        for function_name in list(self._function_index):
             result.append(self.get_function_desc(function_name))
         return "\n".join(result)
 
@@ -273,9 +349,12 @@ class ApiClient:
         Raises:
             AttributeError: data source does not exist
         """
-        if name not in self._sources:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        source = self._get_api(ApiType.DATA_SOURCE, name)
+        if source is None:
             raise AttributeError(f"Data source {name} does not exist")
-        return self._sources[name]
+        return source
 
 
 # 全局默认实例
@@ -5,14 +5,21 @@ Commodities data source implementation
 import asyncio
 import json
 import logging
+import time
 from typing import Any, Dict, Optional
 
 import aiohttp
 
+from . import timeparse
 from .base import BaseAPI
+from .response_cache import cached
+from .timeseries_store import get_timeseries_store, parse_date_range
 
 logger = logging.getLogger("commodities_source")
 
+# Price fields recorded for every commodity snapshot
+RATE_FIELDS = ("open", "high", "low", "prev", "current")
+
 
 class CommoditiesSource(BaseAPI):
     """Commodity price data source"""
@@ -45,6 +52,7 @@ class CommoditiesSource(BaseAPI):
             "description": "Commodity price data source, provides price information for commodities such as COCOA, COFFEE, CORN, OIL, SOYBEAN, SUGAR, WHEAT, etc.",
         }
 
+    @cached(ttl=24 * 3600, stale_ttl=7 * 24 * 3600)
     async def get_supported_commodities(self) -> Dict[str, Any]:
         """Get the list of supported commodities.
         This method is used to get the list of commodities that can be queried.
@@ -83,13 +91,8 @@ class CommoditiesSource(BaseAPI):
         try:
             request_url = f"{self.proxy_url}/v1/supported"
 
-            # Send request using aiohttp
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.get(request_url, headers=self._headers, timeout=self._timeout) as response:
-                    response.raise_for_status()
-
-                    # Parse the response
-                    data = await response.json(content_type=None)
+            # Send request
+            data = await self._request_json("GET", request_url, headers=self._headers)
 
             if isinstance(data, str):
                 data = json.loads(data)
@@ -170,13 +173,8 @@ class CommoditiesSource(BaseAPI):
 
             request_url = f"{self.proxy_url}/v1/market-data"
 
-            # Send request using aiohttp
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.get(request_url, headers=self._headers, params=params, timeout=self._timeout) as response:
-                    response.raise_for_status()
-
-                    # Parse the response
-                    data = await response.json(content_type=None)
+            # Send request
+            data = await self._request_json("GET", request_url, headers=self._headers, params=params)
 
             if isinstance(data, str):
                 data = json.loads(data)
@@ -187,7 +185,10 @@ class CommoditiesSource(BaseAPI):
             if not data.get("success", False):
                 raise ValueError(f"API response failed: {data}")
 
-            return {"success": True, "data": {"base_currency": data.get("base_currency", ""), "rates": data.get("rates", {})}}
+            rates = data.get("rates", {})
+            self._record_rates(data.get("base_currency", "") or currency_code, rates, data.get("timestamp"))
+
+            return {"success": True, "data": {"base_currency": data.get("base_currency", ""), "rates": rates}}
 
         except asyncio.TimeoutError:
             error_msg = f"Request timeout (timeout={self._timeout}s)"
@@ -203,6 +204,77 @@ class CommoditiesSource(BaseAPI):
             logger.exception(e)
             return {"success": False, "error": error_msg}
 
+    def _record_rates(self, currency_code: str, rates: Dict[str, Any], timestamp: Any = None):
+        """Append a price snapshot of each commodity to the local time-series store"""
+        if not isinstance(timestamp, (int, float)):
+            timestamp = time.time()
+        store = get_timeseries_store()
+        for commodity_code, rate in rates.items():
+            if isinstance(rate, dict):
+                series = store.series(self.source_name, f"{commodity_code}/{currency_code}", "snapshot", RATE_FIELDS)
+                series.write([int(timestamp)], {field: [rate.get(field)] for field in RATE_FIELDS})
+
+    async def get_commodities_price_history(
+        self,
+        commodity_code: str,
+        currency_code: str,
+        start_date: str = "",
+        end_date: str = "",
+    ) -> Dict[str, Any]:
+        """
+        Get locally recorded commodity price history.
+
+        The commodities API only provides the latest price, every successful get_commodities_price() call is recorded locally,
+        this method returns those recorded snapshots without calling the API.
+
+        Args:
+            commodity_code(str): Commodity code, e.g. "COCOA,CORN,OIL"
+            currency_code(str): Currency code, e.g. "USD"
+            start_date(str): Start date (UTC) in YYYY-MM-DD format, default: no lower bound
+            end_date(str): End date (UTC, inclusive) in YYYY-MM-DD format, default: no upper bound
+
+        Returns:
+            Dict[str, Any]: Dictionary containing the recorded prices, e.g.
+            {
+                "success": True,
+                "data": {
+                    "base_currency": "USD",
+                    "history": {
+                        "COCOA": [ # Snapshots in chronological order
+                            {
+                                "time": "2025-04-25 17:00:00", # Snapshot time (UTC)
+                                "open": 9270,
+                                "high": 9633,
+                                "low": 9201,
+                                "prev": 9288,
+                                "current": 9590
+                            }
+                        ]
+                    }
+                }
+            }
+        """
+        try:
+            start, end = parse_date_range(start_date, end_date)
+            store = get_timeseries_store()
+            history = {}
+            for code in (code.strip() for code in commodity_code.split(",")):
+                if not code:
+                    continue
+                series = store.series(self.source_name, f"{code}/{currency_code}", "snapshot", RATE_FIELDS)
+                timestamps, columns = series.read(start, end)
+                history[code] = [
+                    {"time": time_str, **{field: columns[field][i] for field in RATE_FIELDS}}
+                    for i, time_str in enumerate(timeparse.format_timestamps(timestamps))
+                ]
+            return {"success": True, "data": {"base_currency": currency_code, "history": history}}
+
+        except Exception as e:
+            error_msg = f"Error occurred while getting commodity price history: {str(e)}"
+            logger.error(error_msg)
+            logger.exception(e)
+            return {"success": False, "error": error_msg}
+
 
 if __name__ == "__main__":
     from external_api.data_sources.client import get_client
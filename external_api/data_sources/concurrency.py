@@ -0,0 +1,300 @@
+"""
+数据源并发工具
+
+提供有界并发的扇出（fan-out）、带指数退避的重试，以及按上游主机共享的 AIMD 自适应并发限制，
+供需要一次请求多个资源的数据源方法使用。
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Sequence, Tuple, Type, TypeVar
+
+import aiohttp
+
+logger = logging.getLogger("data_sources_concurrency")
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_RETRY_ATTEMPTS = 3
+DEFAULT_RETRY_BASE_DELAY = 0.5
+DEFAULT_RETRY_MAX_DELAY = 8.0
+
+# 可重试的异常：超时、连接错误以及 429/5xx 响应
+RETRYABLE_EXCEPTIONS: Tuple[Type[BaseException], ...] = (asyncio.TimeoutError, aiohttp.ClientError)
+
+
+class CircuitOpenError(aiohttp.ClientError):
+    """上游主机的熔断器处于打开状态，请求未发出即被拒绝"""
+
+    def __init__(self, host: str, retry_after: float):
+        super().__init__(f"Circuit breaker open for {host}, retry after {retry_after:.1f}s")
+        self.host = host
+        self.retry_after = retry_after
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """
+    判断异常是否值得重试
+
+    4xx 响应（429 除外）说明请求本身有问题，重试没有意义；熔断打开时立即重试同样没有意义。
+    """
+    if isinstance(exc, CircuitOpenError):
+        return False
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status == 429 or exc.status >= 500
+    return isinstance(exc, RETRYABLE_EXCEPTIONS)
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """
+    第 attempt 次失败后的重试等待秒数：指数退避，在 [delay/2, delay] 内随机抖动
+
+    Args:
+        attempt: 已失败的尝试次数（从 1 开始）
+        base_delay: 第一次重试前的基础等待秒数
+        max_delay: 单次等待上限
+
+    Returns:
+        float: 等待秒数
+    """
+    delay = min(max_delay, base_delay * (2 ** (attempt - 1)))
+    return random.uniform(delay / 2, delay)
+
+
+async def retry_async(
+    func: Callable[[], Awaitable[R]],
+    attempts: int = DEFAULT_RETRY_ATTEMPTS,
+    base_delay: float = DEFAULT_RETRY_BASE_DELAY,
+    max_delay: float = DEFAULT_RETRY_MAX_DELAY,
+) -> R:
+    """
+    执行协程工厂函数，遇到可重试异常时按带抖动的指数退避重试
+
+    Args:
+        func: 无参协程工厂函数，每次尝试调用一次
+        attempts: 最多尝试次数（包含第一次）
+        base_delay: 第一次重试前的基础等待秒数
+        max_delay: 单次等待上限
+
+    Returns:
+        R: func 的返回值
+
+    Raises:
+        最后一次尝试的异常，或第一个不可重试的异常
+    """
+    attempt = 1
+    while True:
+        try:
+            return await func()
+        except Exception as e:
+            if attempt >= attempts or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            logger.warning(f"Attempt {attempt}/{attempts} failed ({e!r}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+async def iter_bounded(
+    items: Iterable[T],
+    worker: Callable[[T], Awaitable[R]],
+    limit: int = DEFAULT_MAX_CONCURRENCY,
+) -> AsyncIterator[Tuple[int, R]]:
+    """
+    以至多 limit 个并发任务对 items 逐个执行 worker，按完成顺序产出结果
+
+    Args:
+        items: 输入序列
+        worker: 对单个输入执行的协程函数；抛出的异常会传播给调用方并取消其余任务
+        limit: 最大并发数
+
+    Yields:
+        Tuple[int, R]: (输入下标, worker 返回值)
+    """
+    limit = max(1, int(limit))
+    iterator = enumerate(items)
+    pending = {}
+
+    def spawn() -> bool:
+        try:
+            index, item = next(iterator)
+        except StopIteration:
+            return False
+        pending[asyncio.ensure_future(worker(item))] = index
+        return True
+
+    try:
+        while len(pending) < limit and spawn():
+            pass
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index = pending.pop(task)
+                spawn()
+                yield index, task.result()
+    finally:
+        # 调用方提前退出或出错时取消尚未完成的任务
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def gather_bounded(
+    items: Sequence[T],
+    worker: Callable[[T], Awaitable[R]],
+    limit: int = DEFAULT_MAX_CONCURRENCY,
+) -> List[R]:
+    """
+    以有界并发执行 worker，按输入顺序返回全部结果
+
+    Args:
+        items: 输入序列
+        worker: 对单个输入执行的协程函数
+        limit: 最大并发数
+
+    Returns:
+        List[R]: 与 items 一一对应的结果列表
+    """
+    results: List[Any] = [None] * len(items)
+    async for index, result in iter_bounded(items, worker, limit):
+        results[index] = result
+    return results
+
+
+def is_overload(exc: BaseException) -> bool:
+    """判断异常是否表示上游过载（429/503 或超时），用于 AIMD 降低并发"""
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status in (429, 503)
+    return isinstance(exc, asyncio.TimeoutError)
+
+
+class AdaptiveLimiter:
+    """
+    AIMD 自适应并发限制器
+
+    每个成功的请求让并发上限增加 1/limit（约每轮增加 1），上游返回 429/503 或超时时上限减半。
+    同一轮中多个过载信号只减半一次：只有在上一次减半之后发出的请求才会触发新的减半。
+    """
+
+    def __init__(
+        self,
+        initial_limit: float = 4,
+        min_limit: float = 1,
+        max_limit: float = 32,
+        decrease_factor: float = 0.5,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self.in_flight = 0
+        self._waiters: "deque[asyncio.Future]" = deque()
+        self._last_decrease = 0.0
+        self.overloads = 0
+
+    async def acquire(self) -> float:
+        """
+        等待一个并发名额
+
+        Returns:
+            float: 获得名额的时间（用于判断过载信号是否已被处理）
+        """
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                elif waiter.done() and not waiter.cancelled():
+                    # 已被 _wake 唤醒但在恢复前被取消：把名额转交给下一个等待者
+                    self._wake()
+                raise
+        self.in_flight += 1
+        return time.monotonic()
+
+    def release(self, started_at: float, outcome: str = "success"):
+        """
+        归还名额并根据结果调整并发上限
+
+        Args:
+            started_at: acquire() 返回的时间
+            outcome: success（增加上限）/ overload（减半上限）/ error（其他失败，不调整）
+        """
+        self.in_flight -= 1
+        if outcome == "overload":
+            self.overloads += 1
+            if started_at >= self._last_decrease:
+                self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                self._last_decrease = time.monotonic()
+                logger.warning(f"Upstream overloaded, concurrency limit decreased to {self.limit:.1f}")
+        elif outcome == "success":
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._wake()
+
+    def _wake(self):
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    async def run(
+        self,
+        func: Callable[[], Awaitable[R]],
+        attempts: int = DEFAULT_RETRY_ATTEMPTS,
+        base_delay: float = DEFAULT_RETRY_BASE_DELAY,
+        max_delay: float = DEFAULT_RETRY_MAX_DELAY,
+    ) -> R:
+        """
+        在并发限制下执行协程工厂函数，并按 retry_async 的规则重试
+
+        Args:
+            func: 无参协程工厂函数
+            attempts: 最多尝试次数（包含第一次）
+            base_delay: 第一次重试前的基础等待秒数
+            max_delay: 单次等待上限
+
+        Returns:
+            R: func 的返回值
+        """
+
+        async def attempt() -> R:
+            started_at = await self.acquire()
+            outcome = "success"
+            try:
+                return await func()
+            except BaseException as e:
+                outcome = "overload" if is_overload(e) else "error"
+                raise
+            finally:
+                self.release(started_at, outcome)
+
+        return await retry_async(attempt, attempts=attempts, base_delay=base_delay, max_delay=max_delay)
+
+
+_host_limiters: Dict[str, AdaptiveLimiter] = {}
+
+
+def get_host_limiter(host: str) -> AdaptiveLimiter:
+    """
+    获取上游主机共享的自适应并发限制器
+
+    Args:
+        host: 上游主机名（如 X-Original-Host），访问同一主机的数据源共享同一个限制器
+
+    Returns:
+        AdaptiveLimiter: 该主机的限制器
+    """
+    limiter = _host_limiters.get(host)
+    if limiter is None:
+        limiter = _host_limiters.setdefault(host, AdaptiveLimiter())
+    return limiter
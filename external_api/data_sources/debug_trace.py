@@ -0,0 +1,178 @@
+"""
+数据源调试追踪
+
+替代在解析路径上直接 print 整个上游响应的做法:
+    - 默认关闭，关闭时 record() 只做一次布尔判断，不格式化任何内容
+    - 按采样率记录，只有被采样的事件才会格式化载荷
+    - 载荷用受限的 repr 格式化（限制嵌套深度、容器长度和字符串长度），再截断到 max_chars，
+      格式化开销不随响应体大小增长
+    - 记录写入固定容量的环形缓冲区，需要时通过 dump() 导出，不写标准输出
+
+环境变量:
+    DATA_SOURCE_DEBUG_TRACE:           采样率（0~1），0 或未设置表示关闭
+    DATA_SOURCE_DEBUG_TRACE_SIZE:      环形缓冲区容量（条），默认 200
+    DATA_SOURCE_DEBUG_TRACE_MAX_CHARS: 单条载荷的最大字符数，默认 2000
+"""
+
+import json
+import logging
+import os
+import random
+import reprlib
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+ENV_DEBUG_TRACE = "DATA_SOURCE_DEBUG_TRACE"
+ENV_DEBUG_TRACE_SIZE = "DATA_SOURCE_DEBUG_TRACE_SIZE"
+ENV_DEBUG_TRACE_MAX_CHARS = "DATA_SOURCE_DEBUG_TRACE_MAX_CHARS"
+DEFAULT_CAPACITY = 200
+DEFAULT_MAX_CHARS = 2000
+
+logger = logging.getLogger("data_sources_debug_trace")
+
+
+def _env_number(name: str, default: float) -> float:
+    value = os.getenv(name, "").strip()
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning(f"环境变量 {name}={value} 不是数字，使用默认值 {default}")
+        return default
+
+
+class DebugTrace:
+    """
+    采样的调试追踪环形缓冲区
+    """
+
+    def __init__(self, sample_rate: float = 0.0, capacity: int = DEFAULT_CAPACITY, max_chars: int = DEFAULT_MAX_CHARS):
+        self._entries: Deque[Dict[str, Any]] = deque(maxlen=max(1, int(capacity)))
+        self._lock = threading.Lock()
+        self.sample_rate = 0.0
+        self.enabled = False
+        self.max_chars = max_chars
+        self.dropped = 0
+        self.configure(sample_rate=sample_rate, capacity=capacity, max_chars=max_chars)
+
+    def configure(
+        self,
+        sample_rate: Optional[float] = None,
+        capacity: Optional[int] = None,
+        max_chars: Optional[int] = None,
+    ):
+        """
+        调整追踪配置，未传入的参数保持不变
+
+        Args:
+            sample_rate: 采样率（0~1），0 表示关闭
+            capacity: 环形缓冲区容量，缩小时丢弃最旧的记录
+            max_chars: 单条载荷的最大字符数
+        """
+        if sample_rate is not None:
+            self.sample_rate = min(1.0, max(0.0, float(sample_rate)))
+            self.enabled = self.sample_rate > 0
+        if max_chars is not None:
+            self.max_chars = max(16, int(max_chars))
+            self._repr = reprlib.Repr()
+            self._repr.maxlevel = 4
+            self._repr.maxdict = self._repr.maxlist = self._repr.maxtuple = self._repr.maxset = 20
+            self._repr.maxstring = self._repr.maxother = min(200, self.max_chars)
+        if capacity is not None:
+            with self._lock:
+                self._entries = deque(self._entries, maxlen=max(1, int(capacity)))
+
+    def record(self, source: str, event: str, payload: Any = None, **fields: Any):
+        """
+        记录一条调试事件（未开启或未被采样时直接返回）
+
+        Args:
+            source: 数据源名称
+            event: 事件名称，如 parse_pins
+            payload: 载荷对象；也可以传入无参函数，只有被采样时才调用
+            **fields: 附加的简单字段（如 url、count），原样保存
+        """
+        if not self.enabled or (self.sample_rate < 1.0 and random.random() >= self.sample_rate):
+            return
+        if callable(payload):
+            payload = payload()
+        entry = {"time": time.time(), "source": source, "event": event, **fields}
+        if payload is not None:
+            entry["payload"] = self._format(payload)
+        with self._lock:
+            if len(self._entries) == self._entries.maxlen:
+                self.dropped += 1
+            self._entries.append(entry)
+
+    def _format(self, payload: Any) -> str:
+        text = payload if isinstance(payload, str) else self._repr.repr(payload)
+        if len(text) > self.max_chars:
+            text = f"{text[: self.max_chars]}...<{len(text) - self.max_chars} more chars>"
+        return text
+
+    def entries(self, source: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        获取缓冲区中的记录（从旧到新）
+
+        Args:
+            source: 只返回该数据源的记录，None 表示全部
+
+        Returns:
+            List[Dict[str, Any]]: 记录列表
+        """
+        with self._lock:
+            entries = list(self._entries)
+        if source is not None:
+            entries = [entry for entry in entries if entry["source"] == source]
+        return entries
+
+    def dump(self, path: Optional[str] = None, source: Optional[str] = None, clear: bool = False) -> str:
+        """
+        导出缓冲区中的记录，每行一个 JSON 对象
+
+        Args:
+            path: 写入的文件路径（追加），None 表示只返回文本
+            source: 只导出该数据源的记录
+            clear: 导出后清空缓冲区
+
+        Returns:
+            str: 导出的文本
+        """
+        text = "".join(json.dumps(entry, ensure_ascii=False, default=str) + "\n" for entry in self.entries(source))
+        if path:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(text)
+        if clear:
+            self.clear()
+        return text
+
+    def clear(self):
+        """清空缓冲区"""
+        with self._lock:
+            self._entries.clear()
+            self.dropped = 0
+
+
+_debug_trace = DebugTrace(
+    sample_rate=_env_number(ENV_DEBUG_TRACE, 0.0),
+    capacity=int(_env_number(ENV_DEBUG_TRACE_SIZE, DEFAULT_CAPACITY)),
+    max_chars=int(_env_number(ENV_DEBUG_TRACE_MAX_CHARS, DEFAULT_MAX_CHARS)),
+)
+
+
+def get_debug_trace() -> DebugTrace:
+    """
+    获取全局调试追踪缓冲区
+
+    Returns:
+        DebugTrace: 全局调试追踪实例
+    """
+    return _debug_trace
+
+
+def trace(source: str, event: str, payload: Any = None, **fields: Any):
+    """记录一条调试事件到全局缓冲区，参数见 DebugTrace.record"""
+    _debug_trace.record(source, event, payload, **fields)
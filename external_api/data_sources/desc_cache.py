@@ -0,0 +1,124 @@
+"""
+数据源描述缓存
+
+数据源的能力列表和描述文本由 inspect / docstring_parser 生成，开销较大且在进程内不会变化。
+这里按数据源类做一次计算后缓存在内存中；设置 DATA_SOURCE_DESC_CACHE_DIR 环境变量后，
+结果还会以模块源码的 sha256 为键持久化到磁盘，模块修改后自动失效。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+ENV_DESC_CACHE_DIR = "DATA_SOURCE_DESC_CACHE_DIR"
+
+logger = logging.getLogger("data_sources_desc_cache")
+
+
+class DescCache:
+    """按 (类型, 数据源类) 缓存描述信息，支持可选的磁盘持久化"""
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir
+        self._memory: Dict[Tuple[str, type], Any] = {}
+        self._fingerprints: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, kind: str, cls: type, compute: Callable[[], Any]) -> Any:
+        """
+        获取缓存的描述信息，未命中时调用 compute 生成并缓存
+
+        Args:
+            kind: 描述类型，如 capabilities / desc
+            cls: 数据源类
+            compute: 生成描述信息的函数，返回值需可 JSON 序列化
+
+        Returns:
+            Any: 描述信息
+        """
+        key = (kind, cls)
+        try:
+            return self._memory[key]
+        except KeyError:
+            pass
+
+        with self._lock:
+            if key in self._memory:
+                return self._memory[key]
+
+            value = self._load(kind, cls)
+            if value is None:
+                value = compute()
+                self._store(kind, cls, value)
+            self._memory[key] = value
+            return value
+
+    def clear(self):
+        """清空内存缓存"""
+        with self._lock:
+            self._memory.clear()
+            self._fingerprints.clear()
+
+    def _fingerprint(self, cls: type) -> Optional[str]:
+        module_name = cls.__module__
+        if module_name not in self._fingerprints:
+            module_file = getattr(sys.modules.get(module_name), "__file__", None)
+            fingerprint = None
+            if module_file:
+                try:
+                    with open(module_file, "rb") as f:
+                        fingerprint = hashlib.sha256(f.read()).hexdigest()
+                except OSError:
+                    pass
+            self._fingerprints[module_name] = fingerprint
+        return self._fingerprints[module_name]
+
+    def _cache_file(self, kind: str, cls: type) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, f"{cls.__module__}.{cls.__qualname__}.{kind}.json")
+
+    def _load(self, kind: str, cls: type) -> Any:
+        cache_file = self._cache_file(kind, cls)
+        if cache_file is None or not os.path.exists(cache_file):
+            return None
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取描述缓存 {cache_file} 失败: {e}")
+            return None
+        if cached.get("fingerprint") != self._fingerprint(cls):
+            return None
+        return cached.get("value")
+
+    def _store(self, kind: str, cls: type, value: Any):
+        cache_file = self._cache_file(kind, cls)
+        fingerprint = self._fingerprint(cls)
+        if cache_file is None or fingerprint is None:
+            return
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump({"fingerprint": fingerprint, "value": value}, f, ensure_ascii=False)
+            os.replace(tmp_file, cache_file)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"写入描述缓存 {cache_file} 失败: {e}")
+
+
+_desc_cache = DescCache(os.getenv(ENV_DESC_CACHE_DIR))
+
+
+def get_desc_cache() -> DescCache:
+    """
+    获取全局描述缓存
+
+    Returns:
+        DescCache: 全局描述缓存实例
+    """
+    return _desc_cache
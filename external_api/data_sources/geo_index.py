@@ -0,0 +1,340 @@
+"""
+数据源本地地理索引
+
+保存已经见过的地点（坐标 + 摘要记录），用于在本地回答附近地点查询:
+    - 地点：来自详情/搜索结果的摘要记录和经纬度
+    - 覆盖（coverage）：一次附近查询 API 调用后，查询点所在的 COVERAGE_PRECISION 位 geohash 单元
+      被标记为已覆盖，并记录该次返回的地点 id
+
+新的附近查询落在已覆盖且未过期的单元中时，原样返回该单元记录的 API 答案（同样的地点、同样的顺序），
+不补充其他已知地点：API 返回的结果较少说明半径内没有其他匹配的地点。未覆盖的单元回退到 API。
+地点摘要记录按语言分别保存，坐标与语言无关。
+
+设置 DATA_SOURCE_GEO_INDEX 环境变量（文件路径）后持久化为只追加的 JSON Lines 文件，
+加载时回放，重复记录过多时压缩；否则只保存在进程内存中。
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+ENV_GEO_INDEX = "DATA_SOURCE_GEO_INDEX"
+# 覆盖精度：6 位 geohash 约 1.2km x 0.6km，单元内任意点的附近结果基本相同
+COVERAGE_PRECISION = 6
+COMPACT_RATIO = 2
+COMPACT_MIN_LINES = 1024
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+logger = logging.getLogger("data_sources_geo_index")
+
+
+def geohash_encode(latitude: float, longitude: float, precision: int) -> str:
+    """
+    计算经纬度的 geohash
+
+    Args:
+        latitude: 纬度
+        longitude: 经度
+        precision: geohash 位数
+
+    Returns:
+        str: geohash 字符串
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        target, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (target[0] + target[1]) / 2
+        value <<= 1
+        if coordinate >= mid:
+            value |= 1
+            target[0] = mid
+        else:
+            target[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def parse_coordinates(latitude: Any, longitude: Any) -> Optional[Tuple[float, float]]:
+    """把上游返回的经纬度（可能是字符串或空值）转换为浮点数，无效时返回 None"""
+    try:
+        lat, lon = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180) or (lat == 0 and lon == 0):
+        return None
+    return lat, lon
+
+
+class GeoIndex:
+    """
+    地点地理索引
+
+    地点坐标按 (namespace, location_id) 保存，摘要记录按 (namespace, location_id, language) 保存；
+    覆盖按 (namespace, 覆盖单元, scope) 保存，scope 区分会影响结果集合的查询参数（如语言、类别）。
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        # (namespace, location_id, language) -> 摘要记录
+        self._records: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        # (namespace, location_id) -> (纬度, 经度)
+        self._points: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        # (namespace, 覆盖单元, scope) -> (抓取时间, 半径千米（None 表示不限）, location_id 列表, id -> 与查询点相关的字段)
+        self._coverage: Dict[Tuple[str, str, str], Tuple[float, Optional[float], List[str], Dict[str, Dict[str, Any]]]] = {}
+        self._log_lines = 0
+        self._lock = threading.RLock()
+        if path:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logger.warning(f"读取地理索引 {self.path} 失败，忽略本地数据: {e}")
+            return
+        for line in lines:
+            try:
+                self._apply(json.loads(line))
+            except (ValueError, KeyError, TypeError):
+                # 末尾不完整的行（写入过程中进程退出）
+                continue
+        self._log_lines = len(lines)
+        if self._log_lines > max(COMPACT_MIN_LINES, COMPACT_RATIO * (len(self._records) + len(self._points) + len(self._coverage))):
+            self._compact()
+
+    def _apply(self, event: Dict[str, Any]):
+        namespace = event["ns"]
+        if event["type"] == "location":
+            self._add_location(namespace, event["id"], event.get("lang", ""), event.get("record"), event.get("lat"), event.get("lon"))
+        elif event["type"] == "coverage":
+            self._coverage[(namespace, event["cell"], event["scope"])] = (
+                event["fetched_at"],
+                event.get("radius_km"),
+                event["ids"],
+                event.get("extras") or {},
+            )
+
+    def _events(self) -> Iterable[Dict[str, Any]]:
+        for (namespace, location_id, language), record in self._records.items():
+            yield {"type": "location", "ns": namespace, "id": location_id, "lang": language, "record": record}
+        for (namespace, location_id), (lat, lon) in self._points.items():
+            yield {"type": "location", "ns": namespace, "id": location_id, "lat": lat, "lon": lon}
+        for (namespace, cell, scope), (fetched_at, radius_km, ids, extras) in self._coverage.items():
+            yield {
+                "type": "coverage",
+                "ns": namespace,
+                "cell": cell,
+                "scope": scope,
+                "fetched_at": fetched_at,
+                "radius_km": radius_km,
+                "ids": ids,
+                "extras": extras,
+            }
+
+    def _compact(self):
+        tmp_file = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                lines = [json.dumps(event, ensure_ascii=False) + "\n" for event in self._events()]
+                f.writelines(lines)
+            os.replace(tmp_file, self.path)
+            self._log_lines = len(lines)
+        except OSError as e:
+            logger.warning(f"压缩地理索引 {self.path} 失败: {e}")
+
+    def _persist(self, events: List[Dict[str, Any]]):
+        if not self.path or not events:
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(event, ensure_ascii=False) + "\n" for event in events)
+            self._log_lines += len(events)
+        except OSError as e:
+            logger.warning(f"写入地理索引 {self.path} 失败: {e}")
+
+    def _add_location(
+        self,
+        namespace: str,
+        location_id: str,
+        language: str,
+        record: Optional[Dict[str, Any]],
+        latitude: Optional[float],
+        longitude: Optional[float],
+    ):
+        if record:
+            # 不同接口返回的字段不同（如详情只提供部分字段），合并而不是替换
+            record_key = (namespace, location_id, language)
+            self._records[record_key] = {**self._records.get(record_key, {}), **record}
+        if latitude is not None and longitude is not None:
+            self._points[(namespace, location_id)] = (latitude, longitude)
+
+    def add_locations(self, namespace: str, locations: Iterable[Dict[str, Any]], language: str = ""):
+        """
+        记录地点
+
+        Args:
+            namespace: 命名空间，通常为数据源名称
+            locations: 地点列表，每项包含 location_id、record（摘要记录，可为空），
+                以及可选的 latitude、longitude
+            language: 摘要记录的语言，只有同一语言的查询会使用这些记录
+        """
+        events = []
+        with self._lock:
+            for location in locations:
+                location_id = str(location["location_id"])
+                record = location.get("record") or None
+                point = parse_coordinates(location.get("latitude"), location.get("longitude"))
+                latitude, longitude = point if point else (None, None)
+                old_point = self._points.get((namespace, location_id))
+                old_record = self._records.get((namespace, location_id, language)) or {}
+                record_changed = record is not None and any(key not in old_record or old_record[key] != value for key, value in record.items())
+                point_changed = point is not None and old_point != point
+                if not record_changed and not point_changed:
+                    continue
+                self._add_location(namespace, location_id, language, record, latitude, longitude)
+                event: Dict[str, Any] = {"type": "location", "ns": namespace, "id": location_id}
+                if record_changed:
+                    event.update(lang=language, record=self._records[(namespace, location_id, language)])
+                if point_changed:
+                    event.update(lat=latitude, lon=longitude)
+                events.append(event)
+            self._persist(events)
+
+    def add_coverage(
+        self,
+        namespace: str,
+        latitude: float,
+        longitude: float,
+        scope: str,
+        location_ids: List[str],
+        radius_km: Optional[float] = None,
+        extras: Optional[Dict[str, Dict[str, Any]]] = None,
+    ):
+        """
+        把查询点所在的覆盖单元标记为已覆盖
+
+        Args:
+            namespace: 命名空间
+            latitude: 查询点纬度
+            longitude: 查询点经度
+            scope: 查询范围标识（如 "en|hotels"）
+            location_ids: 该次查询返回的地点 id（按 API 返回顺序）
+            radius_km: 该次查询的半径（千米），None 表示使用 API 默认范围
+            extras: location_id -> 与查询点相关的字段（如 distance、bearing），本地回答时原样合并到记录中
+        """
+        cell = geohash_encode(latitude, longitude, COVERAGE_PRECISION)
+        fetched_at = time.time()
+        ids = [str(location_id) for location_id in location_ids]
+        extras = {str(location_id): dict(fields) for location_id, fields in (extras or {}).items()}
+        with self._lock:
+            self._coverage[(namespace, cell, scope)] = (fetched_at, radius_km, ids, extras)
+            self._persist(
+                [
+                    {
+                        "type": "coverage",
+                        "ns": namespace,
+                        "cell": cell,
+                        "scope": scope,
+                        "fetched_at": fetched_at,
+                        "radius_km": radius_km,
+                        "ids": ids,
+                        "extras": extras,
+                    }
+                ]
+            )
+
+    def get_point(self, namespace: str, location_id: str) -> Optional[Tuple[float, float]]:
+        """返回地点的已知坐标，没有时返回 None"""
+        return self._points.get((namespace, str(location_id)))
+
+    def nearby(
+        self,
+        namespace: str,
+        latitude: float,
+        longitude: float,
+        scope: str,
+        language: str = "",
+        radius_km: Optional[float] = None,
+        max_age: Optional[float] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        在本地回答附近地点查询
+
+        Args:
+            namespace: 命名空间
+            latitude: 查询点纬度
+            longitude: 查询点经度
+            scope: 查询范围标识，必须与 add_coverage 时一致
+            language: 记录的语言，必须与 add_locations 时一致
+            radius_km: 查询半径（千米），None 表示使用 API 默认范围
+            max_age: 覆盖的最长有效期（秒），None 表示永不过期
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: 覆盖单元记录的 API 答案（顺序不变，合并与查询点相关的字段）；
+                查询点所在单元未覆盖、覆盖已过期、覆盖范围不满足查询半径或缺少该语言的记录时返回 None
+        """
+        cell = geohash_encode(latitude, longitude, COVERAGE_PRECISION)
+        with self._lock:
+            coverage = self._coverage.get((namespace, cell, scope))
+            if coverage is None:
+                return None
+            fetched_at, covered_radius, covered_ids, extras = coverage
+            if max_age is not None and time.time() - fetched_at > max_age:
+                return None
+            # API 默认范围的覆盖只回答默认范围的查询，指定半径的覆盖只回答同一半径的查询
+            if covered_radius != radius_km:
+                return None
+
+            results = []
+            for location_id in covered_ids:
+                record = self._records.get((namespace, location_id, language))
+                if record is None:
+                    return None
+                results.append({**record, **extras.get(location_id, {})})
+            return results
+
+    def clear(self):
+        """清空内存中的索引（不删除磁盘文件）"""
+        with self._lock:
+            self._records.clear()
+            self._points.clear()
+            self._coverage.clear()
+
+
+_geo_index: Optional[GeoIndex] = None
+_geo_index_lock = threading.Lock()
+
+
+def get_geo_index() -> GeoIndex:
+    """
+    获取全局地理索引（首次调用时加载持久化文件）
+
+    Returns:
+        GeoIndex: 全局地理索引实例
+    """
+    global _geo_index
+    if _geo_index is None:
+        with _geo_index_lock:
+            if _geo_index is None:
+                _geo_index = GeoIndex(os.getenv(ENV_GEO_INDEX))
+    return _geo_index
@@ -0,0 +1,101 @@
+"""
+数据源 JSON 编解码
+
+按可用性依次选择 orjson、msgspec、标准库 json 作为解码后端，三者的解码结果（dict/list/str/数字）一致。
+可以用 DATA_SOURCE_JSON_BACKEND 环境变量（orjson / msgspec / json）强制指定后端，
+指定的后端未安装时回退到自动选择。
+orjson 和 msgspec 是可选依赖（pyproject.toml 中的 fast-json extra），都未安装时使用标准库 json。
+"""
+
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, Union
+
+ENV_JSON_BACKEND = "DATA_SOURCE_JSON_BACKEND"
+
+logger = logging.getLogger("data_sources_json_codec")
+
+
+def _load_orjson() -> Callable[[Union[bytes, str]], Any]:
+    import orjson
+
+    return orjson.loads
+
+
+def _load_msgspec() -> Callable[[Union[bytes, str]], Any]:
+    import msgspec
+
+    decode = msgspec.json.Decoder().decode
+
+    def loads(data: Union[bytes, str]) -> Any:
+        try:
+            return decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+    return loads
+
+
+def _load_stdlib() -> Callable[[Union[bytes, str]], Any]:
+    return json.loads
+
+
+_BACKENDS: Dict[str, Callable[[], Callable[[Union[bytes, str]], Any]]] = {
+    "orjson": _load_orjson,
+    "msgspec": _load_msgspec,
+    "json": _load_stdlib,
+}
+
+
+def _select_backend(preferred: str = ""):
+    names = list(_BACKENDS)
+    if preferred:
+        if preferred in _BACKENDS:
+            names.remove(preferred)
+            names.insert(0, preferred)
+        else:
+            logger.warning(f"未知的 JSON 后端 {preferred}，可选值: {', '.join(_BACKENDS)}")
+    for name in names:
+        try:
+            return name, _BACKENDS[name]()
+        except ImportError:
+            if name == preferred:
+                logger.warning(f"JSON 后端 {preferred} 未安装，自动选择其他后端")
+    raise RuntimeError("No JSON backend available")
+
+
+backend_name, _loads = _select_backend(os.getenv(ENV_JSON_BACKEND, "").strip().lower())
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """
+    解码 JSON 文本
+
+    Args:
+        data: JSON 文本（bytes 或 str）
+
+    Returns:
+        Any: 解码后的对象
+
+    Raises:
+        ValueError: 文本不是合法的 JSON（各后端的解码异常都是 ValueError 的子类）
+    """
+    if isinstance(data, (bytearray, memoryview)):
+        data = bytes(data)
+    return _loads(data)
+
+
+def set_backend(name: str) -> str:
+    """
+    切换解码后端（主要用于基准测试对比）
+
+    Args:
+        name: orjson / msgspec / json
+
+    Returns:
+        str: 实际使用的后端名称
+    """
+    global backend_name, _loads
+    backend_name, _loads = _select_backend(name)
+    return backend_name
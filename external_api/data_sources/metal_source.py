@@ -5,15 +5,19 @@ Metal data source implementation
 import asyncio
 import json
 import logging
-from datetime import datetime
 from typing import Any, Dict, Optional
 
 import aiohttp
 
+from . import timeparse
 from .base import BaseAPI
+from .timeseries_store import get_timeseries_store, parse_date_range
 
 logger = logging.getLogger("metal_source")
 
+# Price fields recorded for every metal snapshot
+PRICE_FIELDS = ("bid", "mid", "high", "low")
+
 
 class MetalSource(BaseAPI):
     """Metal price data source based on Metal API"""
@@ -95,12 +99,8 @@ class MetalSource(BaseAPI):
 
             request_url = f"{self.proxy_url}/web-crawling/api/gold-index"
 
-            # Send request using aiohttp
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.post(request_url, headers=self._headers, params=params, json=payload, timeout=self._timeout) as response:
-                    response.raise_for_status()
-                    # Parse the response
-                    data = await response.json(content_type=None)
+            # Send request
+            data = await self._request_json("POST", request_url, headers=self._headers, params=params, json=payload)
 
             if isinstance(data, str):
                 data = json.loads(data)
@@ -108,7 +108,6 @@ class MetalSource(BaseAPI):
             if not isinstance(data, dict):
                 raise ValueError(f"Invalid API response format: {data}")
 
-            print(data)
             result = {}
             for metal, info in data.get("data", {}).items():
                 metal_info = {
@@ -125,6 +124,7 @@ class MetalSource(BaseAPI):
                     metal_info["low"] = item.get("low", "")
                     metal_info["originalTime"] = self._parse_time(item.get("originalTime", ""))
                     metal_info["unit"] = item.get("unit", "")
+                    self._record_price(metal, metal_info.get("currency") or currency_code, item)
 
                 result[metal] = metal_info
 
@@ -144,11 +144,76 @@ class MetalSource(BaseAPI):
             logger.exception(e)
             return {"success": False, "error": error_msg}
 
+    def _record_price(self, metal: str, currency_code: str, item: Dict[str, Any]):
+        """Append a price snapshot to the local time-series store, keyed by the quote time"""
+        timestamp = timeparse.to_timestamp(item.get("originalTime", ""), timeparse.ISO_Z)
+        if timestamp is None:
+            return
+        series = get_timeseries_store().series(self.source_name, f"{metal}/{currency_code}", "snapshot", PRICE_FIELDS)
+        series.write([timestamp], {field: [item.get(field)] for field in PRICE_FIELDS})
+
+    async def get_metal_price_history(
+        self,
+        metal: str,
+        currency_code: str,
+        start_date: str = "",
+        end_date: str = "",
+    ) -> Dict[str, Any]:
+        """
+        Get locally recorded metal price history.
+
+        The Metal API only provides the latest price, every successful get_metal_price() call is recorded locally,
+        this method returns those recorded prices without calling the API.
+
+        Args:
+            metal(str): Metal type as returned by get_metal_price(), e.g. "gold", "silver"
+            currency_code(str): Currency code, e.g. "USD"
+            start_date(str): Start date (UTC) in YYYY-MM-DD format, default: no lower bound
+            end_date(str): End date (UTC, inclusive) in YYYY-MM-DD format, default: no upper bound
+
+        Returns:
+            Dict[str, Any]: Dictionary containing the recorded prices, e.g.
+            {
+                "success": True,
+                "data": {
+                    "metal": "gold",
+                    "base_currency": "USD",
+                    "history": [ # Prices in chronological order
+                        {
+                            "originalTime": "2025-04-25 17:00:00", # Time (UTC)
+                            "bid": 3318.3,
+                            "mid": 3319.3,
+                            "high": 3373.6,
+                            "low": 3264.2
+                        }
+                    ]
+                }
+            }
+        """
+        try:
+            start, end = parse_date_range(start_date, end_date)
+            series = get_timeseries_store().series(self.source_name, f"{metal}/{currency_code}", "snapshot", PRICE_FIELDS)
+            timestamps, columns = series.read(start, end)
+            history = [
+                {"originalTime": time_str, **{field: columns[field][i] for field in PRICE_FIELDS}}
+                for i, time_str in enumerate(timeparse.format_timestamps(timestamps))
+            ]
+            return {"success": True, "data": {"metal": metal, "base_currency": currency_code, "history": history}}
+
+        except Exception as e:
+            error_msg = f"Error occurred while getting metal price history: {str(e)}"
+            logger.error(error_msg)
+            logger.exception(e)
+            return {"success": False, "error": error_msg}
+
     def _parse_time(self, time_str: str) -> str:
         """Parse time string"""
         # "2025-04-25T17:00:00Z"
         # Convert to "2025-04-25 17:00:00"
-        return datetime.strptime(time_str, "%Y-%m-%dT%H:%M:%SZ").strftime("%Y-%m-%d %H:%M:%S")
+        value = timeparse.normalize(time_str, timeparse.ISO_Z)
+        if value is None:
+            raise ValueError(f"time data {time_str!r} does not match format {timeparse.ISO_Z!r}")
+        return value
 
 
 if __name__ == "__main__":
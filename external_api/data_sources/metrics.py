@@ -0,0 +1,386 @@
+"""
+数据源调用指标
+
+ApiClient 在加载数据源时用 instrument_source() 包装每个公开的异步方法，按 (数据源, 方法) 记录:
+    - 调用延迟：HDR 风格的对数线性直方图（每个 2 的幂区间分 16 个子桶，相对误差约 6%），微秒精度
+    - 失败次数：按错误类型统计（请求层抛出的异常类型、HTTP 状态码，或方法自身抛出的异常类型）
+    - 响应体字节数：由传输层在读取响应后累加到当前调用上
+调用计数写入每个线程自己的分片，记录路径不加锁；只有线程第一次记录某个方法时注册分片需要加锁。
+
+导出:
+    - render_prometheus(): Prometheus 文本格式，另外包含响应缓存命中统计（response_cache）和
+      各上游主机的重试/对冲/熔断统计（resilience）
+    - snapshot(): JSON 可序列化的快照
+
+环境变量:
+    DATA_SOURCE_METRICS: 设为 0 关闭方法包装
+"""
+
+import contextvars
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .response_cache import get_response_cache
+from .resilience import get_resilience_stats
+
+ENV_METRICS = "DATA_SOURCE_METRICS"
+
+logger = logging.getLogger("data_sources_metrics")
+
+# 直方图：小于 32µs 的值各占一个桶，之后每个 2 的幂区间分 SUB_BUCKETS 个子桶，最大约 35 分钟
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+_LINEAR_LIMIT = 2 * SUB_BUCKETS
+_MAX_SHIFT = 27
+BUCKET_COUNT = _LINEAR_LIMIT + _MAX_SHIFT * SUB_BUCKETS
+_MAX_VALUE = ((2 * SUB_BUCKETS) << _MAX_SHIFT) - 1
+
+# Prometheus 导出的延迟桶边界（秒）
+PROMETHEUS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SNAPSHOT_QUANTILES = (0.5, 0.9, 0.99)
+
+
+def bucket_index(value: int) -> int:
+    """微秒值所在的直方图桶下标"""
+    if value < _LINEAR_LIMIT:
+        return max(0, value)
+    if value > _MAX_VALUE:
+        value = _MAX_VALUE
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return _LINEAR_LIMIT + (shift - 1) * SUB_BUCKETS + (value >> shift) - SUB_BUCKETS
+
+
+def bucket_upper_bound(index: int) -> int:
+    """直方图桶包含的最大微秒值"""
+    if index < _LINEAR_LIMIT:
+        return index
+    shift, sub = divmod(index - _LINEAR_LIMIT, SUB_BUCKETS)
+    return ((sub + SUB_BUCKETS + 1) << (shift + 1)) - 1
+
+
+class _Shard:
+    """单个线程写入的计数"""
+
+    __slots__ = ("counts", "calls", "latency_sum", "latency_max", "errors", "bytes")
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.calls = 0
+        self.latency_sum = 0
+        self.latency_max = 0
+        self.errors: Dict[str, int] = {}
+        self.bytes = 0
+
+
+class MethodMetrics:
+    """单个数据源方法的调用指标"""
+
+    def __init__(self, source: str, method: str):
+        self.source = source
+        self.method = method
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def record(self, elapsed_us: int, error_type: Optional[str] = None, nbytes: int = 0):
+        """
+        记录一次调用
+
+        Args:
+            elapsed_us: 调用耗时（微秒）
+            error_type: 失败时的错误类型，成功为 None
+            nbytes: 本次调用读取的响应体字节数
+        """
+        shard = self._shard()
+        shard.counts[bucket_index(elapsed_us)] += 1
+        shard.calls += 1
+        shard.latency_sum += elapsed_us
+        if elapsed_us > shard.latency_max:
+            shard.latency_max = elapsed_us
+        if error_type is not None:
+            shard.errors[error_type] = shard.errors.get(error_type, 0) + 1
+        shard.bytes += nbytes
+
+    def record_error(self, error_type: str):
+        """只记录一次失败（不计入调用次数和延迟），用于异步生成器中失败的产出项"""
+        errors = self._shard().errors
+        errors[error_type] = errors.get(error_type, 0) + 1
+
+    def merged(self) -> _Shard:
+        """合并所有线程分片的计数"""
+        total = _Shard()
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            total.counts = [a + b for a, b in zip(total.counts, shard.counts)]
+            total.calls += shard.calls
+            total.latency_sum += shard.latency_sum
+            total.latency_max = max(total.latency_max, shard.latency_max)
+            for error_type, count in list(shard.errors.items()):
+                total.errors[error_type] = total.errors.get(error_type, 0) + count
+            total.bytes += shard.bytes
+        return total
+
+
+def _quantile(counts: List[int], calls: int, q: float) -> int:
+    rank = max(1, int(q * calls + 0.5))
+    seen = 0
+    for index, count in enumerate(counts):
+        seen += count
+        if seen >= rank:
+            return bucket_upper_bound(index)
+    return 0
+
+
+class _CallRecord:
+    """当前数据源方法调用的上下文，请求层把错误类型和响应字节数写到这里"""
+
+    __slots__ = ("error_type", "bytes")
+
+    def __init__(self):
+        self.error_type: Optional[str] = None
+        self.bytes = 0
+
+
+_current_call: "contextvars.ContextVar[Optional[_CallRecord]]" = contextvars.ContextVar("data_source_call", default=None)
+_methods: Dict[Tuple[str, str], MethodMetrics] = {}
+_methods_lock = threading.Lock()
+
+
+def get_method_metrics(source: str, method: str) -> MethodMetrics:
+    """
+    获取数据源方法的指标对象
+
+    Args:
+        source: 数据源名称
+        method: 方法名
+
+    Returns:
+        MethodMetrics: 指标对象
+    """
+    metrics = _methods.get((source, method))
+    if metrics is None:
+        with _methods_lock:
+            metrics = _methods.setdefault((source, method), MethodMetrics(source, method))
+    return metrics
+
+
+def add_response_bytes(nbytes: int):
+    """把响应体字节数累加到当前数据源方法调用上（不在被包装的调用中时忽略）"""
+    call = _current_call.get()
+    if call is not None:
+        call.bytes += nbytes
+
+
+def note_request_error(exc: BaseException):
+    """记录当前调用中请求层的失败类型，数据源方法把异常转换成 success=False 后仍能按类型统计"""
+    call = _current_call.get()
+    if call is not None:
+        status = getattr(exc, "status", None)
+        call.error_type = f"http_{status}" if isinstance(status, int) else type(exc).__name__
+
+
+def _wrap_coroutine(func: Callable, metrics: MethodMetrics) -> Callable:
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        call = _CallRecord()
+        token = _current_call.set(call)
+        started = time.perf_counter_ns()
+        error_type = None
+        try:
+            result = await func(*args, **kwargs)
+            if isinstance(result, dict) and result.get("success") is False:
+                error_type = call.error_type or "error"
+            return result
+        except BaseException as e:
+            error_type = type(e).__name__
+            raise
+        finally:
+            _current_call.reset(token)
+            metrics.record((time.perf_counter_ns() - started) // 1000, error_type, call.bytes)
+
+    return wrapper
+
+
+def _wrap_async_generator(func: Callable, metrics: MethodMetrics) -> Callable:
+    # 异步生成器按整个迭代过程记录一次调用，success=False 的产出项只计入错误类型
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        call = _CallRecord()
+        started = time.perf_counter_ns()
+        error_type = None
+        iterator = func(*args, **kwargs)
+        try:
+            while True:
+                token = _current_call.set(call)
+                try:
+                    item = await iterator.__anext__()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    _current_call.reset(token)
+                if isinstance(item, dict) and item.get("success") is False:
+                    metrics.record_error(call.error_type or "error")
+                    call.error_type = None
+                yield item
+        except GeneratorExit:
+            # 调用方提前结束迭代不算失败
+            raise
+        except BaseException as e:
+            error_type = type(e).__name__
+            raise
+        finally:
+            await iterator.aclose()
+            metrics.record((time.perf_counter_ns() - started) // 1000, error_type, call.bytes)
+
+    return wrapper
+
+
+def instrument_source(source: Any, method_names: Iterable[str]):
+    """
+    用计时包装器替换数据源实例上的公开异步方法（实例属性覆盖类方法，签名和文档保持不变）
+
+    Args:
+        source: 数据源实例
+        method_names: 需要包装的方法名
+    """
+    if os.getenv(ENV_METRICS, "").strip() == "0":
+        return
+    source_name = source.source_name
+    for name in method_names:
+        func = getattr(source, name, None)
+        if getattr(func, "__wrapped_metrics__", False):
+            continue
+        if inspect.iscoroutinefunction(func):
+            wrapper = _wrap_coroutine(func, get_method_metrics(source_name, name))
+        elif inspect.isasyncgenfunction(func):
+            wrapper = _wrap_async_generator(func, get_method_metrics(source_name, name))
+        else:
+            continue
+        wrapper.__wrapped_metrics__ = True
+        setattr(source, name, wrapper)
+
+
+def snapshot() -> Dict[str, Any]:
+    """
+    获取指标快照
+
+    Returns:
+        Dict[str, Any]: {
+            "methods": {source: {method: {calls, errors, error_types, response_bytes, latency_ms, cache}}}（只包含被调用过的方法）,
+            "upstreams": {host: 重试/对冲/熔断统计}
+        }
+    """
+    cache_stats = get_response_cache().stats()
+    methods: Dict[str, Dict[str, Any]] = {}
+    for (source, method), metrics in sorted(list(_methods.items())):
+        merged = metrics.merged()
+        if not merged.calls and not merged.errors:
+            continue
+        latency: Dict[str, Any] = {"count": merged.calls}
+        if merged.calls:
+            latency["mean"] = merged.latency_sum / merged.calls / 1000
+            for q in SNAPSHOT_QUANTILES:
+                latency[f"p{int(q * 100)}"] = min(_quantile(merged.counts, merged.calls, q), merged.latency_max) / 1000
+            latency["max"] = merged.latency_max / 1000
+        methods.setdefault(source, {})[method] = {
+            "calls": merged.calls,
+            "errors": sum(merged.errors.values()),
+            "error_types": dict(merged.errors),
+            "response_bytes": merged.bytes,
+            "latency_ms": latency,
+            "cache": cache_stats.get(source, {}).get(method),
+        }
+    return {"methods": methods, "upstreams": get_resilience_stats()}
+
+
+def _labels(**labels: Any) -> str:
+    escaped = []
+    for name, value in labels.items():
+        text = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        escaped.append(f'{name}="{text}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+def render_prometheus() -> str:
+    """
+    以 Prometheus 文本格式（0.0.4）导出全部指标
+
+    Returns:
+        str: 指标文本
+    """
+    lines: List[str] = []
+
+    def header(name: str, metric_type: str, help_text: str):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+
+    merged = {key: metrics.merged() for key, metrics in sorted(list(_methods.items()))}
+    bounds = [(le, int(le * 1_000_000)) for le in PROMETHEUS_BUCKETS]
+
+    header("data_source_call_duration_seconds", "histogram", "Latency of data source method calls")
+    for (source, method), shard in merged.items():
+        cumulative, index = 0, 0
+        for le, limit in bounds:
+            while index < BUCKET_COUNT and bucket_upper_bound(index) <= limit:
+                cumulative += shard.counts[index]
+                index += 1
+            lines.append(f"data_source_call_duration_seconds_bucket{_labels(source=source, method=method, le=le)} {cumulative}")
+        lines.append(f"data_source_call_duration_seconds_bucket{_labels(source=source, method=method, le='+Inf')} {shard.calls}")
+        lines.append(f"data_source_call_duration_seconds_sum{_labels(source=source, method=method)} {shard.latency_sum / 1_000_000}")
+        lines.append(f"data_source_call_duration_seconds_count{_labels(source=source, method=method)} {shard.calls}")
+
+    header("data_source_call_errors_total", "counter", "Failed data source method calls by error type")
+    for (source, method), shard in merged.items():
+        for error_type, count in sorted(shard.errors.items()):
+            lines.append(f"data_source_call_errors_total{_labels(source=source, method=method, type=error_type)} {count}")
+
+    header("data_source_response_bytes_total", "counter", "Response body bytes read by data source method calls")
+    for (source, method), shard in merged.items():
+        lines.append(f"data_source_response_bytes_total{_labels(source=source, method=method)} {shard.bytes}")
+
+    header("data_source_cache_requests_total", "counter", "Response cache lookups by result")
+    for source, methods in sorted(get_response_cache().stats().items()):
+        for method, stats in sorted(methods.items()):
+            for result in ("hits", "stale_hits", "misses"):
+                lines.append(f"data_source_cache_requests_total{_labels(source=source, method=method, result=result)} {stats[result]}")
+
+    upstreams = sorted(get_resilience_stats().items())
+    for field, help_text in (
+        ("requests", "Upstream request attempts"),
+        ("failures", "Failed upstream request attempts"),
+        ("retries", "Retried upstream requests"),
+        ("hedges", "Hedged upstream requests"),
+        ("hedge_wins", "Hedged requests that finished first"),
+        ("short_circuits", "Requests rejected by an open circuit breaker"),
+        ("breaker_opens", "Circuit breaker openings"),
+    ):
+        name = f"data_source_upstream_{field}_total"
+        header(name, "counter", help_text)
+        for host, stats in upstreams:
+            lines.append(f"{name}{_labels(host=host)} {stats[field]}")
+    header("data_source_upstream_circuit_open", "gauge", "Whether the upstream circuit breaker is open (1) or half-open (0.5)")
+    for host, stats in upstreams:
+        value = {"open": 1, "half_open": 0.5}.get(stats["state"], 0)
+        lines.append(f"data_source_upstream_circuit_open{_labels(host=host)} {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics():
+    """清空所有方法的调用指标"""
+    with _methods_lock:
+        _methods.clear()
@@ -0,0 +1,195 @@
+"""
+分页工具
+
+游标分页迭代：把返回 {"success": ..., "data": {<items_key>: [...], "cursor": ...}} 的单页方法包装成异步迭代器:
+    - 后台任务按游标预取后续页面，预取深度有上限（队列大小），内存占用不随总条数增长
+    - 按条目 id 去重（只保留最近 dedup_window 个 id）
+    - 达到 max_items、游标为空或重复、连续多页没有新条目时停止
+    - 单页失败时按退避重试，仍失败则抛出 PaginationError
+
+页码分页：plan_pages 把结果数拆分为页码请求，dedupe 合并多页结果时去重。
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .concurrency import DEFAULT_RETRY_BASE_DELAY
+
+logger = logging.getLogger("data_sources_pagination")
+
+DEFAULT_PREFETCH = 2
+DEFAULT_DEDUP_WINDOW = 10000
+# 连续多少页没有新条目时认为结果已经耗尽
+MAX_STALE_PAGES = 3
+
+FetchPage = Callable[[Optional[str], int], Awaitable[Dict[str, Any]]]
+
+
+class PaginationError(RuntimeError):
+    """分页请求在重试后仍然失败"""
+
+
+async def _fetch_page(fetch_page: FetchPage, cursor: Optional[str], count: int, max_retries: int) -> Dict[str, Any]:
+    attempt = 0
+    while True:
+        try:
+            result = await fetch_page(cursor, count)
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        if result.get("success") or attempt >= max_retries:
+            return result
+        attempt += 1
+        delay = DEFAULT_RETRY_BASE_DELAY * (2 ** (attempt - 1))
+        logger.warning(f"Page request failed ({result.get('error')}), retry {attempt}/{max_retries} in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+
+async def iter_pages(
+    fetch_page: FetchPage,
+    items_key: str,
+    page_size: int,
+    id_key: str = "id",
+    max_items: Optional[int] = None,
+    prefetch: int = DEFAULT_PREFETCH,
+    max_retries: int = 2,
+    dedup_window: int = DEFAULT_DEDUP_WINDOW,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    按游标逐页拉取并逐条产出条目
+
+    Args:
+        fetch_page: 单页请求函数 fetch_page(cursor, count)，cursor 为 None 表示第一页
+        items_key: 结果 data 中条目列表的键名
+        page_size: 每页请求条数
+        id_key: 条目的 id 字段，用于去重
+        max_items: 最多产出的条目数，None 表示直到结果耗尽
+        prefetch: 最多预取（已到达但尚未消费）的页数
+        max_retries: 单页失败时的重试次数
+        dedup_window: 去重时记住的最近 id 数量
+
+    Yields:
+        Dict[str, Any]: 去重后的条目
+
+    Raises:
+        PaginationError: 某一页在重试后仍然失败
+    """
+    queue: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue(maxsize=max(1, prefetch))
+    # 已拉取的条目数达到 max_items 后，只有消费者因去重而不够数时才继续拉取
+    need_more = asyncio.Event()
+
+    async def produce():
+        cursor: Optional[str] = None
+        seen_cursors = set()
+        fetched = 0
+        try:
+            while True:
+                if max_items is not None and fetched >= max_items:
+                    need_more.clear()
+                    await need_more.wait()
+                # 最后一页只请求还差的条数；因去重而追加的页面按整页请求
+                remaining = page_size if max_items is None else max_items - fetched
+                count = min(page_size, remaining) if remaining > 0 else page_size
+                result = await _fetch_page(fetch_page, cursor, count, max_retries)
+                await queue.put(result)
+                if not result.get("success"):
+                    return
+                data = result.get("data") or {}
+                fetched += len(data.get(items_key) or [])
+                cursor = data.get("cursor")
+                if not data.get(items_key) or not cursor or cursor in seen_cursors:
+                    break
+                seen_cursors.add(cursor)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put({"success": False, "error": str(e)})
+            return
+        await queue.put(None)
+
+    producer = asyncio.ensure_future(produce())
+    seen_ids: "OrderedDict[Any, None]" = OrderedDict()
+    yielded = 0
+    stale_pages = 0
+    try:
+        while max_items is None or yielded < max_items:
+            if queue.empty():
+                need_more.set()
+            page = await queue.get()
+            if page is None:
+                return
+            if not page.get("success"):
+                raise PaginationError(page.get("error", "Unknown error"))
+
+            new_items = 0
+            for item in page["data"].get(items_key) or []:
+                item_id = item.get(id_key) if isinstance(item, dict) else None
+                if item_id is not None:
+                    if item_id in seen_ids:
+                        continue
+                    seen_ids[item_id] = None
+                    if len(seen_ids) > dedup_window:
+                        seen_ids.popitem(last=False)
+                new_items += 1
+                yield item
+                yielded += 1
+                if max_items is not None and yielded >= max_items:
+                    return
+
+            stale_pages = 0 if new_items else stale_pages + 1
+            if stale_pages >= MAX_STALE_PAGES:
+                logger.info(f"No new items in {stale_pages} consecutive pages, stopping pagination")
+                return
+    finally:
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
+
+
+def plan_pages(num_results: int, max_page_size: int) -> List[Tuple[int, int]]:
+    """
+    把期望的结果数拆分为页码请求
+
+    Args:
+        num_results: 期望的结果总数
+        max_page_size: 接口允许的每页最大条数
+
+    Returns:
+        List[Tuple[int, int]]: (页码（从 1 开始）, 该页请求条数)，最后一页只请求剩余条数
+    """
+    page_size = min(num_results, max_page_size)
+    if page_size <= 0:
+        return []
+    total_pages = -(-num_results // page_size)
+    pages = [(page, page_size) for page in range(1, total_pages + 1)]
+    if num_results % page_size:
+        pages[-1] = (total_pages, num_results % page_size)
+    return pages
+
+
+def dedup_key(item: Dict[str, Any], keys: Sequence[str]) -> Optional[Tuple[str, Any]]:
+    """返回条目的去重键 (字段名, 值)，取 keys 中第一个非空字段；都为空时返回 None"""
+    return next(((key, item[key]) for key in keys if item.get(key)), None)
+
+
+def dedupe(items: Iterable[Dict[str, Any]], keys: Sequence[str]) -> List[Dict[str, Any]]:
+    """
+    按 keys 中第一个非空字段去重，保留首次出现的条目；所有字段都为空的条目原样保留
+
+    Args:
+        items: 条目列表
+        keys: 依次尝试的去重字段，如 ("publicationNumber", "link")
+
+    Returns:
+        List[Dict[str, Any]]: 去重后的条目
+    """
+    seen = set()
+    unique = []
+    for item in items:
+        key = dedup_key(item, keys)
+        if key is not None:
+            if key in seen:
+                continue
+            seen.add(key)
+        unique.append(item)
+    return unique
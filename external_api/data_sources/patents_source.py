@@ -2,17 +2,20 @@
 专利数据源实现
 """
 
-import asyncio
 import logging
-import math
-from typing import Any, Dict, Optional
-
-import aiohttp
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from .base import BaseAPI
+from .concurrency import get_host_limiter, iter_bounded
+from .pagination import dedup_key, dedupe, plan_pages
 
 logger = logging.getLogger("patents_source")
 
+MAX_PAGE_SIZE = 50
+MAX_RESULTS = 500
+# Patents are identified by publication number, link is the fallback
+DEDUP_KEYS = ("publicationNumber", "link")
+
 
 class PatentSource(BaseAPI):
     """Patent data source"""
@@ -26,6 +29,8 @@ class PatentSource(BaseAPI):
             "X-Biz-Id": "matrix-agent",
             "X-Request-Timeout": str(config["timeout"] - 5),
         }
+        # Page requests to the same upstream host share one adaptive concurrency limit
+        self._limiter = get_host_limiter(config["serper_base_url"])
 
     @property
     def source_name(self) -> str:
@@ -80,10 +85,7 @@ class PatentSource(BaseAPI):
         request_url = f"{self.proxy_url}/patents"
 
         try:
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.post(request_url, headers=self.headers, json=payload, timeout=self.timeout) as response:
-                    response.raise_for_status()
-                    data = await response.json()
+            data = await self._limiter.run(lambda: self._request_json("POST", request_url, headers=self.headers, json=payload))
 
             organic = data.get("organic", [])
             results = []
@@ -165,63 +167,93 @@ class PatentSource(BaseAPI):
         #     ...     print(f"Search succeeded, {len(result['data']['patents'])} results returned")
         # """
         try:
-            # 关键词裁剪
-            keywords = query.split(" ")
-            if len(keywords) > 5:
-                query = " ".join(keywords[:5])
-
-            # 限制最大结果数
-            if num_results > 500:
-                num_results = 500
-
-            # 计算分页
-            MAX_PAGE_SIZE = 50
-            page_size = min(num_results, MAX_PAGE_SIZE)
-            total_pages = math.ceil(num_results / page_size)
-
-            # 并发请求所有页面
-            tasks = []
-            for page in range(1, total_pages + 1):
-                # 最后一页可能需要调整数量
-                if page == total_pages and num_results % page_size != 0:
-                    current_page_size = num_results % page_size
-                else:
-                    current_page_size = page_size
-
-                tasks.append(
-                    self._fetch_patents_page(
-                        query=query,
-                        assignee=assignee,
-                        page_size=current_page_size,
-                        page=page,
-                        start_time=start_time,
-                        end_time=end_time,
-                    )
-                )
-
-            # 等待所有请求完成
-            results = await asyncio.gather(*tasks)
-
-            # 合并结果
-            all_patents = []
-            has_error = False
+            pages: Dict[int, List[Dict[str, Any]]] = {}
             error_msgs = []
-
-            for result in results:
+            async for page, result in self._iter_patent_pages(query, assignee, num_results, start_time, end_time):
                 if result["success"]:
-                    all_patents.extend(result["data"])
+                    pages[page] = result["data"]
                 else:
-                    has_error = True
-                    error_msgs.append(result["error"])
+                    error_msgs.append(f"Page {page}: {result['error']}")
 
             # 如果有部分失败，记录错误但仍返回成功获取的数据
-            if has_error:
+            if error_msgs:
                 logger.warning(f"Some patent pages failed: {', '.join(error_msgs)}")
 
-            # 限制返回数量
-            all_patents = all_patents[:num_results]
+            # 按页码合并、去重并限制返回数量
+            all_patents = dedupe((patent for page in sorted(pages) for patent in pages[page]), DEDUP_KEYS)
+            all_patents = all_patents[: min(num_results, MAX_RESULTS)]
 
             return {"success": True, "data": {"patents": all_patents}}
         except Exception as e:
             logger.error(f"search_patents error: {e}")
             return {"success": False, "error": str(e)}
+
+    async def iter_search_patents(
+        self,
+        query: str,
+        assignee: Optional[str] = None,
+        num_results: int = 10,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Search for patents and yield results as soon as each page arrives (page completion order), duplicates are skipped.
+        Use with `async for`, e.g. `async for patent in client.patent.iter_search_patents("machine learning", num_results=200):`
+
+        Args:
+            query(str): Search keywords. up to 5.
+            assignee(str): The assignee of the patents, e.g. "Apple Inc.".
+            num_results(int): Number of results to request, default is 10, max is 500
+            start_time(str): Start date YYYYMMDD, optional.
+            end_time(str): End date YYYYMMDD, optional.
+
+        Yields:
+            Dict[str, Any]: One patent, same format as the items of search_patents()["data"]["patents"]
+        """
+        seen = set()
+        async for page, result in self._iter_patent_pages(query, assignee, num_results, start_time, end_time):
+            if not result["success"]:
+                logger.warning(f"Patent page {page} failed: {result['error']}")
+                continue
+            for patent in result["data"]:
+                key = dedup_key(patent, DEDUP_KEYS)
+                if key is not None:
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                yield patent
+
+    async def _iter_patent_pages(
+        self,
+        query: str,
+        assignee: Optional[str],
+        num_results: int,
+        start_time: Optional[str],
+        end_time: Optional[str],
+    ) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """
+        请求所有页面，按完成顺序产出 (页码, 单页结果)
+
+        所有页面同时发起，实际并发由上游主机共享的自适应限制器控制，失败的页面在限制器中按退避重试
+        """
+        # 关键词裁剪
+        keywords = query.split(" ")
+        if len(keywords) > 5:
+            query = " ".join(keywords[:5])
+
+        pages = plan_pages(min(num_results, MAX_RESULTS), MAX_PAGE_SIZE)
+
+        async def fetch(page_spec: Tuple[int, int]) -> Tuple[int, Dict[str, Any]]:
+            page, page_size = page_spec
+            result = await self._fetch_patents_page(
+                query=query,
+                assignee=assignee,
+                page_size=page_size,
+                page=page,
+                start_time=start_time,
+                end_time=end_time,
+            )
+            return page, result
+
+        async for _, page_result in iter_bounded(pages, fetch, len(pages) or 1):
+            yield page_result
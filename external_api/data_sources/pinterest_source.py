@@ -5,12 +5,13 @@ Pinterest data source implementation
 import asyncio
 import json
 import logging
-from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, Optional
 
 import aiohttp
 
+from . import timeparse
 from .base import BaseAPI
+from .pagination import DEFAULT_PREFETCH, iter_pages
 
 logger = logging.getLogger("pinterest_source")
 
@@ -117,12 +118,8 @@ class PinterestSource(BaseAPI):
 
             request_url = f"{self.proxy_url}/pinterest/pins/advance"
 
-            # Send request using aiohttp
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.post(request_url, headers=self._headers, json=params, timeout=self._timeout) as response:
-                    response.raise_for_status()
-                    # Parse the response
-                    data = await response.json(content_type=None)
+            # Send request
+            data = await self._request_json("POST", request_url, headers=self._headers, json=params)
 
             # The API returns a JSON string, need to parse it first
             if isinstance(data, str):
@@ -194,12 +191,8 @@ class PinterestSource(BaseAPI):
             # Set request parameters
             params = {"keyword": username}
 
-            # Send request using aiohttp
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.get(request_url, headers=self._headers, params=params, timeout=self._timeout) as response:
-                    response.raise_for_status()
-                    # Parse the response
-                    data = await response.json(content_type=None)
+            # Send request
+            data = await self._request_json("GET", request_url, headers=self._headers, params=params)
 
             # Parse response data
             if isinstance(data, str):
@@ -225,22 +218,42 @@ class PinterestSource(BaseAPI):
             logger.exception(e)
             return {"success": False, "error": error_msg}
 
+    async def iter_search_pins(
+        self, keyword: str, max_items: int = 100, page_size: int = 25, sort: str = "relevance", prefetch: int = DEFAULT_PREFETCH
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate over pin search results across pages, following the cursor automatically.
+        The next page is fetched while the current one is consumed, duplicate pins are skipped.
+        Use with `async for`, e.g. `async for pin in client.pinterest.iter_search_pins("cats", max_items=300):`
+
+        Args:
+            keyword(str): Search keyword, e.g. "cats"
+            max_items(int): Maximum number of pins to yield, default 100
+            page_size(int): Number of results requested per page, default 25
+            sort(str): Sort order, default "relevance", options: "relevance" or "recent"
+            prefetch(int): Maximum number of pages fetched ahead of consumption, default 2
+
+        Yields:
+            Dict[str, Any]: One pin, same format as the items of search_pins()["data"]["pins"]
+
+        Raises:
+            PaginationError: A page still failed after retries
+        """
+
+        async def fetch_page(cursor: Optional[str], count: int) -> Dict[str, Any]:
+            return await self.search_pins(keyword, num=count, nextPageCursor=cursor, sort=sort)
+
+        async for pin in iter_pages(fetch_page, "pins", page_size, max_items=max_items, prefetch=prefetch):
+            yield pin
+
     def _format_date(self, date_str: Optional[str]) -> Optional[str]:
         """Format date string"""
         if not date_str:
             return None
-        try:
-            # New API date format example: "Thu Mar 13 18:08:35 +0000 2025"
-            # New API date format example: "Tue, 04 Mar 2025 12:26:23 +0000",
-            dt = datetime.strptime(date_str, "%a, %d %b %Y %H:%M:%S %z")
-            return dt.strftime("%Y-%m-%d %H:%M:%S")
-        except Exception:
-            return date_str
+        # New API date format example: "Tue, 04 Mar 2025 12:26:23 +0000",
+        return timeparse.normalize(date_str, timeparse.RFC2822) or date_str
 
     def _parse_pins(self, data: dict[str, Any]) -> list[dict[str, Any]]:
-        print(f"xwy-pins, {data}")
-        print("-" * 100)
-        print("\n")
         pins = []
         for pin_data in data.get("data", []):
             if not isinstance(pin_data, dict):
@@ -249,30 +262,19 @@ class PinterestSource(BaseAPI):
 
             video = {"has_video": False}
             if pin_data.get("videos", None):
-                V_HLSV4 = None
-                if pin_data.get("videos", {}).get("video_list", {}).get("V_HLSV4", None):
-                    V_HLSV4 = {
-                        "url": pin_data.get("videos", {}).get("video_list", {}).get("V_HLSV4", {}).get("url", ""),
-                        "duration": pin_data.get("videos", {}).get("video_list", {}).get("V_HLSV4", {}).get("duration", 0),
-                    }
-
-                V_720P = None
-                if pin_data.get("videos", {}).get("video_list", {}).get("V_720P", None):
-                    V_720P = {
-                        "url": pin_data.get("videos", {}).get("video_list", {}).get("V_720P", {}).get("url", ""),
-                        "duration": pin_data.get("videos", {}).get("video_list", {}).get("V_720P", {}).get("duration", 0),
-                    }
-
+                video_list = pin_data["videos"].get("video_list") or {}
                 video: Dict[str, Any] = {"has_video": True}
-                if V_HLSV4:
-                    video["V_HLSV4"] = V_HLSV4
-                if V_720P:
-                    video["V_720P"] = V_720P
+                for video_format in ("V_HLSV4", "V_720P"):
+                    video_info = video_list.get(video_format)
+                    if video_info:
+                        video[video_format] = {"url": video_info.get("url", ""), "duration": video_info.get("duration", 0)}
 
-            image_url = pin_data.get("images", {}).get("original", {}).get("url", "")
+            images = pin_data.get("images") or {}
+            image_url = (images.get("original") or {}).get("url", "")
             if len(image_url) <= 0:
-                image_url = pin_data.get("images", {}).get("orig", {}).get("url", "")
+                image_url = (images.get("orig") or {}).get("url", "")
 
+            pinner = pin_data.get("pinner") or {}
             pin = {
                 "id": pin_data.get("id", ""),
                 "title": pin_data.get("title", ""),
@@ -282,13 +284,13 @@ class PinterestSource(BaseAPI):
                 "images": {"url": image_url},
                 "videos": video,
                 "created_at": "2024-03-21 08:29:49",  # 创建时间
-                "likes": pin_data.get("reaction_counts", {}).get("1", 0),
+                "likes": (pin_data.get("reaction_counts") or {}).get("1", 0),
                 "pinner": {
-                    "id": pin_data.get("pinner", {}).get("id", ""),
-                    "image_url": pin_data.get("pinner", {}).get("image_large_url", ""),
-                    "follower_count": pin_data.get("pinner", {}).get("follower_count", 0),
-                    "username": pin_data.get("pinner", {}).get("username", ""),
-                    "full_name": pin_data.get("pinner", {}).get("full_name", ""),
+                    "id": pinner.get("id", ""),
+                    "image_url": pinner.get("image_large_url", ""),
+                    "follower_count": pinner.get("follower_count", 0),
+                    "username": pinner.get("username", ""),
+                    "full_name": pinner.get("full_name", ""),
                 },
             }
             pins.append(pin)
@@ -296,9 +298,6 @@ class PinterestSource(BaseAPI):
 
     def _parse_user_info(self, resp: dict[str, Any]) -> dict[str, Any]:
         data = resp.get("data", [])
-        print(f"xwy-user, {data}")
-        print("-" * 100)
-        print("\n")
         if len(data) <= 0:
             return {}
 
@@ -0,0 +1,368 @@
+"""
+数据源请求录制与回放
+
+所有数据源都通过 external_api_proxy_url 访问上游，没有网络时无法对解析或并发改动做基准测试。这里提供:
+    - FixtureStore: 以 JSON 文件保存的响应夹具，按 (方法, 上游主机, 路径, 查询参数, 请求体) 匹配
+    - RecordingTransport: 在真实请求的同时把响应（包括错误状态码）保存为夹具
+    - ReplayServer: 本地 aiohttp 替身，按请求匹配夹具返回响应，可配置延迟、抖动、慢请求和错误注入
+
+录制:
+    store = FixtureStore("fixtures/")
+    client = get_client()
+    client.set_transport(RecordingTransport(store, proxy_url=config["external_api_proxy_url"]))
+    await client.twitter.search_tweets(query="python")
+
+回放:
+    server = ReplayServer(FixtureStore("fixtures/"), latency=0.05, error_rate=0.01)
+    await server.start()
+    client.set_proxy_url(server.url)
+
+上游主机取自 X-Original-Host 请求头，路径去掉代理地址自身的路径前缀，因此录制的夹具与代理地址无关。
+没有完全匹配的夹具时，ReplayServer 默认退回到同一 (方法, 主机, 路径) 下最近保存的成功响应（strict=False）。
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import yarl
+from aiohttp import web
+
+from .transport import HttpTransport
+
+logger = logging.getLogger("data_sources_replay")
+
+QueryItems = List[Tuple[str, str]]
+
+
+def canonical_body(json_body: Any = None, data: Any = None) -> bytes:
+    """
+    请求体的规范形式：JSON 请求体按键排序序列化，其他请求体按原始字节
+
+    Args:
+        json_body: JSON 请求体
+        data: 原始请求体（str / bytes / 表单 dict）
+
+    Returns:
+        bytes: 规范化后的请求体
+    """
+    if json_body is not None:
+        return json.dumps(json_body, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if data is None:
+        return b""
+    if isinstance(data, bytes):
+        return data
+    if isinstance(data, str):
+        return data.encode("utf-8")
+    return json.dumps(data, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def fixture_key(method: str, host: str, path: str, query: Iterable[Tuple[str, str]], body: bytes = b"") -> str:
+    """
+    请求的夹具键
+
+    Args:
+        method: HTTP 方法
+        host: 上游主机（X-Original-Host）
+        path: 去掉代理路径前缀后的请求路径
+        query: 查询参数键值对，顺序无关
+        body: 规范化后的请求体
+
+    Returns:
+        str: 夹具键
+    """
+    digest = hashlib.sha1()
+    digest.update(f"{method.upper()}\n{host}\n{path}\n".encode("utf-8"))
+    for name, value in sorted(query):
+        digest.update(f"{name}={value}&".encode("utf-8"))
+    digest.update(b"\n")
+    digest.update(body)
+    return digest.hexdigest()[:20]
+
+
+def _decode(body: bytes) -> str:
+    # 非 UTF-8 的字节以代理字符保存，json.dumps 会把它们转义，读回后可以原样编码
+    return body.decode("utf-8", errors="surrogateescape")
+
+
+def _encode(text: str) -> bytes:
+    return text.encode("utf-8", errors="surrogateescape")
+
+
+class FixtureStore:
+    """
+    响应夹具集合
+
+    夹具保存在内存中；指定 directory 时启动时加载目录下已有的夹具，新增的夹具写入
+    directory/<host>/<key>.json，每个文件一个 JSON 对象。
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self._fixtures: Dict[str, Dict[str, Any]] = {}
+        # (方法, 主机, 路径) -> 夹具键，后保存的在后
+        self._by_route: Dict[Tuple[str, str, str], List[str]] = {}
+        if directory and os.path.isdir(directory):
+            self._load(directory)
+
+    def _load(self, directory: str):
+        for root, _, files in os.walk(directory):
+            for name in sorted(files):
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    with open(path, encoding="utf-8") as f:
+                        self._index(json.load(f))
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning(f"读取夹具 {path} 失败，已跳过: {e}")
+
+    def _index(self, fixture: Dict[str, Any]) -> str:
+        key = fixture_key(
+            fixture["method"], fixture["host"], fixture["path"], [tuple(item) for item in fixture["query"]], _encode(fixture["body"] or "")
+        )
+        route = (fixture["method"], fixture["host"], fixture["path"])
+        keys = self._by_route.setdefault(route, [])
+        if key in keys:
+            keys.remove(key)
+        keys.append(key)
+        self._fixtures[key] = fixture
+        return key
+
+    def __len__(self) -> int:
+        return len(self._fixtures)
+
+    def add(
+        self,
+        method: str,
+        host: str,
+        path: str,
+        response: Any,
+        *,
+        query: Union[Mapping[str, Any], Iterable[Tuple[str, Any]], None] = None,
+        body: bytes = b"",
+        status: int = 200,
+    ) -> str:
+        """
+        保存一个夹具，相同请求的旧夹具会被替换
+
+        Args:
+            method: HTTP 方法
+            host: 上游主机
+            path: 请求路径（不含代理路径前缀）
+            response: 响应体：bytes / str 原样保存，其他对象序列化为 JSON
+            query: 查询参数
+            body: 规范化后的请求体（见 canonical_body）
+            status: 响应状态码
+
+        Returns:
+            str: 夹具键
+        """
+        if isinstance(response, bytes):
+            response_text = _decode(response)
+        elif isinstance(response, str):
+            response_text = response
+        else:
+            response_text = json.dumps(response, ensure_ascii=False)
+        items = query.items() if isinstance(query, Mapping) else (query or [])
+        fixture = {
+            "method": method.upper(),
+            "host": host,
+            "path": path,
+            "query": sorted([str(name), str(value)] for name, value in items),
+            "body": _decode(body) if body else None,
+            "status": status,
+            "response": response_text,
+        }
+        key = self._index(fixture)
+        if self.directory:
+            folder = os.path.join(self.directory, host.replace(os.sep, "_") or "_")
+            os.makedirs(folder, exist_ok=True)
+            with open(os.path.join(folder, f"{key}.json"), "w", encoding="utf-8") as f:
+                json.dump(fixture, f, ensure_ascii=True, indent=1)
+        return key
+
+    def lookup(
+        self, method: str, host: str, path: str, query: Iterable[Tuple[str, str]], body: bytes = b"", strict: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """
+        查找与请求匹配的夹具
+
+        Args:
+            method: HTTP 方法
+            host: 上游主机
+            path: 请求路径
+            query: 查询参数键值对
+            body: 规范化后的请求体
+            strict: 只接受完全匹配；否则退回到同一 (方法, 主机, 路径) 下最近保存的成功响应
+
+        Returns:
+            Optional[Dict[str, Any]]: 夹具（含 status 和 response），没有匹配时返回 None
+        """
+        method = method.upper()
+        fixture = self._fixtures.get(fixture_key(method, host, path, query, body))
+        if fixture is not None or strict:
+            return fixture
+        keys = self._by_route.get((method, host, path), [])
+        for key in reversed(keys):
+            if self._fixtures[key]["status"] < 400:
+                return self._fixtures[key]
+        return self._fixtures[keys[-1]] if keys else None
+
+
+def _split_path(url_path: str, base_path: str) -> str:
+    if base_path and url_path.startswith(base_path):
+        return url_path[len(base_path):] or "/"
+    return url_path
+
+
+class RecordingTransport(HttpTransport):
+    """
+    录制传输层：正常发送请求，同时把每个响应（包括错误状态码）保存到 FixtureStore
+
+    Args:
+        fixtures: 夹具集合或夹具目录
+        proxy_url: 代理地址，其路径前缀会从保存的路径中去掉
+        **kwargs: 传给 HttpTransport 的参数
+    """
+
+    def __init__(self, fixtures: Union[FixtureStore, str], proxy_url: str = "", **kwargs: Any):
+        super().__init__(**kwargs)
+        self.fixtures = fixtures if isinstance(fixtures, FixtureStore) else FixtureStore(fixtures)
+        self._base_path = urlsplit(proxy_url).path.rstrip("/")
+        self.recorded = 0
+
+    def _on_response(
+        self,
+        method: str,
+        url: yarl.URL,
+        headers: Optional[Dict[str, str]],
+        json: Any,
+        data: Any,
+        status: int,
+        body: bytes,
+    ):
+        host = (headers or {}).get("X-Original-Host") or url.host or ""
+        self.fixtures.add(
+            method,
+            host,
+            _split_path(url.path, self._base_path),
+            body,
+            query=list(url.query.items()),
+            body=canonical_body(json, data),
+            status=status,
+        )
+        self.recorded += 1
+
+
+class ReplayServer:
+    """
+    回放夹具的本地上游替身
+
+    Args:
+        fixtures: 夹具集合或夹具目录
+        host: 监听地址
+        port: 监听端口，0 表示由系统分配
+        latency: 每个响应的基础延迟（秒）
+        latency_jitter: 在基础延迟上增加 [0, latency_jitter) 的均匀随机延迟
+        slow_rate: 慢请求比例，慢请求额外延迟 slow_latency 秒（模拟长尾和超时）
+        slow_latency: 慢请求的额外延迟（秒）
+        error_rate: 返回 error_status 错误的请求比例
+        error_status: 注入的错误状态码
+        strict: 只回放完全匹配的夹具
+        seed: 随机数种子，便于复现
+    """
+
+    def __init__(
+        self,
+        fixtures: Union[FixtureStore, str],
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        slow_rate: float = 0.0,
+        slow_latency: float = 1.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        strict: bool = False,
+        seed: Optional[int] = None,
+    ):
+        self.fixtures = fixtures if isinstance(fixtures, FixtureStore) else FixtureStore(fixtures)
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.strict = strict
+        self.request_count = 0
+        self.miss_count = 0
+        self.injected_errors = 0
+        self._random = random.Random(seed)
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def url(self) -> str:
+        """替身的地址，用作 external_api_proxy_url"""
+        return f"http://{self.host}:{self.port}"
+
+    async def _request_body(self, request: web.Request) -> bytes:
+        body = await request.read()
+        if body and request.content_type == "application/json":
+            try:
+                return canonical_body(json.loads(body))
+            except ValueError:
+                pass
+        return body
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.request_count += 1
+        delay = self.latency
+        if self.latency_jitter:
+            delay += self._random.uniform(0, self.latency_jitter)
+        if self.slow_rate and self._random.random() < self.slow_rate:
+            delay += self.slow_latency
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.injected_errors += 1
+            return web.json_response({"error": "injected error"}, status=self.error_status)
+
+        host = request.headers.get("X-Original-Host") or request.host
+        fixture = self.fixtures.lookup(
+            request.method, host, request.path, list(request.query.items()), await self._request_body(request), self.strict
+        )
+        if fixture is None:
+            self.miss_count += 1
+            return web.json_response({"error": f"no fixture for {request.method} {host}{request.path_qs}"}, status=404)
+        return web.Response(body=_encode(fixture["response"]), status=fixture["status"], content_type="application/json")
+
+    async def start(self) -> int:
+        """
+        启动替身
+
+        Returns:
+            int: 实际监听的端口
+        """
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self.handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # 端口为 0 时由系统分配，回填实际端口
+        self.port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+        return self.port
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
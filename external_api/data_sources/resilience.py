@@ -0,0 +1,393 @@
+"""
+数据源请求弹性中间件
+
+BaseAPI._request_json 发出的每个请求都经过这里，按上游主机（X-Original-Host，所有数据源共用同一个代理，
+真正的上游由该请求头区分）提供:
+    - 重试：幂等请求（GET/HEAD/OPTIONS）遇到超时、连接错误、429/5xx 时按带抖动的指数退避重试
+    - 对冲请求：幂等请求在该主机近期 p95 延迟内仍未返回时，再发出一个相同的请求，取先成功的结果并取消另一个；
+      对冲请求数不超过请求总数的 hedge_budget，避免上游变慢时放大负载
+    - 熔断：同一主机连续 breaker_failure_threshold 次可重试失败后熔断 breaker_reset_timeout 秒，
+      期间请求直接抛出 CircuitOpenError；冷却结束后放行一个探测请求（半开），成功则恢复，失败则继续熔断
+
+每个数据源可以单独配置策略，client.config 中:
+    "resilience": {"retry_attempts": 2, ...}            所有数据源的默认策略
+    "<source>_resilience": {"hedge": False, ...}         单个数据源的覆盖项
+字段见 ResiliencePolicy。各主机的统计通过 get_resilience_stats() 获取。
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Mapping, Optional, TypeVar
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from .concurrency import CircuitOpenError, backoff_delay, is_retryable
+
+logger = logging.getLogger("data_sources_resilience")
+
+R = TypeVar("R")
+
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+# 计算对冲延迟的延迟样本窗口，以及每新增多少个样本重新计算一次分位数
+LATENCY_WINDOW = 200
+LATENCY_RECOMPUTE_EVERY = 10
+
+# 熔断器状态
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ResiliencePolicy:
+    """
+    单个数据源的弹性策略
+
+    Args:
+        retry_attempts: 幂等请求的最多尝试次数（包含第一次），1 表示不重试
+        retry_base_delay: 第一次重试前的基础等待秒数
+        retry_max_delay: 单次重试等待上限
+        hedge: 是否对幂等请求发出对冲请求
+        hedge_quantile: 对冲延迟使用的延迟分位数
+        hedge_min_samples: 主机至少有多少个延迟样本后才开始对冲
+        hedge_min_delay: 对冲延迟下限（秒）
+        hedge_max_delay: 对冲延迟上限（秒）
+        hedge_budget: 对冲请求数占请求总数的上限比例
+        breaker_failure_threshold: 连续多少次可重试失败后熔断，0 表示关闭熔断
+        breaker_reset_timeout: 熔断持续秒数，之后进入半开状态放行一个探测请求
+    """
+
+    __slots__ = (
+        "retry_attempts",
+        "retry_base_delay",
+        "retry_max_delay",
+        "hedge",
+        "hedge_quantile",
+        "hedge_min_samples",
+        "hedge_min_delay",
+        "hedge_max_delay",
+        "hedge_budget",
+        "breaker_failure_threshold",
+        "breaker_reset_timeout",
+    )
+
+    def __init__(
+        self,
+        retry_attempts: int = 2,
+        retry_base_delay: float = 0.2,
+        retry_max_delay: float = 2.0,
+        hedge: bool = True,
+        hedge_quantile: float = 0.95,
+        hedge_min_samples: int = 20,
+        hedge_min_delay: float = 0.05,
+        hedge_max_delay: float = 10.0,
+        hedge_budget: float = 0.1,
+        breaker_failure_threshold: int = 5,
+        breaker_reset_timeout: float = 30.0,
+    ):
+        self.retry_attempts = max(1, int(retry_attempts))
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.hedge = bool(hedge)
+        self.hedge_quantile = min(1.0, max(0.0, hedge_quantile))
+        self.hedge_min_samples = max(1, int(hedge_min_samples))
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_delay = hedge_max_delay
+        self.hedge_budget = hedge_budget
+        self.breaker_failure_threshold = max(0, int(breaker_failure_threshold))
+        self.breaker_reset_timeout = breaker_reset_timeout
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any], source_name: str) -> "ResiliencePolicy":
+        """
+        从 client.config 构建数据源的策略：默认值 <- config["resilience"] <- config["<source>_resilience"]
+
+        Args:
+            config: 客户端配置
+            source_name: 数据源名称
+
+        Returns:
+            ResiliencePolicy: 策略实例
+        """
+        options: Dict[str, Any] = {}
+        for key in ("resilience", f"{source_name}_resilience"):
+            options.update(config.get(key) or {})
+        unknown = [name for name in options if name not in cls.__slots__]
+        for name in unknown:
+            logger.warning(f"未知的弹性策略配置项 {name}（数据源 {source_name}），已忽略")
+            options.pop(name)
+        return cls(**options)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def replace(self, **changes: Any) -> "ResiliencePolicy":
+        """返回修改了部分字段的新策略，如 policy.replace(retry_attempts=1)"""
+        return ResiliencePolicy(**{**self.to_dict(), **changes})
+
+
+DEFAULT_POLICY = ResiliencePolicy()
+
+
+class HostState:
+    """单个上游主机的延迟窗口、熔断器状态和统计"""
+
+    def __init__(self, host: str):
+        self.host = host
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._new_samples = 0
+        self._quantile: Optional[float] = None
+        self._quantile_q = 0.0
+        # 熔断器
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        # 统计
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.short_circuits = 0
+        self.breaker_opens = 0
+
+    # -- 延迟 --
+
+    def record_latency(self, seconds: float):
+        self._latencies.append(seconds)
+        self._new_samples += 1
+
+    def latency_quantile(self, q: float) -> Optional[float]:
+        """近期成功请求延迟的 q 分位数（秒），样本不足时返回 None"""
+        if not self._latencies:
+            return None
+        if self._quantile is None or self._quantile_q != q or self._new_samples >= LATENCY_RECOMPUTE_EVERY:
+            samples = sorted(self._latencies)
+            self._quantile = samples[min(len(samples) - 1, int(q * len(samples)))]
+            self._quantile_q = q
+            self._new_samples = 0
+        return self._quantile
+
+    def hedge_delay(self, policy: ResiliencePolicy) -> Optional[float]:
+        """发出对冲请求前的等待秒数，不满足对冲条件时返回 None"""
+        if (
+            not policy.hedge
+            or self.state != CLOSED
+            or len(self._latencies) < policy.hedge_min_samples
+            or self.hedges >= policy.hedge_budget * self.requests
+        ):
+            return None
+        delay = self.latency_quantile(policy.hedge_quantile)
+        return min(policy.hedge_max_delay, max(policy.hedge_min_delay, delay))
+
+    # -- 熔断器 --
+
+    def before_request(self, policy: ResiliencePolicy):
+        """
+        检查熔断器是否放行请求
+
+        Raises:
+            CircuitOpenError: 熔断打开，或半开状态下已有探测请求在进行
+        """
+        if self.state == CLOSED or not policy.breaker_failure_threshold:
+            return
+        remaining = self.opened_at + policy.breaker_reset_timeout - time.monotonic()
+        if self.state == OPEN and remaining <= 0:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return
+        self.short_circuits += 1
+        raise CircuitOpenError(self.host, max(0.0, remaining))
+
+    def record_success(self):
+        self.successes += 1
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+        if self.state != CLOSED:
+            logger.info(f"Circuit breaker for {self.host} closed")
+            self.state = CLOSED
+
+    def record_failure(self, exc: BaseException, policy: ResiliencePolicy):
+        self.failures += 1
+        self._probe_in_flight = False
+        if not is_retryable(exc):
+            # 4xx 说明请求本身有问题，不代表上游不可用；半开探测得到这类响应说明上游已恢复
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+                self.consecutive_failures = 0
+            return
+        self.consecutive_failures += 1
+        threshold = policy.breaker_failure_threshold
+        if threshold and (self.state == HALF_OPEN or self.consecutive_failures >= threshold):
+            if self.state != OPEN:
+                self.breaker_opens += 1
+                logger.warning(
+                    f"Circuit breaker for {self.host} opened after {self.consecutive_failures} consecutive failures "
+                    f"({_describe(exc)}), rejecting requests for {policy.breaker_reset_timeout:.0f}s"
+                )
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def record_cancelled(self):
+        # 请求被取消（调用方取消）时不计入成败，只释放半开探测名额
+        self._probe_in_flight = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        p50 = self.latency_quantile(0.5)
+        p95 = self.latency_quantile(0.95)
+        return {
+            "state": self.state,
+            "requests": self.requests,
+            "successes": self.successes,
+            "failures": self.failures,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "short_circuits": self.short_circuits,
+            "breaker_opens": self.breaker_opens,
+            "consecutive_failures": self.consecutive_failures,
+            "latency_p50": p50,
+            "latency_p95": p95,
+        }
+
+
+_hosts: Dict[str, HostState] = {}
+
+
+def get_host_state(host: str) -> HostState:
+    """
+    获取上游主机的弹性状态，访问同一主机的数据源共享熔断器和延迟窗口
+
+    Args:
+        host: 上游主机名
+
+    Returns:
+        HostState: 该主机的状态
+    """
+    state = _hosts.get(host)
+    if state is None:
+        state = _hosts.setdefault(host, HostState(host))
+    return state
+
+
+def get_resilience_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    获取各上游主机的重试、对冲和熔断统计
+
+    Returns:
+        Dict[str, Dict[str, Any]]: host -> 统计（熔断状态、请求/成功/失败/重试/对冲次数、p50/p95 延迟等）
+    """
+    return {host: state.to_dict() for host, state in list(_hosts.items())}
+
+
+def reset_resilience_state():
+    """清空所有主机的熔断器状态、延迟窗口和统计"""
+    _hosts.clear()
+
+
+def request_host(url: str, headers: Optional[Mapping[str, str]] = None) -> str:
+    """请求的上游主机：优先使用 X-Original-Host 请求头，否则取 URL 的主机名"""
+    if headers:
+        host = headers.get("X-Original-Host")
+        if host:
+            return host
+    return urlsplit(url).netloc
+
+
+def _describe(exc: BaseException) -> str:
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return f"HTTP {exc.status}"
+    return repr(exc)
+
+
+async def _timed(state: HostState, call: Callable[[], Awaitable[R]]) -> R:
+    started = time.monotonic()
+    result = await call()
+    state.record_latency(time.monotonic() - started)
+    return result
+
+
+async def _hedged(state: HostState, call: Callable[[], Awaitable[R]], delay: float) -> R:
+    first = asyncio.ensure_future(_timed(state, call))
+    pending = {first}
+    try:
+        done, pending = await asyncio.wait(pending, timeout=delay)
+        if done:
+            return first.result()
+        state.hedges += 1
+        second = asyncio.ensure_future(_timed(state, call))
+        pending.add(second)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is second:
+                        state.hedge_wins += 1
+                    return task.result()
+                error = task.exception()
+        assert error is not None
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def execute(
+    host: str,
+    method: str,
+    call: Callable[[], Awaitable[R]],
+    policy: ResiliencePolicy = DEFAULT_POLICY,
+) -> R:
+    """
+    按策略执行一个请求：熔断检查、对冲和重试
+
+    Args:
+        host: 上游主机名，熔断器和延迟窗口按主机共享
+        method: HTTP 方法，只有幂等方法会重试和对冲
+        call: 无参协程工厂函数，每次（对冲）尝试调用一次
+        policy: 弹性策略
+
+    Returns:
+        R: call 的返回值
+
+    Raises:
+        CircuitOpenError: 熔断打开
+        最后一次尝试的异常，或第一个不可重试的异常
+    """
+    state = get_host_state(host)
+    idempotent = method.upper() in IDEMPOTENT_METHODS
+    attempts = policy.retry_attempts if idempotent else 1
+    attempt = 1
+    while True:
+        state.before_request(policy)
+        state.requests += 1
+        delay = state.hedge_delay(policy) if idempotent else None
+        try:
+            if delay is None:
+                result = await _timed(state, call)
+            else:
+                result = await _hedged(state, call, delay)
+        except asyncio.CancelledError:
+            state.record_cancelled()
+            raise
+        except Exception as e:
+            state.record_failure(e, policy)
+            if attempt >= attempts or not is_retryable(e):
+                raise
+            wait = backoff_delay(attempt, policy.retry_base_delay, policy.retry_max_delay)
+            logger.warning(f"{method} {host} attempt {attempt}/{attempts} failed ({_describe(e)}), retrying in {wait:.2f}s")
+            state.retries += 1
+            await asyncio.sleep(wait)
+            attempt += 1
+            continue
+        state.record_success()
+        return result
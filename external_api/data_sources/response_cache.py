@@ -0,0 +1,293 @@
+"""
+数据源响应缓存
+
+通过 @cached(ttl=...) 声明式地为 BaseAPI 的异步方法添加缓存，缓存键由数据源名、方法名和
+规范化后的参数组成。缓存分为两级:
+    - 内存 LRU
+    - 可选的 SQLite 磁盘缓存（设置 DATA_SOURCE_CACHE_DB 环境变量开启），agent 重启后仍然有效
+
+过期但仍在 stale_ttl 窗口内的条目会被直接返回，同时在后台刷新（stale-while-revalidate）。
+只有 success 为 True 的结果会被缓存。
+"""
+
+import asyncio
+import copy
+import functools
+import inspect
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+ENV_RESPONSE_CACHE_DB = "DATA_SOURCE_CACHE_DB"
+DEFAULT_MAX_ENTRIES = 1024
+
+logger = logging.getLogger("data_sources_response_cache")
+
+
+class CacheStats:
+    """单个数据源方法的缓存命中统计"""
+
+    __slots__ = ("hits", "stale_hits", "misses")
+
+    def __init__(self):
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        total = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits + self.stale_hits) / total if total else 0.0,
+        }
+
+
+class ResponseCache:
+    """两级响应缓存：内存 LRU + 可选的 SQLite 磁盘缓存"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, db_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        # key -> (value, stored_at, expires_at)
+        self._memory: "OrderedDict[str, Tuple[Any, float, float]]" = OrderedDict()
+        self._stats: Dict[Tuple[str, str], CacheStats] = {}
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path: str):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM response_cache WHERE expires_at < ?", (time.time(),))
+        except sqlite3.Error as e:
+            logger.warning(f"打开响应缓存数据库 {db_path} 失败，仅使用内存缓存: {e}")
+            self._db = None
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            Optional[Tuple[Any, float]]: (缓存值, 写入时间)，不存在或已彻底过期时返回 None
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[2] >= now:
+                    self._memory.move_to_end(key)
+                    return entry[0], entry[1]
+                del self._memory[key]
+
+            if self._db is None:
+                return None
+            try:
+                row = self._db.execute("SELECT value, stored_at, expires_at FROM response_cache WHERE key = ?", (key,)).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"读取响应缓存失败: {e}")
+                return None
+            if row is None or row[2] < now:
+                return None
+            value = json.loads(row[0])
+            self._put_memory(key, (value, row[1], row[2]))
+            return value, row[1]
+
+    def set(self, key: str, value: Any, max_age: float):
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            value: 缓存值，需可 JSON 序列化才能写入磁盘缓存
+            max_age: 条目最长保留时间（秒），包括 stale 窗口
+        """
+        stored_at = time.time()
+        expires_at = stored_at + max_age
+        with self._lock:
+            self._put_memory(key, (value, stored_at, expires_at))
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO response_cache (key, value, stored_at, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), stored_at, expires_at),
+                )
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                logger.warning(f"写入响应缓存失败: {e}")
+
+    def _put_memory(self, key: str, entry: Tuple[Any, float, float]):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def record(self, source_name: str, method_name: str, outcome: str):
+        """记录一次缓存访问结果，outcome 为 hit / stale_hit / miss"""
+        stats = self._stats.get((source_name, method_name))
+        if stats is None:
+            stats = self._stats.setdefault((source_name, method_name), CacheStats())
+        if outcome == "hit":
+            stats.hits += 1
+        elif outcome == "stale_hit":
+            stats.stale_hits += 1
+        else:
+            stats.misses += 1
+
+    def stats(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        获取各数据源方法的缓存命中统计
+
+        Returns:
+            Dict[str, Dict[str, Dict[str, Any]]]: source_name -> method_name -> 命中统计
+        """
+        result: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for (source_name, method_name), stats in list(self._stats.items()):
+            result.setdefault(source_name, {})[method_name] = stats.to_dict()
+        return result
+
+    def clear(self):
+        """清空缓存和统计"""
+        with self._lock:
+            self._memory.clear()
+            self._stats.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM response_cache")
+
+
+_response_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    获取全局响应缓存
+
+    Returns:
+        ResponseCache: 全局响应缓存实例
+    """
+    global _response_cache
+    if _response_cache is None:
+        with _cache_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache(db_path=os.getenv(ENV_RESPONSE_CACHE_DB))
+    return _response_cache
+
+
+def _normalize_argument(value: Any) -> Any:
+    # 数字和数字字符串发出的是同一个请求（如 locationId=123 和 "123"），缓存键中统一为字符串
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else repr(value)
+    if isinstance(value, (list, tuple)):
+        return [_normalize_argument(item) for item in value]
+    if isinstance(value, dict):
+        return {str(name): _normalize_argument(item) for name, item in value.items()}
+    return value
+
+
+def _make_key(source_name: str, method_name: str, arguments: Dict[str, Any]) -> str:
+    normalized = {name: _normalize_argument(value) for name, value in arguments.items()}
+    return f"{source_name}.{method_name}:{json.dumps(normalized, sort_keys=True, ensure_ascii=False, default=str)}"
+
+
+def cached(ttl: float, stale_ttl: float = 0.0) -> Callable:
+    """
+    为数据源的异步方法添加响应缓存
+
+    Args:
+        ttl: 缓存有效期（秒）
+        stale_ttl: 过期后仍可返回旧值并在后台刷新的时间窗口（秒）
+
+    Example:
+        @cached(ttl=24 * 3600)
+        async def get_supported_commodities(self) -> Dict[str, Any]:
+            ...
+    """
+
+    def decorator(func: Callable[..., Awaitable[Dict[str, Any]]]) -> Callable[..., Awaitable[Dict[str, Any]]]:
+        signature = inspect.signature(func)
+        method_name = func.__name__
+        inflight: Dict[str, "asyncio.Task[Tuple[Dict[str, Any], Dict[str, Any]]]"] = {}
+        refreshing: set = set()
+
+        async def call_upstream(self, key: str, args: tuple, kwargs: dict) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+            result = await func(self, *args, **kwargs)
+            # 发起方拿到的 result 可能被修改，缓存和其他等待方共用一份独立的副本
+            snapshot = copy.deepcopy(result)
+            if isinstance(result, dict) and result.get("success"):
+                get_response_cache().set(key, snapshot, ttl + stale_ttl)
+            return result, snapshot
+
+        def on_upstream_done(key: str, task: asyncio.Task):
+            if inflight.get(key) is task:
+                del inflight[key]
+            # 避免 "Task exception was never retrieved" 警告
+            if not task.cancelled():
+                task.exception()
+
+        async def fetch(self, key: str, args: tuple, kwargs: dict) -> Dict[str, Any]:
+            # 同一个键的并发未命中只发出一次请求；请求在独立的任务中执行，
+            # 某个调用方被取消不会影响其他等待方，也不会中断请求本身
+            task = inflight.get(key)
+            if task is not None:
+                _, snapshot = await asyncio.shield(task)
+                return copy.deepcopy(snapshot)
+
+            task = asyncio.get_running_loop().create_task(call_upstream(self, key, args, kwargs))
+            inflight[key] = task
+            task.add_done_callback(functools.partial(on_upstream_done, key))
+            result, _ = await asyncio.shield(task)
+            return result
+
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs) -> Dict[str, Any]:
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            arguments.pop("self", None)
+
+            source_name = self.source_name
+            key = _make_key(source_name, method_name, arguments)
+            cache = get_response_cache()
+            entry = cache.get(key)
+
+            if entry is not None:
+                value, stored_at = entry
+                if time.time() - stored_at < ttl:
+                    cache.record(source_name, method_name, "hit")
+                    return copy.deepcopy(value)
+
+                # 旧值仍在 stale 窗口内：直接返回，并在后台刷新
+                cache.record(source_name, method_name, "stale_hit")
+                if key not in refreshing:
+                    refreshing.add(key)
+                    task = asyncio.get_running_loop().create_task(fetch(self, key, args, kwargs))
+                    task.add_done_callback(lambda t: (refreshing.discard(key), t.cancelled() or t.exception()))
+                return copy.deepcopy(value)
+
+            cache.record(source_name, method_name, "miss")
+            return await fetch(self, key, args, kwargs)
+
+        return wrapper
+
+    return decorator
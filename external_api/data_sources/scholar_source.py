@@ -4,15 +4,21 @@
 
 import asyncio
 import logging
-import math
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 import aiohttp
 
 from .base import BaseAPI
+from .concurrency import get_host_limiter, iter_bounded
+from .pagination import dedup_key, dedupe, plan_pages
 
 logger = logging.getLogger("scholar_source")
 
+MAX_PAGE_SIZE = 20  # 最大每页数量,api有限制
+MAX_RESULTS = 500
+# Papers are identified by link, title is the fallback for results without a link
+DEDUP_KEYS = ("link", "title")
+
 
 class ScholarSource(BaseAPI):
     """Academic data source
@@ -29,6 +35,8 @@ class ScholarSource(BaseAPI):
             "X-Biz-Id": "matrix-agent",
             "X-Request-Timeout": str(config["timeout"] - 5),
         }
+        # Page requests to the same upstream host share one adaptive concurrency limit
+        self._limiter = get_host_limiter(config["serper_base_url"])
 
     @property
     def source_name(self) -> str:
@@ -79,10 +87,7 @@ class ScholarSource(BaseAPI):
         request_url = f"{self.proxy_url}/scholar"
 
         try:
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.post(request_url, headers=self.headers, json=payload, timeout=self.timeout) as response:
-                    response.raise_for_status()
-                    data = await response.json()
+            data = await self._limiter.run(lambda: self._request_json("POST", request_url, headers=self.headers, json=payload))
 
             organic = data.get("organic", [])
 
@@ -163,61 +168,84 @@ class ScholarSource(BaseAPI):
         #     ...     print(f"Search succeeded, {len(result['data']['papers'])} results returned")
         # """
         try:
-            # 限制最大结果数
-            if num_results > 500:
-                num_results = 500
-
-            # 计算分页
-            MAX_PAGE_SIZE = 20  # 最大每页数量,api有限制
-            page_size = min(num_results, MAX_PAGE_SIZE)
-            total_pages = math.ceil(num_results / page_size)
-
-            # 并发请求所有页面
-            tasks = []
-            for page in range(1, total_pages + 1):
-                # 最后一页可能需要调整数量
-                if page == total_pages and num_results % page_size != 0:
-                    current_page_size = num_results % page_size
-                else:
-                    current_page_size = page_size
-
-                tasks.append(
-                    self._fetch_scholar_page(
-                        query=query,
-                        page_size=current_page_size,
-                        page=page,
-                        start_year=start_year,
-                        end_year=end_year,
-                    )
-                )
-
-            # 等待所有请求完成
-            results = await asyncio.gather(*tasks)
-
-            # 合并结果
-            all_papers = []
-            has_error = False
+            pages: Dict[int, List[Dict[str, Any]]] = {}
             error_msgs = []
-            successful_pages = 0
-
-            for i, result in enumerate(results):
-                page_num = i + 1
+            async for page, result in self._iter_scholar_pages(query, num_results, start_year, end_year):
                 if result["success"]:
-                    page_results = result["data"]
-                    all_papers.extend(page_results)
-                    successful_pages += 1
+                    pages[page] = result["data"]
                 else:
-                    has_error = True
-                    error_msgs.append(f"Page {page_num}: {result['error']}")
+                    error_msgs.append(f"Page {page}: {result['error']}")
 
             # 如果有部分失败，记录错误但仍返回成功获取的数据
-            if has_error:
+            if error_msgs:
                 logger.warning(f"Some scholar pages failed: {', '.join(error_msgs)}")
 
-            # 限制返回数量
-            all_papers = all_papers[:num_results]
+            # 按页码合并、去重并限制返回数量
+            all_papers = dedupe((paper for page in sorted(pages) for paper in pages[page]), DEDUP_KEYS)
+            all_papers = all_papers[: min(num_results, MAX_RESULTS)]
 
             return {"success": True, "data": {"papers": all_papers}}
         except Exception as e:
             logger.error(f"search_scholar error: {e}")
             return {"success": False, "error": str(e)}
+
+    async def iter_search_scholar(
+        self,
+        query: str,
+        num_results: int = 10,
+        start_year: Optional[str] = None,
+        end_year: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Search for academic papers and yield results as soon as each page arrives (page completion order), duplicates are skipped.
+        Use with `async for`, e.g. `async for paper in client.scholar.iter_search_scholar("machine learning", num_results=200):`
+
+        Args:
+            query(str): Search keywords.
+            num_results(int): Number of results to request, default is 10, max is 500.
+            start_year(str): Start year, YYYY, default is None.
+            end_year(str): End year, YYYY, default is None.
+
+        Yields:
+            Dict[str, Any]: One paper, same format as the items of search_scholar()["data"]["papers"]
+        """
+        seen = set()
+        async for page, result in self._iter_scholar_pages(query, num_results, start_year, end_year):
+            if not result["success"]:
+                logger.warning(f"Scholar page {page} failed: {result['error']}")
+                continue
+            for paper in result["data"]:
+                key = dedup_key(paper, DEDUP_KEYS)
+                if key is not None:
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                yield paper
+
+    async def _iter_scholar_pages(
+        self,
+        query: str,
+        num_results: int,
+        start_year: Optional[str],
+        end_year: Optional[str],
+    ) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """
+        请求所有页面，按完成顺序产出 (页码, 单页结果)
+
+        所有页面同时发起，实际并发由上游主机共享的自适应限制器控制，失败的页面在限制器中按退避重试
+        """
+        pages = plan_pages(min(num_results, MAX_RESULTS), MAX_PAGE_SIZE)
+
+        async def fetch(page_spec: Tuple[int, int]) -> Tuple[int, Dict[str, Any]]:
+            page, page_size = page_spec
+            result = await self._fetch_scholar_page(
+                query=query,
+                page_size=page_size,
+                page=page,
+                start_year=start_year,
+                end_year=end_year,
+            )
+            return page, result
+
+        async for _, page_result in iter_bounded(pages, fetch, len(pages) or 1):
+            yield page_result
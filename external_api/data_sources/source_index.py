@@ -0,0 +1,247 @@
+"""
+数据源发现索引
+
+在不导入模块的前提下，通过解析 *_source / *_function 模块的语法树，
+建立 source_name -> (模块名, 类名) 的映射，供 ApiClient 按需导入和实例化数据源。
+基类沿包内的相对导入解析，继承自中间基类（如 class XSource(RapidApiBase)）的数据源同样会被发现；
+作为其他类基类且没有 source_name 的中间类不会被索引。基类无法静态解析时退回到导入模块。
+索引以包内各模块文件的 mtime 和大小为键缓存到 __pycache__ 下，模块变化后自动重建。
+"""
+
+import ast
+import json
+import logging
+import os
+import pkgutil
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger("data_sources_index")
+
+INDEX_CACHE_FILE = "source_index.json"
+
+# 类型 -> source_name -> (模块名, 类名)
+SourceIndex = Dict[str, Dict[str, Tuple[str, str]]]
+# 包内的类：(模块名, 类名)
+ClassRef = Tuple[str, str]
+BASE_API = ("base", "BaseAPI")
+
+
+def _module_kind(module_name: str) -> Optional[str]:
+    if module_name.endswith("_function"):
+        return "function"
+    if module_name.endswith("_source"):
+        return "data_source"
+    return None
+
+
+def _literal_source_name(class_node: ast.ClassDef) -> Optional[str]:
+    """提取 source_name 属性中直接返回的字符串常量"""
+    for node in class_node.body:
+        if isinstance(node, ast.FunctionDef) and node.name == "source_name":
+            for stmt in node.body:
+                if isinstance(stmt, ast.Return) and isinstance(stmt.value, ast.Constant) and isinstance(stmt.value.value, str):
+                    return stmt.value.value
+    return None
+
+
+class _ModuleInfo:
+    """模块的语法树摘要：顶层类及其基类引用"""
+
+    def __init__(self, module_name: str, tree: ast.Module):
+        self.module_name = module_name
+        self.classes: Dict[str, ast.ClassDef] = {}
+        # 本地名称 -> 包内的 (模块名, 名称)，来自 from .x import y / from . import x
+        self.imports: Dict[str, ClassRef] = {}
+        self.module_aliases: Dict[str, str] = {}
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef):
+                self.classes[node.name] = node
+            elif isinstance(node, ast.ImportFrom) and node.level == 1:
+                for alias in node.names:
+                    local_name = alias.asname or alias.name
+                    if node.module:
+                        self.imports[local_name] = (node.module, alias.name)
+                    else:
+                        self.module_aliases[local_name] = alias.name
+
+    def base_refs(self, class_node: ast.ClassDef) -> List[Optional[ClassRef]]:
+        """
+        解析类的基类引用
+
+        Returns:
+            List[Optional[ClassRef]]: 包内的基类为 (模块名, 类名)，包外的基类（如 object、Enum）为 None
+        """
+        refs: List[Optional[ClassRef]] = []
+        for base in class_node.bases:
+            if isinstance(base, ast.Name):
+                if base.id in self.classes:
+                    refs.append((self.module_name, base.id))
+                else:
+                    refs.append(self.imports.get(base.id))
+            elif isinstance(base, ast.Attribute) and isinstance(base.value, ast.Name) and base.value.id in self.module_aliases:
+                refs.append((self.module_aliases[base.value.id], base.attr))
+            elif isinstance(base, ast.Attribute) and base.attr == "BaseAPI":
+                refs.append(BASE_API)
+            else:
+                refs.append(None)
+        return refs
+
+
+class _ClassResolver:
+    """沿包内模块解析类是否继承自 BaseAPI，模块按需解析"""
+
+    def __init__(self, package_dir: str):
+        self.package_dir = package_dir
+        self._modules: Dict[str, Optional[_ModuleInfo]] = {}
+        self._results: Dict[ClassRef, Optional[bool]] = {}
+
+    def module(self, module_name: str) -> Optional[_ModuleInfo]:
+        if module_name not in self._modules:
+            file_path = os.path.join(self.package_dir, f"{module_name}.py")
+            info = None
+            if os.path.exists(file_path):
+                with open(file_path, "r", encoding="utf-8") as f:
+                    info = _ModuleInfo(module_name, ast.parse(f.read(), filename=file_path))
+            self._modules[module_name] = info
+        return self._modules[module_name]
+
+    def is_base_api_subclass(self, ref: ClassRef) -> Optional[bool]:
+        """
+        判断包内的类是否继承自 BaseAPI
+
+        Returns:
+            Optional[bool]: 无法静态确定（如基类经由 __init__ 再导出、动态生成）时返回 None
+        """
+        if ref == BASE_API:
+            return True
+        if ref in self._results:
+            return self._results[ref]
+        # 先标记为 False，防止循环继承时无限递归
+        self._results[ref] = False
+        info = self.module(ref[0])
+        if info is None or ref[1] not in info.classes:
+            result: Optional[bool] = None
+        else:
+            result = False
+            for base_ref in info.base_refs(info.classes[ref[1]]):
+                if base_ref is None:
+                    continue
+                base_result = self.is_base_api_subclass(base_ref)
+                if base_result:
+                    result = True
+                    break
+                if base_result is None:
+                    result = None
+        self._results[ref] = result
+        return result
+
+
+def _scan_module(resolver: _ClassResolver, module_name: str) -> Optional[List[Tuple[str, str]]]:
+    """
+    解析模块文件，返回其中的 (source_name, 类名) 列表
+
+    Returns:
+        Optional[List[Tuple[str, str]]]: 无法静态确定数据源类或其 source_name 时返回 None
+    """
+    info = resolver.module(module_name)
+    if info is None:
+        return None
+    # 模块内被其他类继承的类是中间基类，没有 source_name 时不作为数据源
+    used_as_base = {ref[1] for node in info.classes.values() for ref in info.base_refs(node) if ref and ref[0] == module_name}
+
+    entries = []
+    for class_name, node in info.classes.items():
+        is_source = resolver.is_base_api_subclass((module_name, class_name))
+        if is_source is None:
+            logger.debug(f"无法静态解析 {module_name}.{class_name} 的基类，导入模块扫描")
+            return None
+        if not is_source:
+            continue
+        source_name = _literal_source_name(node)
+        if source_name is None:
+            if class_name in used_as_base:
+                continue
+            return None
+        entries.append((source_name, class_name))
+    return entries
+
+
+def _scan_module_by_import(package: str, module_name: str) -> List[Tuple[str, str]]:
+    """无法静态解析时退回到导入模块并实例化的方式"""
+    import importlib
+
+    from .base import BaseAPI
+    from .client import config
+
+    module = importlib.import_module(f".{module_name}", package=package)
+    entries = []
+    for item_name in dir(module):
+        item = getattr(module, item_name)
+        if isinstance(item, type) and issubclass(item, BaseAPI) and item != BaseAPI and item.__module__ == module.__name__:
+            entries.append((item(config).source_name, item.__name__))
+    return entries
+
+
+def build_source_index(package_dir: str, package: str, exclude_classes: List[str]) -> SourceIndex:
+    """
+    构建数据源发现索引
+
+    Args:
+        package_dir: 数据源所在目录
+        package: 数据源所在包名
+        exclude_classes: 需要排除的数据源类名
+
+    Returns:
+        SourceIndex: 类型 -> source_name -> (模块名, 类名)
+    """
+    # 数据源的基类可能定义在包内任意模块中，所有模块都参与指纹
+    modules = {}
+    fingerprint = {}
+    for module_info in pkgutil.iter_modules([package_dir]):
+        file_path = os.path.join(package_dir, f"{module_info.name}.py")
+        stat = os.stat(file_path) if os.path.exists(file_path) else None
+        fingerprint[module_info.name] = [stat.st_mtime_ns, stat.st_size] if stat else []
+        kind = _module_kind(module_info.name)
+        if kind is not None:
+            modules[module_info.name] = (kind, file_path if stat else "")
+    cache_path = os.path.join(package_dir, "__pycache__", INDEX_CACHE_FILE)
+    cached = _read_cache(cache_path)
+    if cached is not None and cached.get("fingerprint") == fingerprint and cached.get("exclude") == sorted(exclude_classes):
+        return {kind: {name: tuple(target) for name, target in entries.items()} for kind, entries in cached["index"].items()}
+
+    index: SourceIndex = {"data_source": {}, "function": {}}
+    resolver = _ClassResolver(package_dir)
+    for module_name, (kind, file_path) in modules.items():
+        try:
+            entries = _scan_module(resolver, module_name) if file_path else None
+            if entries is None:
+                entries = _scan_module_by_import(package, module_name)
+        except Exception as e:
+            logger.error(f"解析数据源模块 {module_name} 失败: {str(e)}\n")
+            logger.exception(e)
+            continue
+        for source_name, class_name in entries:
+            if class_name not in exclude_classes:
+                index[kind][source_name] = (module_name, class_name)
+
+    _write_cache(cache_path, {"fingerprint": fingerprint, "exclude": sorted(exclude_classes), "index": index})
+    return index
+
+
+def _read_cache(cache_path: str) -> Optional[dict]:
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(cache_path: str, value: dict):
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(value, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
@@ -0,0 +1,219 @@
+"""
+数据源时间戳规范化
+
+各数据源把上游的时间字符串统一转换为 "YYYY-MM-DD HH:MM:SS"。逐条调用 datetime.strptime 的开销
+在解析成千上万条评论或推文时占了大部分时间，这里为常见的固定宽度格式提供快速解析:
+    - ISO-8601（2025-04-24T22:29:34Z、2021-02-26T00:50:50.206Z）：预编译的固定宽度正则
+    - Twitter（Thu Mar 13 18:08:35 +0000 2025）和 RFC-2822（Tue, 04 Mar 2025 12:26:23 +0000）：
+      预编译的正则和月份表
+
+快速解析只接受严格的固定宽度写法，其他写法（如单位数日期、小写月份）交给 strptime 处理，
+因此结果与 strptime + strftime 完全一致。和原来的实现一样，输出保留字符串中的本地时间，不换算时区。
+
+format_timestamps 批量把 Unix 时间戳格式化为字符串，同一天的日期部分只计算一次。
+"""
+
+import re
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# 常用的上游格式（strptime 格式字符串）
+ISO_Z = "%Y-%m-%dT%H:%M:%SZ"
+ISO_MS_Z = "%Y-%m-%dT%H:%M:%S.%fZ"
+TWITTER = "%a %b %d %H:%M:%S %z %Y"
+RFC2822 = "%a, %d %b %Y %H:%M:%S %z"
+
+_WEEKDAY = r"(?:Mon|Tue|Wed|Thu|Fri|Sat|Sun)"
+_MONTH = r"(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)"
+_DAY = r"(0[1-9]|[12][0-9]|3[01])"
+_CLOCK = r"((?:[01][0-9]|2[0-3]):[0-5][0-9]:[0-5][0-9])"
+_OFFSET = r"([+-])([01][0-9]|2[0-3])([0-5][0-9])"
+_ISO_DATE = r"([0-9]{4})-(0[1-9]|1[0-2])-" + _DAY + "T" + _CLOCK
+
+# 快速解析只接受严格的固定宽度写法，匹配组依次为 年、月、日、时钟、偏移符号、偏移小时、偏移分钟
+_ISO_Z_RE = re.compile(_ISO_DATE + "Z")
+_ISO_MS_Z_RE = re.compile(_ISO_DATE + r"\.[0-9]{1,6}Z")
+_TWITTER_RE = re.compile(f"{_WEEKDAY} {_MONTH} {_DAY} {_CLOCK} {_OFFSET} ([0-9]{{4}})")
+_RFC2822_RE = re.compile(f"{_WEEKDAY}, {_DAY} {_MONTH} ([0-9]{{4}}) {_CLOCK} {_OFFSET}")
+
+_MONTHS = {name: f"{index:02d}" for index, name in enumerate(("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"), 1)}
+_MAX_DAY = {"01": "31", "02": "29", "03": "31", "04": "30", "05": "31", "06": "30", "07": "31", "08": "31", "09": "30", "10": "31", "11": "30", "12": "31"}
+_EPOCH = date(1970, 1, 1)
+
+# (规范化的时间字符串, UTC 偏移秒数)
+Parsed = Tuple[str, int]
+
+
+def _build(year: str, month: str, day: str, clock: str, sign: str = "+", offset_hours: str = "00", offset_minutes: str = "00") -> Optional[Parsed]:
+    # 正则已经保证各字段的取值范围，这里只检查月份天数；strftime 不补齐 1000 年以前的年份，交给慢路径
+    if day > _MAX_DAY[month] or year < "1000":
+        return None
+    if month == "02" and day == "29":
+        year_number = int(year)
+        if year_number % 4 or (year_number % 100 == 0 and year_number % 400):
+            return None
+    offset = int(offset_hours) * 3600 + int(offset_minutes) * 60
+    return f"{year}-{month}-{day} {clock}", -offset if sign == "-" else offset
+
+
+def _parse_iso_z(value: str) -> Optional[Parsed]:
+    match = _ISO_Z_RE.fullmatch(value)
+    return _build(*match.groups()) if match else None
+
+
+def _parse_iso_ms_z(value: str) -> Optional[Parsed]:
+    match = _ISO_MS_Z_RE.fullmatch(value)
+    return _build(*match.groups()) if match else None
+
+
+def _parse_twitter(value: str) -> Optional[Parsed]:
+    # Thu Mar 13 18:08:35 +0000 2025
+    match = _TWITTER_RE.fullmatch(value)
+    if match is None:
+        return None
+    month, day, clock, sign, offset_hours, offset_minutes, year = match.groups()
+    return _build(year, _MONTHS[month], day, clock, sign, offset_hours, offset_minutes)
+
+
+def _parse_rfc2822(value: str) -> Optional[Parsed]:
+    # Tue, 04 Mar 2025 12:26:23 +0000
+    match = _RFC2822_RE.fullmatch(value)
+    if match is None:
+        return None
+    day, month, year, clock, sign, offset_hours, offset_minutes = match.groups()
+    return _build(year, _MONTHS[month], day, clock, sign, offset_hours, offset_minutes)
+
+
+_FAST_PARSERS: Dict[str, Callable[[str], Optional[Parsed]]] = {
+    ISO_Z: _parse_iso_z,
+    ISO_MS_Z: _parse_iso_ms_z,
+    TWITTER: _parse_twitter,
+    RFC2822: _parse_rfc2822,
+}
+
+
+def _parse_slow(value: str, fmt: str) -> Optional[Parsed]:
+    try:
+        dt = datetime.strptime(value, fmt)
+    except (TypeError, ValueError):
+        return None
+    offset = dt.utcoffset()
+    return dt.strftime("%Y-%m-%d %H:%M:%S"), int(offset.total_seconds()) if offset else 0
+
+
+def parse(value: str, fmt: str) -> Optional[Parsed]:
+    """
+    按 strptime 格式解析时间字符串
+
+    Args:
+        value: 时间字符串
+        fmt: strptime 格式，ISO_Z / ISO_MS_Z / TWITTER / RFC2822 走快速解析，其他格式直接使用 strptime
+
+    Returns:
+        Optional[Parsed]: ("YYYY-MM-DD HH:MM:SS", UTC 偏移秒数)，无法解析时返回 None
+    """
+    fast_parser = _FAST_PARSERS.get(fmt)
+    if fast_parser is not None and isinstance(value, str):
+        parsed = fast_parser(value)
+        if parsed is not None:
+            return parsed
+    return _parse_slow(value, fmt)
+
+
+def normalize(value: str, fmt: str) -> Optional[str]:
+    """
+    把时间字符串转换为 "YYYY-MM-DD HH:MM:SS"（保留字符串中的本地时间）
+
+    Args:
+        value: 时间字符串
+        fmt: strptime 格式
+
+    Returns:
+        Optional[str]: 规范化后的时间，无法解析时返回 None
+    """
+    parsed = parse(value, fmt)
+    return parsed[0] if parsed is not None else None
+
+
+def normalize_many(values: Iterable[str], fmt: str) -> List[Optional[str]]:
+    """
+    批量规范化时间字符串，解析函数只查找一次
+
+    Args:
+        values: 时间字符串序列
+        fmt: strptime 格式
+
+    Returns:
+        List[Optional[str]]: 与输入一一对应的结果，无法解析的为 None
+    """
+    fast_parser = _FAST_PARSERS.get(fmt)
+    results = []
+    for value in values:
+        parsed = fast_parser(value) if fast_parser is not None and isinstance(value, str) else None
+        if parsed is None:
+            parsed = _parse_slow(value, fmt)
+        results.append(parsed[0] if parsed is not None else None)
+    return results
+
+
+def to_timestamp(value: str, fmt: str) -> Optional[int]:
+    """
+    把时间字符串转换为 Unix 时间戳（按字符串中的 UTC 偏移换算，没有偏移的按 UTC 处理）
+
+    Args:
+        value: 时间字符串
+        fmt: strptime 格式
+
+    Returns:
+        Optional[int]: Unix 时间戳（秒），无法解析时返回 None
+    """
+    parsed = parse(value, fmt)
+    if parsed is None:
+        return None
+    text, offset = parsed
+    days = date(int(text[0:4]), int(text[5:7]), int(text[8:10])).toordinal() - _EPOCH.toordinal()
+    return days * 86400 + int(text[11:13]) * 3600 + int(text[14:16]) * 60 + int(text[17:19]) - offset
+
+
+def _local_offset(timestamp: int, cache: Dict[int, Optional[int]]) -> int:
+    # 同一小时内本地时区偏移不变时按小时缓存；该小时内发生夏令时切换时逐条计算
+    hour = timestamp // 3600
+    try:
+        offset = cache[hour]
+    except KeyError:
+        start = time.localtime(hour * 3600).tm_gmtoff
+        offset = cache[hour] = start if start == time.localtime(hour * 3600 + 3599).tm_gmtoff else None
+    return offset if offset is not None else time.localtime(timestamp).tm_gmtoff
+
+
+def format_timestamps(timestamps: Iterable[float], date_only: bool = False, local: bool = False) -> List[str]:
+    """
+    批量把 Unix 时间戳格式化为 "YYYY-MM-DD HH:MM:SS" 或 "YYYY-MM-DD"
+
+    Args:
+        timestamps: Unix 时间戳序列（秒）
+        date_only: 只输出日期
+        local: 按本地时区格式化（与 datetime.fromtimestamp(ts) 一致），默认按 UTC
+
+    Returns:
+        List[str]: 与输入一一对应的时间字符串
+    """
+    day_cache: Dict[int, str] = {}
+    offset_cache: Dict[int, Optional[int]] = {}
+    results = []
+    for timestamp in timestamps:
+        timestamp = int(timestamp // 1)
+        if local:
+            timestamp += _local_offset(timestamp, offset_cache)
+        day, seconds = divmod(timestamp, 86400)
+        day_str = day_cache.get(day)
+        if day_str is None:
+            day_str = day_cache[day] = (_EPOCH + timedelta(days=day)).isoformat()
+        if date_only:
+            results.append(day_str)
+        else:
+            hour, seconds = divmod(seconds, 3600)
+            minute, second = divmod(seconds, 60)
+            results.append(f"{day_str} {hour:02d}:{minute:02d}:{second:02d}")
+    return results
@@ -0,0 +1,317 @@
+"""
+数据源本地时间序列存储
+
+按 (namespace, symbol, interval) 保存价格序列，每条序列由两个文件组成:
+    - <name>.bin:  只追加的定长记录（int64 时间戳 + 每个字段一个 float64，缺失值为 NaN）
+    - <name>.json: 字段列表和已覆盖的时间区间（coverage）
+
+数据源查询一个时间范围时，只向 API 请求 coverage 中缺失的子区间，写入后再从本地读取整个范围，
+重复或重叠的查询因此不会重新下载已有的历史数据。同一时间戳以最后写入的记录为准，
+重复记录过多时在加载时压缩文件。
+
+设置 DATA_SOURCE_TIMESERIES_DIR 环境变量后持久化到该目录，否则只保存在进程内存中。
+Yahoo 价格序列的增量获取默认只在持久化时启用（config yahoo_timeseries_store 可覆盖）。
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import struct
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+ENV_TIMESERIES_DIR = "DATA_SOURCE_TIMESERIES_DIR"
+# 文件中重复记录超过有效记录数的倍数时压缩
+COMPACT_RATIO = 2
+COMPACT_MIN_RECORDS = 1024
+
+logger = logging.getLogger("data_sources_timeseries_store")
+
+# (start, end, fetched_at)，区间为左闭右开
+Range = Tuple[int, int, float]
+
+
+class TimeSeries:
+    """
+    单条时间序列
+
+    内存中保存 时间戳 -> 字段值 的映射和有序时间戳索引，持久化文件只追加写入。
+    """
+
+    def __init__(self, path: Optional[str], fields: Sequence[str]):
+        self.path = path
+        self.fields = tuple(fields)
+        self._record = struct.Struct("<q" + "d" * len(self.fields))
+        self._rows: Dict[int, Tuple[float, ...]] = {}
+        self._index: List[int] = []
+        self._ranges: List[Range] = []
+        self._file_records = 0
+        self._meta_saved = False
+        self._lock = threading.Lock()
+        if path:
+            self._load()
+
+    def _load(self):
+        meta_file = f"{self.path}.json"
+        data_file = f"{self.path}.bin"
+        try:
+            with open(meta_file, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if tuple(meta.get("fields", ())) != self.fields:
+                logger.warning(f"时间序列 {self.path} 的字段已变化，丢弃本地数据")
+                for stale_file in (data_file, meta_file):
+                    if os.path.exists(stale_file):
+                        os.remove(stale_file)
+                return
+            self._ranges = [tuple(r) for r in meta.get("ranges", [])]
+            self._meta_saved = True
+            with open(data_file, "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取时间序列 {self.path} 失败，忽略本地数据: {e}")
+            self._ranges = []
+            return
+
+        # 截断末尾不完整的记录（写入过程中进程退出）
+        usable = len(content) - len(content) % self._record.size
+        for record in self._record.iter_unpack(content[:usable]):
+            self._rows[record[0]] = record[1:]
+        self._index = sorted(self._rows)
+        self._file_records = usable // self._record.size
+        if self._file_records > max(COMPACT_MIN_RECORDS, COMPACT_RATIO * len(self._rows)):
+            self._compact()
+
+    def _compact(self):
+        data_file = f"{self.path}.bin"
+        tmp_file = f"{data_file}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_file, "wb") as f:
+                f.write(b"".join(self._record.pack(ts, *self._rows[ts]) for ts in self._index))
+            os.replace(tmp_file, data_file)
+            self._file_records = len(self._index)
+        except OSError as e:
+            logger.warning(f"压缩时间序列 {self.path} 失败: {e}")
+
+    def _save_meta(self):
+        meta_file = f"{self.path}.json"
+        tmp_file = f"{meta_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"fields": self.fields, "ranges": self._ranges}, f)
+        os.replace(tmp_file, meta_file)
+        self._meta_saved = True
+
+    def missing_ranges(self, start: int, end: int, max_age: Optional[float] = None) -> List[Tuple[int, int]]:
+        """
+        计算 [start, end) 中尚未覆盖的子区间
+
+        Args:
+            start: 起始时间戳（包含）
+            end: 结束时间戳（不包含）
+            max_age: 覆盖区间的最长有效期（秒），超过的区间视为缺失；None 表示永不过期
+
+        Returns:
+            List[Tuple[int, int]]: 按时间排序的缺失子区间
+        """
+        oldest = time.time() - max_age if max_age is not None else -math.inf
+        missing = []
+        cursor = start
+        with self._lock:
+            for range_start, range_end, fetched_at in self._ranges:
+                if range_end <= cursor or fetched_at < oldest:
+                    continue
+                if range_start >= end:
+                    break
+                if range_start > cursor:
+                    missing.append((cursor, range_start))
+                cursor = max(cursor, range_end)
+                if cursor >= end:
+                    break
+        if cursor < end:
+            missing.append((cursor, end))
+        return missing
+
+    def read(self, start: int, end: int) -> Tuple[List[int], Dict[str, List[Optional[float]]]]:
+        """
+        读取 [start, end) 内的数据
+
+        Returns:
+            Tuple[List[int], Dict[str, List[Optional[float]]]]: (有序时间戳, 字段 -> 值列表)，缺失值为 None
+        """
+        with self._lock:
+            timestamps = self._index[bisect_left(self._index, start) : bisect_left(self._index, end)]
+            rows = [self._rows[ts] for ts in timestamps]
+        columns: Dict[str, List[Optional[float]]] = {}
+        for i, field in enumerate(self.fields):
+            columns[field] = [None if value != value else value for value in (row[i] for row in rows)]
+        return timestamps, columns
+
+    def last_timestamp_before(self, end: int, start: int) -> Optional[int]:
+        """
+        获取 [start, end) 内最后一个已保存的时间戳
+
+        Returns:
+            Optional[int]: 时间戳，区间内没有数据时返回 None
+        """
+        with self._lock:
+            position = bisect_left(self._index, end)
+            if position and self._index[position - 1] >= start:
+                return self._index[position - 1]
+        return None
+
+    def write(
+        self,
+        timestamps: Sequence[int],
+        columns: Dict[str, Sequence[Any]],
+        covered: Optional[Tuple[int, int]] = None,
+    ):
+        """
+        追加数据，并可选地把 covered 区间标记为已覆盖
+
+        Args:
+            timestamps: 时间戳列表
+            columns: 字段 -> 值列表，缺少的字段和 None 值按缺失处理
+            covered: 本次写入完整覆盖的区间 [start, end)，None 表示不更新覆盖信息（如实时快照）
+        """
+        nan = float("nan")
+        field_columns = [columns.get(field) or () for field in self.fields]
+        records = []
+        for i, ts in enumerate(timestamps):
+            values = []
+            for column in field_columns:
+                value = column[i] if i < len(column) else None
+                values.append(float(value) if isinstance(value, (int, float)) else nan)
+            records.append((int(ts), tuple(values)))
+
+        with self._lock:
+            for ts, values in records:
+                if ts not in self._rows:
+                    insort(self._index, ts)
+                self._rows[ts] = values
+            if covered is not None and covered[0] < covered[1]:
+                self._add_range(covered[0], covered[1], time.time())
+            if not self.path:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                if records:
+                    with open(f"{self.path}.bin", "ab") as f:
+                        f.write(b"".join(self._record.pack(ts, *values) for ts, values in records))
+                    self._file_records += len(records)
+                if covered is not None or not self._meta_saved:
+                    self._save_meta()
+            except OSError as e:
+                logger.warning(f"写入时间序列 {self.path} 失败: {e}")
+
+    def _add_range(self, start: int, end: int, fetched_at: float):
+        # 新区间覆盖旧区间的重叠部分，再合并首尾相接的区间（保留较早的抓取时间）
+        ranges: List[Range] = []
+        for range_start, range_end, range_fetched_at in self._ranges:
+            if range_end <= start or range_start >= end:
+                ranges.append((range_start, range_end, range_fetched_at))
+                continue
+            if range_start < start:
+                ranges.append((range_start, start, range_fetched_at))
+            if range_end > end:
+                ranges.append((end, range_end, range_fetched_at))
+        ranges.append((start, end, fetched_at))
+        ranges.sort()
+
+        merged: List[Range] = []
+        for current in ranges:
+            if merged and merged[-1][1] >= current[0]:
+                last = merged[-1]
+                merged[-1] = (last[0], max(last[1], current[1]), min(last[2], current[2]))
+            else:
+                merged.append(current)
+        self._ranges = merged
+
+
+class TimeSeriesStore:
+    """时间序列存储，按 (namespace, symbol, interval) 管理 TimeSeries"""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root
+        self._series: Dict[Tuple[str, str, str], TimeSeries] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def persistent(self) -> bool:
+        """是否持久化到磁盘（设置了 DATA_SOURCE_TIMESERIES_DIR）"""
+        return bool(self.root)
+
+    def series(self, namespace: str, symbol: str, interval: str, fields: Sequence[str]) -> TimeSeries:
+        """
+        获取（必要时加载）一条时间序列
+
+        Args:
+            namespace: 命名空间，通常为数据源名称
+            symbol: 标的代码
+            interval: 时间粒度，如 1d / 1m / snapshot
+            fields: 字段列表
+
+        Returns:
+            TimeSeries: 时间序列
+        """
+        key = (namespace, symbol, interval)
+        series = self._series.get(key)
+        if series is None or series.fields != tuple(fields):
+            with self._lock:
+                series = self._series.get(key)
+                if series is None or series.fields != tuple(fields):
+                    series = self._series[key] = TimeSeries(self._series_path(key), fields)
+        return series
+
+    def _series_path(self, key: Tuple[str, str, str]) -> Optional[str]:
+        if not self.root:
+            return None
+        namespace, symbol, interval = key
+        digest = hashlib.sha1("\0".join(key).encode("utf-8")).hexdigest()[:8]
+        name = re.sub(r"[^A-Za-z0-9._-]", "_", f"{symbol}__{interval}")
+        return os.path.join(self.root, re.sub(r"[^A-Za-z0-9._-]", "_", namespace), f"{name}-{digest}")
+
+    def clear(self):
+        """清空内存中的序列（不删除磁盘文件）"""
+        with self._lock:
+            self._series.clear()
+
+
+def parse_date_range(start_date: str = "", end_date: str = "") -> Tuple[int, int]:
+    """
+    把可选的 UTC 日期转换为时间戳区间 [start, end)
+
+    Args:
+        start_date: 起始日期（YYYY-MM-DD），为空表示不限
+        end_date: 结束日期（YYYY-MM-DD，包含当天），为空表示不限
+
+    Returns:
+        Tuple[int, int]: (起始时间戳, 结束时间戳)
+    """
+    start = int(datetime.strptime(start_date, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()) if start_date else 0
+    if end_date:
+        end = int((datetime.strptime(end_date, "%Y-%m-%d").replace(tzinfo=timezone.utc) + timedelta(days=1)).timestamp())
+    else:
+        end = 2**62
+    if start >= end:
+        raise ValueError("start_date cannot be greater than end_date")
+    return start, end
+
+
+_timeseries_store = TimeSeriesStore(os.getenv(ENV_TIMESERIES_DIR))
+
+
+def get_timeseries_store() -> TimeSeriesStore:
+    """
+    获取全局时间序列存储
+
+    Returns:
+        TimeSeriesStore: 全局时间序列存储实例
+    """
+    return _timeseries_store
@@ -0,0 +1,305 @@
+"""
+数据源工具描述与调度
+
+把 ApiClient 中每个数据源的公开方法导出为工具（如 MCP tool）:
+    - 工具的 JSON Schema 由方法签名和 docstring 生成，按数据源类缓存在 desc_cache 中
+      （设置 DATA_SOURCE_DESC_CACHE_DIR 后会持久化到磁盘）
+    - 参数校验器在构建调度表时由 JSON Schema 编译一次，调用时只做类型检查
+    - build_tool_table 返回 工具名 -> DataSourceTool 的字典，调用时按名字 O(1) 查找
+
+    tools = build_tool_table(get_client())
+    result = await tools["twitter_search_tweets"]({"query": "python", "limit": 5})
+
+工具名为 <数据源名>_<方法名>；异步生成器方法（iter_*）的结果收集为列表返回。
+工具结果会转换为可 JSON 序列化的值（如 output_format="numpy"/"pandas" 返回的数组和 DataFrame）。
+"""
+
+import copy
+import inspect
+import logging
+import math
+import typing
+from typing import Any, Callable, Dict, List, Optional
+
+from docstring_parser import parse
+
+from .base import BaseAPI
+from .desc_cache import get_desc_cache
+
+logger = logging.getLogger("data_sources_tool_schema")
+
+Validator = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+_SIMPLE_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean", dict: "object", list: "array"}
+_JSON_DEFAULT_TYPES = (str, int, float, bool, type(None))
+
+
+class ToolArgumentError(ValueError):
+    """工具参数不符合 JSON Schema"""
+
+
+def to_json_safe(value: Any) -> Any:
+    """
+    把工具结果转换为可 JSON 序列化的值
+
+    NumPy 数组和标量转为列表/Python 数字，DataFrame 转为按行的字典列表（索引作为一列），
+    日期时间转为 ISO 字符串，NaN / NaT / NA 转为 None
+
+    Args:
+        value: 数据源方法的返回值
+
+    Returns:
+        Any: 只包含 dict / list / str / 数字 / bool / None 的值
+    """
+    if value is None or isinstance(value, (str, bool, int)):
+        return value
+    if isinstance(value, float):
+        return None if math.isnan(value) else value
+    if isinstance(value, dict):
+        return {key: to_json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json_safe(item) for item in value]
+    if hasattr(value, "columns") and hasattr(value, "to_dict"):
+        # pandas.DataFrame
+        frame = value.reset_index()
+        frame = frame.astype(object).where(frame.notna(), None)
+        return to_json_safe(frame.to_dict("records"))
+    if hasattr(value, "index") and hasattr(value, "to_dict"):
+        # pandas.Series
+        return to_json_safe(value.astype(object).where(value.notna(), None).to_dict())
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "tolist"):
+        # NumPy 数组和标量，datetime64 转为 datetime
+        return to_json_safe(value.tolist())
+    return str(value)
+
+
+def annotation_schema(annotation: Any) -> Dict[str, Any]:
+    """
+    把参数的类型注解转换为 JSON Schema
+
+    Args:
+        annotation: 类型注解，如 str、Optional[int]、List[Union[int, str]]
+
+    Returns:
+        Dict[str, Any]: JSON Schema，无法表示的类型（含 Any 和未注解）返回 {}
+    """
+    if annotation in _SIMPLE_TYPES:
+        return {"type": _SIMPLE_TYPES[annotation]}
+    if annotation is type(None):
+        return {"type": "null"}
+
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+    if origin is typing.Union:
+        schemas = [annotation_schema(arg) for arg in args]
+        if any(not schema for schema in schemas):
+            return {}
+        # 只有简单类型时合并为 type 列表，如 Optional[str] -> ["string", "null"]
+        if all(list(schema) == ["type"] and isinstance(schema["type"], str) for schema in schemas):
+            return {"type": [schema["type"] for schema in schemas]}
+        return {"anyOf": schemas}
+    if origin in (list, tuple, set, frozenset):
+        schema: Dict[str, Any] = {"type": "array"}
+        if args and args[-1] is not Ellipsis:
+            items = annotation_schema(args[0])
+            if items:
+                schema["items"] = items
+        return schema
+    if origin is dict:
+        return {"type": "object"}
+    return {}
+
+
+def _method_schema(method_name: str, method: Callable, doc: str) -> Dict[str, Any]:
+    docstring = parse(doc)
+    param_docs = {param.arg_name: param.description for param in docstring.params}
+
+    properties: Dict[str, Any] = {}
+    required: List[str] = []
+    for name, param in inspect.signature(method).parameters.items():
+        if param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+            continue
+        schema = annotation_schema(param.annotation)
+        if param_docs.get(name):
+            schema["description"] = param_docs[name]
+        if param.default is param.empty:
+            required.append(name)
+        elif isinstance(param.default, _JSON_DEFAULT_TYPES):
+            schema["default"] = param.default
+        properties[name] = schema
+
+    description = "\n\n".join(part for part in (docstring.short_description, docstring.long_description) if part)
+    return {
+        "method": method_name,
+        "description": description,
+        "parameters": {"type": "object", "properties": properties, "required": required, "additionalProperties": False},
+        "stream": inspect.isasyncgenfunction(inspect.unwrap(method)),
+    }
+
+
+def get_tool_schemas(source_name: str, api: BaseAPI) -> List[Dict[str, Any]]:
+    """
+    获取数据源所有公开方法的工具描述，结果按数据源类缓存
+
+    Args:
+        source_name: 数据源名，作为工具名前缀
+        api: 数据源实例
+
+    Returns:
+        List[Dict[str, Any]]: 工具描述列表，每项包含 name / method / description / parameters(JSON Schema) / stream
+    """
+    # get_capabilities 本身也走 desc_cache，不能在 compute 中调用（缓存生成时持有锁）
+    capabilities = api.get_capabilities()
+
+    def compute() -> List[Dict[str, Any]]:
+        return [
+            _method_schema(capability["name"], getattr(api, capability["name"]), capability["doc"])
+            for capability in capabilities
+        ]
+
+    schemas = get_desc_cache().get_or_compute("tool_schemas", api.__class__, compute)
+    return [{"name": f"{source_name}_{schema['method']}", **copy.deepcopy(schema)} for schema in schemas]
+
+
+def _type_check(type_name: str) -> Callable[[Any], bool]:
+    if type_name == "string":
+        return lambda value: isinstance(value, str)
+    if type_name == "integer":
+        return lambda value: isinstance(value, int) and not isinstance(value, bool)
+    if type_name == "number":
+        return lambda value: isinstance(value, (int, float)) and not isinstance(value, bool)
+    if type_name == "boolean":
+        return lambda value: isinstance(value, bool)
+    if type_name == "null":
+        return lambda value: value is None
+    if type_name == "array":
+        return lambda value: isinstance(value, list)
+    if type_name == "object":
+        return lambda value: isinstance(value, dict)
+    return lambda value: True
+
+
+def _compile_check(schema: Dict[str, Any]) -> Callable[[Any], bool]:
+    if "anyOf" in schema:
+        options = [_compile_check(option) for option in schema["anyOf"]]
+        return lambda value: any(check(value) for check in options)
+
+    type_name = schema.get("type")
+    if type_name is None:
+        return lambda value: True
+    if isinstance(type_name, list):
+        checks = [_type_check(name) for name in type_name]
+        return lambda value: any(check(value) for check in checks)
+
+    is_type = _type_check(type_name)
+    if type_name == "array" and schema.get("items"):
+        check_item = _compile_check(schema["items"])
+        return lambda value: is_type(value) and all(check_item(item) for item in value)
+    return is_type
+
+
+def _describe_type(schema: Dict[str, Any]) -> str:
+    if "anyOf" in schema:
+        return " | ".join(_describe_type(option) for option in schema["anyOf"])
+    type_name = schema.get("type", "any")
+    if isinstance(type_name, list):
+        return " | ".join(type_name)
+    if type_name == "array" and schema.get("items"):
+        return f"array<{_describe_type(schema['items'])}>"
+    return type_name
+
+
+def compile_validator(parameters: Dict[str, Any]) -> Validator:
+    """
+    把工具参数的 JSON Schema 编译为校验函数，每个参数的类型检查在这里只生成一次
+
+    Args:
+        parameters: type 为 object 的 JSON Schema（见 get_tool_schemas）
+
+    Returns:
+        Validator: 接收参数字典，校验通过时原样返回，否则抛出 ToolArgumentError
+    """
+    properties = parameters.get("properties", {})
+    required = tuple(parameters.get("required", ()))
+    allow_extra = parameters.get("additionalProperties", True)
+    checks = {name: (_compile_check(schema), _describe_type(schema)) for name, schema in properties.items()}
+
+    def validate(arguments: Dict[str, Any]) -> Dict[str, Any]:
+        if not isinstance(arguments, dict):
+            raise ToolArgumentError(f"parameters must be an object, got {type(arguments).__name__}")
+        errors = [f"missing required parameter '{name}'" for name in required if name not in arguments]
+        for name, value in arguments.items():
+            entry = checks.get(name)
+            if entry is None:
+                if not allow_extra:
+                    errors.append(f"unknown parameter '{name}'")
+            elif not entry[0](value):
+                errors.append(f"parameter '{name}' expects {entry[1]}, got {type(value).__name__}")
+        if errors:
+            raise ToolArgumentError("; ".join(errors))
+        return arguments
+
+    return validate
+
+
+class DataSourceTool:
+    """
+    调度表中的一个工具：预先编译的参数校验器和绑定好的数据源方法
+
+    Args:
+        schema: 工具描述（见 get_tool_schemas）
+        method: 数据源实例上的绑定方法
+    """
+
+    __slots__ = ("name", "schema", "stream", "_method", "_validate")
+
+    def __init__(self, schema: Dict[str, Any], method: Callable):
+        self.name = schema["name"]
+        self.schema = {key: schema[key] for key in ("name", "description", "parameters")}
+        self.stream = schema["stream"]
+        self._method = method
+        self._validate = compile_validator(schema["parameters"])
+
+    async def __call__(self, parameters: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        校验参数并调用数据源方法
+
+        Args:
+            parameters: 工具参数
+
+        Returns:
+            Any: 数据源方法的返回值（转换为可 JSON 序列化的值，见 to_json_safe）；
+                异步生成器方法返回产出项组成的列表
+
+        Raises:
+            ToolArgumentError: 参数不符合 JSON Schema
+        """
+        arguments = self._validate({} if parameters is None else parameters)
+        if self.stream:
+            return to_json_safe([item async for item in self._method(**arguments)])
+        return to_json_safe(await self._method(**arguments))
+
+
+def build_tool_table(client: Any, sources: Optional[List[str]] = None) -> Dict[str, DataSourceTool]:
+    """
+    为 ApiClient 中的数据源构建工具调度表，会加载所有数据源
+
+    Args:
+        client: ApiClient 实例
+        sources: 只导出这些数据源，默认全部
+
+    Returns:
+        Dict[str, DataSourceTool]: 工具名 -> 工具
+    """
+    tools: Dict[str, DataSourceTool] = {}
+    for source_name in sources if sources is not None else client.get_data_source_names():
+        try:
+            api = getattr(client, source_name)
+        except AttributeError as e:
+            logger.warning(f"数据源 {source_name} 不可用，跳过: {e}")
+            continue
+        for schema in get_tool_schemas(source_name, api):
+            tools[schema["name"]] = DataSourceTool(schema, getattr(api, schema["method"]))
+    return tools
@@ -0,0 +1,179 @@
+"""
+数据源共享 HTTP 传输层
+
+所有数据源都访问同一个 external_api_proxy_url，这里为每个事件循环维护一个带连接池的
+keep-alive aiohttp 会话，由 ApiClient 注入到每个 BaseAPI，避免每次请求重新建立连接。
+会话在其事件循环关闭时（asyncio.run 结束时的 shutdown_asyncgens）自动关闭。
+"""
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from weakref import WeakKeyDictionary
+
+import aiohttp
+import yarl
+
+from . import json_codec, metrics
+
+logger = logging.getLogger("data_sources_transport")
+
+DEFAULT_TIMEOUT = 60
+# 连接池上限：全部数据源共用同一个代理主机，单主机上限即并发请求上限
+DEFAULT_POOL_LIMIT = 100
+DEFAULT_POOL_LIMIT_PER_HOST = 32
+DEFAULT_KEEPALIVE_TIMEOUT = 30
+
+
+class HttpTransport:
+    """
+    共享 HTTP 传输层
+
+    每个事件循环持有一个 ClientSession（aiohttp 会话不能跨事件循环使用），
+    连接在请求之间保持复用，超时统一由 timeout 控制。
+    """
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_TIMEOUT,
+        limit: int = DEFAULT_POOL_LIMIT,
+        limit_per_host: int = DEFAULT_POOL_LIMIT_PER_HOST,
+        keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+    ):
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        # 事件循环 -> (会话, 关闭守卫)；守卫是挂起的异步生成器，事件循环关闭时被 aclose，随之关闭会话
+        self._sessions: "WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[aiohttp.ClientSession, AsyncIterator[None]]]" = (
+            WeakKeyDictionary()
+        )
+
+    @staticmethod
+    async def _close_on_shutdown(session: aiohttp.ClientSession) -> AsyncIterator[None]:
+        try:
+            yield
+        finally:
+            if not session.closed:
+                await session.close()
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        entry = self._sessions.get(loop)
+        if entry is not None and not entry[0].closed:
+            return entry[0]
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        session = aiohttp.ClientSession(connector=connector, timeout=self.timeout, trust_env=True)
+        guard = self._close_on_shutdown(session)
+        # 启动守卫后事件循环会跟踪它，asyncio.run 在取消全部任务后 aclose 所有未结束的异步生成器
+        await guard.__anext__()
+        self._sessions[loop] = (session, guard)
+        return session
+
+    async def request_bytes(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        json: Any = None,
+        data: Any = None,
+        timeout: Optional[float] = None,
+    ) -> bytes:
+        """
+        发送请求并返回原始响应体，参数同 request_json
+
+        Raises:
+            aiohttp.ClientError: 请求失败或响应状态码错误
+            asyncio.TimeoutError: 请求超时
+        """
+        session = await self._get_session()
+        request_timeout = self.timeout if timeout is None else aiohttp.ClientTimeout(total=timeout)
+        async with session.request(
+            method, url, headers=headers, params=params, json=json, data=data, timeout=request_timeout
+        ) as response:
+            body = await response.read()
+            self._on_response(method, response.url, headers, json, data, response.status, body)
+            response.raise_for_status()
+        metrics.add_response_bytes(len(body))
+        return body
+
+    def _on_response(
+        self,
+        method: str,
+        url: yarl.URL,
+        headers: Optional[Dict[str, str]],
+        json: Any,
+        data: Any,
+        status: int,
+        body: bytes,
+    ):
+        """收到响应后的钩子（包括错误状态码），默认不做任何事，replay.RecordingTransport 用它保存响应"""
+
+    async def request_json(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        json: Any = None,
+        data: Any = None,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """
+        发送请求并解析 JSON 响应
+
+        Args:
+            method: HTTP 方法
+            url: 请求地址
+            headers: 请求头
+            params: 查询参数
+            json: JSON 请求体
+            data: 原始请求体
+            timeout: 本次请求的超时（秒），默认使用传输层的统一超时
+
+        Returns:
+            Any: 解析后的 JSON 响应（使用 json_codec 选择的解码后端），空响应体返回 None
+
+        Raises:
+            aiohttp.ClientError: 请求失败或响应状态码错误
+            asyncio.TimeoutError: 请求超时
+        """
+        body = await self.request_bytes(method, url, headers=headers, params=params, json=json, data=data, timeout=timeout)
+        # 与 aiohttp 的 response.json() 一致：空响应体返回 None
+        if not body.strip():
+            return None
+        return json_codec.loads(body)
+
+    async def close(self):
+        """关闭当前事件循环上的会话（不手动关闭时会在事件循环关闭时自动关闭）"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        entry = self._sessions.pop(loop, None)
+        if entry is not None:
+            # aclose 守卫会执行其 finally，关闭会话
+            await entry[1].aclose()
+
+
+_default_transport: Optional[HttpTransport] = None
+
+
+def get_default_transport() -> HttpTransport:
+    """
+    获取默认的共享传输层，未经 ApiClient 注入的数据源使用它
+
+    Returns:
+        HttpTransport: 默认传输层实例
+    """
+    global _default_transport
+    if _default_transport is None:
+        _default_transport = HttpTransport()
+    return _default_transport
@@ -2,17 +2,26 @@
 TripAdvisor Officical API data source implementation
 """
 
+import asyncio
 import logging
-from datetime import datetime
-from typing import Any, Dict, List, Optional
-
-import httpx
+from typing import Any, Dict, List, Optional, Union
 
+from . import timeparse
 from .base import BaseAPI
+from .concurrency import DEFAULT_MAX_CONCURRENCY, gather_bounded
+from .geo_index import get_geo_index
+from .response_cache import cached
 
 logger = logging.getLogger("tripadvisor_official_source")
 
 
+# 本地地理索引中附近查询覆盖的有效期
+DEFAULT_GEO_MAX_AGE = 7 * 24 * 3600
+RADIUS_UNITS_KM = {"km": 1.0, "mi": 1.609344, "m": 0.001}
+# 不放入地点摘要记录的字段：distance/bearing 相对查询点，坐标单独索引；附近查询返回的这些字段随覆盖原样保存
+NON_RECORD_FIELDS = ("distance", "bearing", "latitude", "longitude", "category")
+
+
 class TripAdvisorSource(BaseAPI):
     """TripAdvisor official API data source"""
 
@@ -27,6 +36,10 @@ class TripAdvisorSource(BaseAPI):
             "X-Biz-Id":"matrix-agent",
             "X-Request-Timeout": str(config["timeout"]-5),
         }
+        self._max_concurrency = config.get("tripadvisor_max_concurrency", DEFAULT_MAX_CONCURRENCY)
+        # 本地地理索引默认关闭，设置 tripadvisor_geo_index 后启用
+        self._geo_index_enabled = config.get("tripadvisor_geo_index", False)
+        self._geo_max_age = config.get("tripadvisor_geo_max_age", DEFAULT_GEO_MAX_AGE)
 
 
     async def _make_api_request(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -36,10 +49,7 @@ class TripAdvisorSource(BaseAPI):
         if params is None:
             params = {}
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            return response.json()
+        return await self._request_json("GET", url, headers=self.headers, params=params)
 
     @property
     def source_name(self) -> str:
@@ -113,6 +123,7 @@ class TripAdvisorSource(BaseAPI):
                 return {"success": False, "error": "No data returned from Tripadvisor API"}
             if not data.get("data", None):
                 return {"success": False, "error": "No data returned from Tripadvisor API"}
+            self._index_locations(data["data"], language)
             return {"success": True, "data": data.get("data", [])}
         except Exception as e:
             logger.error(f"Error searching locations: {e}")
@@ -124,15 +135,21 @@ class TripAdvisorSource(BaseAPI):
         longitude: float,
         language: str = "en",
         category: Optional[str] = None,
+        radius: Optional[float] = None,
+        radiusUnit: str = "km",
     ) -> Dict[str, Any]:
         """
         Search for locations near a specific latitude/longitude.
+        When the local location index is enabled (config tripadvisor_geo_index), areas already searched recently
+        are answered from it without calling the API.
 
         Args:
             latitude(float): Latitude coordinate
             longitude(float): Longitude coordinate
             language(str): Language code (default: 'en')
             category(str): Optional category filter ('hotels', 'attractions', 'restaurants')
+            radius(Optional[float]): Optional search radius, default is the API default range
+            radiusUnit(str): Unit of radius: 'km', 'mi' or 'm' (default: 'km')
 
         Returns:
             Dict[str, Any]: Dictionary containing the search results
@@ -162,8 +179,31 @@ class TripAdvisorSource(BaseAPI):
 
         if category:
             params["category"] = category
+        radius_km = None
+        if radius:
+            if radiusUnit not in RADIUS_UNITS_KM:
+                return {"success": False, "error": f"Invalid radiusUnit: {radiusUnit}, options: {', '.join(RADIUS_UNITS_KM)}"}
+            params["radius"] = radius
+            params["radiusUnit"] = radiusUnit
+            radius_km = radius * RADIUS_UNITS_KM[radiusUnit]
 
         try:
+            # 语言、类别和是否指定半径决定结果集合，作为覆盖的范围标识
+            scope = f"{language}|{category or ''}|{'radius' if radius_km else 'default'}"
+            if self._geo_index_enabled:
+                locations = get_geo_index().nearby(
+                    self.source_name,
+                    float(latitude),
+                    float(longitude),
+                    scope,
+                    language=language,
+                    radius_km=radius_km,
+                    max_age=self._geo_max_age,
+                )
+                if locations:
+                    logger.debug(f"Answered nearby search at {latitude},{longitude} from the local location index")
+                    return {"success": True, "data": locations}
+
             data = await self._make_api_request("location/nearby_search", params)
             if not data:
                 return {"success": False, "error": "No data returned from Tripadvisor API"}
@@ -171,12 +211,26 @@ class TripAdvisorSource(BaseAPI):
             if not data.get("data", None):
                 return {"success": False, "error": "No data returned from Tripadvisor API"}
 
+            if self._geo_index_enabled:
+                self._index_locations(data["data"], language)
+                items = [item for item in data["data"] if isinstance(item, dict) and item.get("location_id")]
+                get_geo_index().add_coverage(
+                    self.source_name,
+                    float(latitude),
+                    float(longitude),
+                    scope,
+                    [item["location_id"] for item in items],
+                    radius_km,
+                    extras={item["location_id"]: {key: item[key] for key in NON_RECORD_FIELDS if key in item} for item in items},
+                )
+
             return {"success": True, "data": data.get("data", [])}
 
         except Exception as e:
             logger.error(f"Error searching nearby locations: {e}")
             return {"success": False, "error": str(e)}
 
+    @cached(ttl=24 * 3600, stale_ttl=7 * 24 * 3600)
     async def get_location_details(
         self,
         locationId: int,
@@ -281,7 +335,12 @@ class TripAdvisorSource(BaseAPI):
             if not data:
                 return {"success": False, "error": "No data returned from Tripadvisor API"}
 
-            return {"success": True, "data": self._parse_location_details(data)}
+            location_details = self._parse_location_details(data)
+            self._index_locations(
+                [{key: location_details[key] for key in ("location_id", "name", "address_obj", "latitude", "longitude")}],
+                language,
+            )
+            return {"success": True, "data": location_details}
         except Exception as e:
             logger.error(f"Error getting location details: {e}")
             return {"success": False, "error": str(e)}
@@ -359,6 +418,7 @@ class TripAdvisorSource(BaseAPI):
             logger.error(f"Error getting location reviews: {e}")
             return {"success": False, "error": str(e)}
 
+    @cached(ttl=6 * 3600, stale_ttl=24 * 3600)
     async def get_location_photos(
         self,
         locationId: int,
@@ -412,6 +472,135 @@ class TripAdvisorSource(BaseAPI):
             logger.error(f"Error getting location photos: {e}")
             return {"success": False, "error": str(e)}
 
+    async def get_location_profile(
+        self,
+        locationId: Union[int, str],
+        language: str = "en",
+    ) -> Dict[str, Any]:
+        """
+        Get the full profile of a location: details, recent reviews and photos in one call.
+        The three endpoints are requested concurrently; details and photos are reused when recently fetched.
+
+        Args:
+            locationId(Union[int, str]): Tripadvisor location ID
+            language(str): Language code (default: 'en')
+
+        Returns:
+            Dict[str, Any]: Dictionary containing the location profile, e.g.
+            {
+                "success": True,               # Whether successful (False only if all three endpoints failed)
+                "data": {                      # If successful, contains the following fields
+                    "location_id": "13189438", # Location ID
+                    "details": {...},          # Same format as get_location_details()["data"], None if it failed
+                    "reviews": [...],          # Same format as get_location_reviews()["data"], [] if it failed
+                    "photos": [...],           # Same format as get_location_photos()["data"], [] if it failed
+                    "errors": {                # Endpoints that failed, empty if all succeeded
+                        "reviews": "..."
+                    }
+                }
+            }
+        """
+        location_id_str = str(locationId)
+        details, reviews, photos = await asyncio.gather(
+            self.get_location_details(locationId=location_id_str, language=language),
+            self.get_location_reviews(locationId=location_id_str, language=language),
+            self.get_location_photos(locationId=location_id_str, language=language),
+        )
+        results = {"details": details, "reviews": reviews, "photos": photos}
+        errors = {endpoint: result["error"] for endpoint, result in results.items() if not result["success"]}
+        if len(errors) == len(results):
+            error_msg = f"All profile endpoints failed for location {location_id_str}:\n" + "\n".join(
+                f"{endpoint}: {error}" for endpoint, error in errors.items()
+            )
+            return {"success": False, "error": error_msg}
+
+        return {
+            "success": True,
+            "data": {
+                "location_id": location_id_str,
+                "details": details["data"] if details["success"] else None,
+                "reviews": reviews["data"] if reviews["success"] else [],
+                "photos": photos["data"] if photos["success"] else [],
+                "errors": errors,
+            },
+        }
+
+    async def get_location_profiles(
+        self,
+        locationIds: List[Union[int, str]],
+        language: str = "en",
+        max_concurrency: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Get the full profiles (details, reviews and photos) of multiple locations at once, e.g. to compare search_locations results.
+        Locations are fetched concurrently, each with its three endpoints in parallel.
+
+        Args:
+            locationIds(List[Union[int, str]]): Tripadvisor location ID list, duplicates are fetched once
+            language(str): Language code (default: 'en')
+            max_concurrency(Optional[int]): Maximum number of locations fetched at the same time, default is 8
+
+        Returns:
+            Dict[str, Any]: Dictionary containing location profiles, e.g.
+            {
+                "success": True,                   # Whether successful (False only if every location failed)
+                "data": {                          # If successful, contains the following fields
+                    "count": 2,                    # Number of locations with a profile
+                    "profiles": [...],             # Profiles in input order, same format as get_location_profile()["data"]
+                    "failed_locations": [          # Locations that failed
+                        {"location_id": "13189439", "error": "..."}
+                    ]
+                }
+            }
+        """
+        try:
+            unique_ids = list(dict.fromkeys(str(location_id) for location_id in locationIds))
+            if not unique_ids:
+                return {"success": True, "data": {"count": 0, "profiles": [], "failed_locations": []}}
+
+            async def fetch(location_id: str) -> Dict[str, Any]:
+                return await self.get_location_profile(locationId=location_id, language=language)
+
+            results = await gather_bounded(unique_ids, fetch, max_concurrency or self._max_concurrency)
+
+            profiles = []
+            failed_locations = []
+            for location_id, result in zip(unique_ids, results):
+                if result["success"]:
+                    profiles.append(result["data"])
+                else:
+                    failed_locations.append({"location_id": location_id, "error": result["error"]})
+
+            if not profiles:
+                error_msg = "All location profile retrieval failed:\n" + "\n".join(
+                    f"{item['location_id']}: {item['error']}" for item in failed_locations
+                )
+                return {"success": False, "error": error_msg}
+
+            return {"success": True, "data": {"count": len(profiles), "profiles": profiles, "failed_locations": failed_locations}}
+        except Exception as e:
+            logger.error(f"Error getting location profiles: {e}")
+            return {"success": False, "error": str(e)}
+
+    def _index_locations(self, items: List[Dict[str, Any]], language: str):
+        """Record locations in the local location index (per language); fields in NON_RECORD_FIELDS are not part of the record"""
+        if not self._geo_index_enabled:
+            return
+        locations = []
+        for item in items:
+            if not isinstance(item, dict) or not item.get("location_id"):
+                continue
+            record = {key: value for key, value in item.items() if key not in NON_RECORD_FIELDS}
+            locations.append(
+                {
+                    "location_id": item["location_id"],
+                    "record": record,
+                    "latitude": item.get("latitude"),
+                    "longitude": item.get("longitude"),
+                }
+            )
+        get_geo_index().add_locations(self.source_name, locations, language)
+
     def _parse_reviews(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Parse location review data"""
         reviews = []
@@ -494,18 +683,21 @@ class TripAdvisorSource(BaseAPI):
                 }
             )
 
+        address = data.get("address_obj") or {}
+        ranking_data = data.get("ranking_data") or {}
+        category = data.get("category") or {}
         location_details = {  # 如果成功，包含以下字段
             "location_id": data.get("location_id", ""),  # 地点ID
             "name": data.get("name", ""),  # 地点名称
             "description": data.get("description", ""),  # 地点描述
             "web_url": data.get("web_url", ""),  # 地点官网链接
             "address_obj": {
-                "street1": data.get("address_obj", {}).get("street1", ""),  # 街道位置
-                "city": data.get("address_obj", {}).get("city", ""),  # 城市
-                "state": data.get("address_obj", {}).get("state", ""),  # 州/省
-                "country": data.get("address_obj", {}).get("country", ""),  # 国家
-                "postalcode": data.get("address_obj", {}).get("postalcode", ""),  # 邮政编码
-                "address_string": data.get("address_obj", {}).get("address_string", ""),  # 完整地址
+                "street1": address.get("street1", ""),  # 街道位置
+                "city": address.get("city", ""),  # 城市
+                "state": address.get("state", ""),  # 州/省
+                "country": address.get("country", ""),  # 国家
+                "postalcode": address.get("postalcode", ""),  # 邮政编码
+                "address_string": address.get("address_string", ""),  # 完整地址
             },
             "ancestors": ancestors,
             "latitude": data.get("latitude", ""),  # 纬度
@@ -513,11 +705,11 @@ class TripAdvisorSource(BaseAPI):
             "timezone": data.get("timezone", ""),  # 时区
             "phone": data.get("phone", ""),  # 电话
             "ranking_data": {
-                "geo_location_id": data.get("ranking_data", {}).get("geo_location_id", ""),  # 排名地区 id
-                "ranking_string": data.get("ranking_data", {}).get("ranking_string", ""),  # 排名信息
-                "geo_location_name": data.get("ranking_data", {}).get("geo_location_name", ""),  # 排名地区名称
-                "ranking_out_of": data.get("ranking_data", {}).get("ranking_out_of", ""),  # 排名总数
-                "ranking": data.get("ranking_data", {}).get("ranking", ""),  # 排名位置
+                "geo_location_id": ranking_data.get("geo_location_id", ""),  # 排名地区 id
+                "ranking_string": ranking_data.get("ranking_string", ""),  # 排名信息
+                "geo_location_name": ranking_data.get("geo_location_name", ""),  # 排名地区名称
+                "ranking_out_of": ranking_data.get("ranking_out_of", ""),  # 排名总数
+                "ranking": ranking_data.get("ranking", ""),  # 排名位置
             },
             "rating": data.get("rating", ""),  # 评分
             "num_reviews": data.get("num_reviews", ""),  # 评论数
@@ -528,8 +720,8 @@ class TripAdvisorSource(BaseAPI):
             "price_level": data.get("price_level", ""),  # 价格等级
             "amenities": data.get("amenities", []),  # 设施列表
             "category": {
-                "name": data.get("category", {}).get("name", ""),  # 类别名称
-                "localized_name": data.get("category", {}).get("localized_name", ""),  # 类别本地化名称
+                "name": category.get("name", ""),  # 类别名称
+                "localized_name": category.get("localized_name", ""),  # 类别本地化名称
             },
             "subcategory": subcategory,
             "styles": data.get("styles", []),  # 风格
@@ -561,18 +753,12 @@ class TripAdvisorSource(BaseAPI):
     def _parse_date(self, date_str: str) -> str:
         """解析日期字符串"""
         # 新 API 日期格式：2025-04-24T22:29:34Z
-        try:
-            return datetime.strptime(date_str, "%Y-%m-%dT%H:%M:%SZ").strftime("%Y-%m-%d %H:%M:%S")
-        except ValueError:
-            return date_str
+        return timeparse.normalize(date_str, timeparse.ISO_Z) or date_str
 
     def _parse_date2(self, date_str: str) -> str:
         """解析日期字符串"""
         # 新 API 日期格式：2021-02-26T00:50:50.206Z
-        try:
-            return datetime.strptime(date_str, "%Y-%m-%dT%H:%M:%S.%fZ").strftime("%Y-%m-%d %H:%M:%S")
-        except ValueError:
-            return date_str
+        return timeparse.normalize(date_str, timeparse.ISO_MS_Z) or date_str
 
 
 async def main():
@@ -591,6 +777,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    import asyncio
-
     asyncio.run(main())
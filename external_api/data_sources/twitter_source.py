@@ -5,12 +5,13 @@ Twitter data source implementation
 import asyncio
 import json
 import logging
-from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, Optional
 
 import aiohttp
 
+from . import timeparse
 from .base import BaseAPI
+from .pagination import DEFAULT_PREFETCH, iter_pages
 
 logger = logging.getLogger("twitter_source")
 
@@ -147,12 +148,8 @@ class TwitterSource(BaseAPI):
 
             request_url = f"{self.proxy_url}/search/search"
 
-            # 使用aiohttp发送异步请求
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                    response.raise_for_status()
-                    # 解析响应
-                    data = await response.json(content_type=None)
+            # 发送异步请求
+            data = await self._request_json("GET", request_url, headers=self.headers, params=params)
 
             # API返回的是JSON字符串，需要先解析
             if isinstance(data, str):
@@ -170,19 +167,22 @@ class TwitterSource(BaseAPI):
                     logger.warning(f"Skipping invalid tweet data: {result}")
                     continue
 
+                user = result.get("user") or {}
+                media_urls = result.get("media_urls")
+                video_urls = result.get("video_urls")
                 tweet = {
                     "id": str(result.get("tweet_id")),
                     "created_at": self._format_date(result.get("creation_date")),
                     "text": result.get("text", ""),
-                    "media_urls": result.get("media_urls", []) if isinstance(result.get("media_urls"), list) else [],
-                    "video_urls": result.get("video_urls", []) if isinstance(result.get("video_urls"), list) else [],
+                    "media_urls": media_urls if isinstance(media_urls, list) else [],
+                    "video_urls": video_urls if isinstance(video_urls, list) else [],
                     "author": {
-                        "id": str(result.get("user", {}).get("user_id")),
-                        "name": result.get("user", {}).get("name"),
-                        "username": result.get("user", {}).get("username"),
-                        "followers_count": result.get("user", {}).get("follower_count", 0),
-                        "is_verified": result.get("user", {}).get("is_verified", False),
-                        "is_blue_verified": result.get("user", {}).get("is_blue_verified", False),
+                        "id": str(user.get("user_id")),
+                        "name": user.get("name"),
+                        "username": user.get("username"),
+                        "followers_count": user.get("follower_count", 0),
+                        "is_verified": user.get("is_verified", False),
+                        "is_blue_verified": user.get("is_blue_verified", False),
                     },
                     "public_metrics": {
                         "retweet_count": result.get("retweet_count", 0),
@@ -272,12 +272,8 @@ class TwitterSource(BaseAPI):
             if user_id:
                 params["user_id"] = user_id
 
-            # 使用aiohttp发送异步请求
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                    response.raise_for_status()
-                    # 解析响应
-                    data = await response.json(content_type=None)
+            # 发送异步请求
+            data = await self._request_json("GET", request_url, headers=self.headers, params=params)
 
             # 解析响应数据
             if isinstance(data, str):
@@ -304,7 +300,13 @@ class TwitterSource(BaseAPI):
             return {"success": False, "error": error_msg}
 
     async def get_user_tweets(
-        self, username: str, limit: int = 10, user_id: Optional[str] = None, include_replies: bool = False, include_pinned: bool = False
+        self,
+        username: str,
+        limit: int = 10,
+        user_id: Optional[str] = None,
+        include_replies: bool = False,
+        include_pinned: bool = False,
+        cursor: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Get a list of tweets from a Twitter user.
@@ -315,6 +317,7 @@ class TwitterSource(BaseAPI):
             user_id (Optional[str]): Twitter user ID, default is None, if provided user_id, username will be ignored
             include_replies (bool): Whether to include reply tweets, default is False
             include_pinned (bool): Whether to include pinned tweets, default is False
+            cursor (Optional[str]): Pagination cursor, used to get next page results, default is None for first page
 
         Returns:
             Dict[str, Any]: Dictionary containing user tweet list, e.g.
@@ -382,13 +385,11 @@ class TwitterSource(BaseAPI):
 
             if user_id:
                 params["user_id"] = user_id
+            if cursor:
+                params["continuation_token"] = cursor
 
-            # 使用aiohttp发送异步请求
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                    response.raise_for_status()
-                    # 解析响应
-                    data = await response.json(content_type=None)
+            # 发送异步请求
+            data = await self._request_json("GET", request_url, headers=self.headers, params=params)
 
             # 解析响应数据
             if isinstance(data, str):
@@ -425,16 +426,109 @@ class TwitterSource(BaseAPI):
             logger.exception(e)
             return {"success": False, "error": error_msg}
 
+    async def iter_search_tweets(
+        self,
+        query: str,
+        max_items: int = 100,
+        page_size: int = 100,
+        lang: Optional[str] = None,
+        min_retweets: Optional[int] = None,
+        min_likes: Optional[int] = None,
+        min_replies: Optional[int] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        prefetch: int = DEFAULT_PREFETCH,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate over tweet search results across pages, following the cursor automatically.
+        The next page is fetched while the current one is consumed, duplicate tweets are skipped.
+        Use with `async for`, e.g. `async for tweet in client.twitter.iter_search_tweets("Tesla", max_items=500):`
+
+        Args:
+            query (str): Search keyword, e.g. "Tesla" or "#TSLA"
+            max_items (int): Maximum number of tweets to yield, default is 100
+            page_size (int): Number of tweets requested per page (max 100), default is 100
+            lang (Optional[str]): Language code, zh for Chinese, en for English, default is None
+            min_retweets (Optional[int]): Minimum number of retweets, default is None
+            min_likes (Optional[int]): Minimum number of likes, default is None
+            min_replies (Optional[int]): Minimum number of replies, default is None
+            start_date (Optional[str]): Start date, format: YYYY-MM-DD, default is None
+            end_date (Optional[str]): End date, format: YYYY-MM-DD, default is None
+            prefetch (int): Maximum number of pages fetched ahead of consumption, default is 2
+
+        Yields:
+            Dict[str, Any]: One tweet, same format as the items of search_tweets()["data"]["tweets"]
+
+        Raises:
+            PaginationError: A page still failed after retries
+        """
+
+        async def fetch_page(cursor: Optional[str], count: int) -> Dict[str, Any]:
+            return await self.search_tweets(
+                query,
+                limit=count,
+                lang=lang,
+                min_retweets=min_retweets,
+                min_likes=min_likes,
+                min_replies=min_replies,
+                start_date=start_date,
+                end_date=end_date,
+                cursor=cursor,
+            )
+
+        async for tweet in iter_pages(fetch_page, "tweets", min(page_size, 100), max_items=max_items, prefetch=prefetch):
+            yield tweet
+
+    async def iter_user_tweets(
+        self,
+        username: str,
+        max_items: int = 100,
+        page_size: int = 100,
+        user_id: Optional[str] = None,
+        include_replies: bool = False,
+        include_pinned: bool = False,
+        prefetch: int = DEFAULT_PREFETCH,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate over a Twitter user's tweets across pages, following the cursor automatically.
+        The next page is fetched while the current one is consumed, duplicate tweets are skipped.
+        Use with `async for`, e.g. `async for tweet in client.twitter.iter_user_tweets("elonmusk", max_items=1000):`
+
+        Args:
+            username (str): Twitter username without @ symbol
+            max_items (int): Maximum number of tweets to yield, default is 100
+            page_size (int): Number of tweets requested per page (max 100), default is 100
+            user_id (Optional[str]): Twitter user ID, default is None, if provided user_id, username will be ignored
+            include_replies (bool): Whether to include reply tweets, default is False
+            include_pinned (bool): Whether to include pinned tweets, default is False
+            prefetch (int): Maximum number of pages fetched ahead of consumption, default is 2
+
+        Yields:
+            Dict[str, Any]: One tweet, same format as the items of get_user_tweets()["data"]["tweets"]
+
+        Raises:
+            PaginationError: A page still failed after retries
+        """
+
+        async def fetch_page(cursor: Optional[str], count: int) -> Dict[str, Any]:
+            return await self.get_user_tweets(
+                username,
+                limit=count,
+                user_id=user_id,
+                include_replies=include_replies,
+                include_pinned=include_pinned,
+                cursor=cursor,
+            )
+
+        async for tweet in iter_pages(fetch_page, "tweets", min(page_size, 100), max_items=max_items, prefetch=prefetch):
+            yield tweet
+
     def _format_date(self, date_str: Optional[str]) -> Optional[str]:
         """Format date string"""
         if not date_str:
             return None
-        try:
-            # 新API的日期格式示例: "Thu Mar 13 18:08:35 +0000 2025"
-            dt = datetime.strptime(date_str, "%a %b %d %H:%M:%S %z %Y")
-            return dt.strftime("%Y-%m-%d %H:%M:%S")
-        except Exception:
-            return date_str
+        # 新API的日期格式示例: "Thu Mar 13 18:08:35 +0000 2025"
+        return timeparse.normalize(date_str, timeparse.TWITTER) or date_str
 
     def _parse_user_info(self, data: dict[str, Any]) -> dict[str, Any]:
         return {
@@ -462,19 +556,21 @@ class TwitterSource(BaseAPI):
 
     def _parse_tweet_without_ref(self, result: dict[str, Any]) -> dict[str, Any]:
         media_urls = []
-        if result.get("media_url"):
-            if isinstance(result["media_url"], list):
-                media_urls.extend(result["media_url"])
+        media_url = result.get("media_url")
+        if media_url:
+            if isinstance(media_url, list):
+                media_urls.extend(media_url)
             else:
-                media_urls.append(result["media_url"])
+                media_urls.append(media_url)
 
         # 处理视频URL
         video_urls = []
-        if result.get("video_url"):
-            if isinstance(result["video_url"], list):
-                video_urls.extend(result["video_url"])
-            elif result["video_url"]:
-                video_urls.append(result["video_url"])
+        video_url = result.get("video_url")
+        if video_url:
+            if isinstance(video_url, list):
+                video_urls.extend(video_url)
+            else:
+                video_urls.append(video_url)
 
         tweet = {
             "id": str(result.get("tweet_id")),
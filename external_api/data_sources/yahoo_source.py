@@ -4,15 +4,38 @@ Yahoo Finance data source implementation
 
 import asyncio
 import logging
+import time
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 import aiohttp
 
+from . import timeparse
 from .base import BaseAPI
+from .concurrency import DEFAULT_MAX_CONCURRENCY, gather_bounded, iter_bounded
+from .resilience import ResiliencePolicy
+from .response_cache import cached
+from .timeseries_store import get_timeseries_store
 
 logger = logging.getLogger("yahoo_finance_source")
 
+PRICE_OUTPUT_FORMATS = ("records", "numpy", "pandas")
+PRICE_FIELDS = ("open", "high", "low", "close", "volume")
+# Length of one bar per interval: bars that started more than one interval ago are final and can be kept locally
+INTERVAL_SECONDS = {
+    "1m": 60,
+    "2m": 120,
+    "5m": 300,
+    "15m": 900,
+    "30m": 1800,
+    "60m": 3600,
+    "1d": 86400,
+    "1wk": 7 * 86400,
+    "1mo": 31 * 86400,
+}
+# Locally stored history is refetched after this long, so split adjustments eventually propagate
+DEFAULT_TIMESERIES_MAX_AGE = 7 * 24 * 3600
+
 
 class YahooFinanceSource(BaseAPI):
     """Yahoo Finance API data source implementation"""
@@ -27,6 +50,10 @@ class YahooFinanceSource(BaseAPI):
         self.proxy_url = config["external_api_proxy_url"]
         if proxy_url:
             self.proxy_url = proxy_url
+        self._max_concurrency = config.get("yahoo_max_concurrency", DEFAULT_MAX_CONCURRENCY)
+        # The local time-series store is only used by default when it persists (DATA_SOURCE_TIMESERIES_DIR is set)
+        self._use_timeseries_store = config.get("yahoo_timeseries_store", get_timeseries_store().persistent)
+        self._timeseries_max_age = config.get("timeseries_max_age", DEFAULT_TIMESERIES_MAX_AGE)
         self.headers = {
             "X-Original-Host": config["yahoo_base_url"],
             "X-Biz-Id": "matrix-agent",
@@ -60,6 +87,7 @@ class YahooFinanceSource(BaseAPI):
         end_date: str,
         interval: str = "1d",
         events: str = "",
+        output_format: str = "records",
     ) -> Dict[str, Any]:
         """Get stock price data. Please set start_date, end_date, interval reasonably to avoid getting too much data,
         which could cause request timeout or performance issues.
@@ -70,6 +98,11 @@ class YahooFinanceSource(BaseAPI):
             end_date: End date in YYYY-MM-DD format
             interval: Time interval, options: 1m|2m|5m|15m|30m|60m|1d|1wk|1mo, default: 1d
             events: Event type, options: capitalGain|div|split|earn|history, default: empty
+            output_format: Format of "prices", options: records|numpy|pandas, default: records
+                - records: list of dicts as shown below; missing values are None
+                - numpy: dict of NumPy arrays {"timestamp": datetime64[s] (UTC), "open", "high", "low", "close", "volume": float64 with NaN for missing values}
+                - pandas: DataFrame indexed by UTC "timestamp" with float64 price columns and nullable Int64 "volume"
+                Use numpy/pandas for intraday intervals or long ranges, they are much faster and smaller than records.
 
         Returns:
             Dict[str, Any]: Dictionary containing stock price data, e.g.
@@ -99,74 +132,168 @@ class YahooFinanceSource(BaseAPI):
             }
         """
         try:
-            # Convert date string to timestamp
-            start_timestamp = int(datetime.strptime(start_date, "%Y-%m-%d").timestamp())
-            end_timestamp = int(datetime.strptime(end_date, "%Y-%m-%d").timestamp())
-
-            if start_timestamp > end_timestamp:
-                raise ValueError("start_date cannot be greater than end_date")
-
-            # Build request parameters
-            params = {
-                "symbol": symbol,
-                "period1": start_timestamp,
-                "period2": end_timestamp,
-                "interval": interval,
-                "region": "US",  # Default use US area
-                "includePrePost": "false",
-                "useYfid": "true",
-                "includeAdjustedClose": "true",
-            }
-
-            # If events parameter is provided, add to request
-            if events:
-                params["events"] = events
-
-            request_url = f"{self.proxy_url}/stock/v3/get-chart"
-
-            # Send request using aiohttp
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                    response.raise_for_status()
-                    # Parse the response
-                    data = await response.json()
+            return await self._fetch_stock_price(symbol, start_date, end_date, interval, events, output_format)
+        except Exception as e:
+            return self._stock_price_error(e)
 
-            # Check if there is an error in API response
-            if data.get("chart", {}).get("error"):
-                return {"success": False, "error": str(data["chart"]["error"])}
+    async def _fetch_stock_price(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        interval: str = "1d",
+        events: str = "",
+        output_format: str = "records",
+        policy: Optional[ResiliencePolicy] = None,
+    ) -> Dict[str, Any]:
+        """Fetch and parse one symbol's price series, letting transport errors propagate (policy overrides the retry policy)"""
+        if output_format not in PRICE_OUTPUT_FORMATS:
+            raise ValueError(f"output_format must be one of {', '.join(PRICE_OUTPUT_FORMATS)}")
+
+        # Convert date string to timestamp
+        start_timestamp = int(datetime.strptime(start_date, "%Y-%m-%d").timestamp())
+        end_timestamp = int(datetime.strptime(end_date, "%Y-%m-%d").timestamp())
+
+        if start_timestamp > end_timestamp:
+            raise ValueError("start_date cannot be greater than end_date")
+
+        # Price bars without events are served from the local time-series store, only missing ranges are requested
+        if self._use_timeseries_store and not events and interval in INTERVAL_SECONDS:
+            error, timestamps, quote = await self._fetch_chart_incremental(symbol, start_timestamp, end_timestamp, interval, policy)
+        else:
+            error, timestamps, quote = await self._fetch_chart(symbol, start_timestamp, end_timestamp, interval, events, policy)
+        if error:
+            return {"success": False, "error": error}
+
+        if output_format == "numpy":
+            prices = self._build_price_arrays(timestamps, quote)
+        elif output_format == "pandas":
+            prices = self._build_price_frame(timestamps, quote)
+        else:
+            prices = self._build_price_records(timestamps, quote)
+
+        return {"success": True, "data": {"symbol": symbol, "prices": prices}}
+
+    async def _fetch_chart(
+        self, symbol: str, period1: int, period2: int, interval: str, events: str = "", policy: Optional[ResiliencePolicy] = None
+    ) -> Tuple[Optional[str], List[int], Dict[str, List[Any]]]:
+        """Request one chart range and return (API error, timestamps, quote columns)"""
+        # Build request parameters
+        params = {
+            "symbol": symbol,
+            "period1": period1,
+            "period2": period2,
+            "interval": interval,
+            "region": "US",  # Default use US area
+            "includePrePost": "false",
+            "useYfid": "true",
+            "includeAdjustedClose": "true",
+        }
 
-            # Parse response data
-            chart_data = data["chart"]["result"][0]
-            timestamps = chart_data["timestamp"]
-            quote = chart_data["indicators"]["quote"][0]
-
-            # Build price data list
-            prices = []
-            for i, timestamp in enumerate(timestamps):
-                price_data = {
-                    "date": datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d"),
-                    "open": quote["open"][i],
-                    "high": quote["high"][i],
-                    "low": quote["low"][i],
-                    "close": quote["close"][i],
-                    "volume": int(quote["volume"][i]),
+        # If events parameter is provided, add to request
+        if events:
+            params["events"] = events
+
+        request_url = f"{self.proxy_url}/stock/v3/get-chart"
+
+        # Send request
+        data = await self._request_json("GET", request_url, headers=self.headers, params=params, policy=policy)
+
+        # Check if there is an error in API response
+        if data.get("chart", {}).get("error"):
+            return str(data["chart"]["error"]), [], {}
+
+        # Parse response data
+        chart_data = data["chart"]["result"][0]
+        timestamps = chart_data.get("timestamp") or []
+        quote = chart_data["indicators"]["quote"][0] if timestamps else {}
+        return None, timestamps, quote
+
+    async def _fetch_chart_incremental(
+        self, symbol: str, period1: int, period2: int, interval: str, policy: Optional[ResiliencePolicy] = None
+    ) -> Tuple[Optional[str], List[int], Dict[str, List[Any]]]:
+        """Fetch only the sub-ranges missing from the local store, merge them in, then read the whole range locally"""
+        series = get_timeseries_store().series(self.source_name, symbol, interval, PRICE_FIELDS)
+        gaps = series.missing_ranges(period1, period2, max_age=self._timeseries_max_age)
+        interval_seconds = INTERVAL_SECONDS[interval]
+        # Bars newer than one interval may still change, so they are stored but never marked as covered
+        settled_before = int(time.time()) - interval_seconds
+        read_end = period2
+
+        async def fetch_gap(gap: Tuple[int, int]) -> Optional[str]:
+            nonlocal read_end
+            error, timestamps, quote = await self._fetch_chart(symbol, gap[0], gap[1], interval, policy=policy)
+            if not error:
+                series.write(timestamps, quote, covered=(gap[0], min(gap[1], settled_before)))
+                if timestamps:
+                    read_end = max(read_end, int(max(timestamps)) + 1)
+            return error
+
+        errors = [error for error in await gather_bounded(gaps, fetch_gap, self._max_concurrency) if error]
+        if errors:
+            return errors[0], [], {}
+        if gaps:
+            logger.debug(f"Fetched {len(gaps)} missing range(s) of {symbol} {interval} from API")
+        # The API also returns the bar whose period contains period1 even when it is stamped earlier (e.g. 1wk/1mo
+        # bars stamped at the start of their period); read it back from the store on every call, fetched or not
+        previous = series.last_timestamp_before(period1, period1 - interval_seconds)
+        read_start = previous if previous is not None else period1
+        timestamps, quote = series.read(read_start, read_end)
+        return None, timestamps, quote
+
+    def _price_columns(self, timestamps: List[int], quote: Dict[str, List[Any]]) -> List[List[Any]]:
+        """Return the PRICE_FIELDS columns in order; a column missing from the quote is filled with None"""
+        return [quote.get(field) or [None] * len(timestamps) for field in PRICE_FIELDS]
+
+    def _build_price_records(self, timestamps: List[int], quote: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+        """Build the dict-per-row price list; bars with missing values keep None instead of failing"""
+        prices = []
+        dates = timeparse.format_timestamps(timestamps, date_only=True, local=True)
+        for date, open_, high, low, close, volume in zip(dates, *self._price_columns(timestamps, quote)):
+            prices.append(
+                {
+                    "date": date,
+                    "open": open_,
+                    "high": high,
+                    "low": low,
+                    "close": close,
+                    "volume": int(volume) if volume is not None else None,
                 }
-                prices.append(price_data)
-
-            return {"success": True, "data": {"symbol": symbol, "prices": prices}}
-
-        except asyncio.TimeoutError:
+            )
+        return prices
+
+    def _build_price_arrays(self, timestamps: List[int], quote: Dict[str, List[Any]]) -> Dict[str, Any]:
+        """Keep the response columnar as NumPy arrays; None becomes NaN during the float conversion"""
+        import numpy as np
+
+        arrays = {"timestamp": np.array(timestamps, dtype="datetime64[s]")}
+        for field, column in zip(PRICE_FIELDS, self._price_columns(timestamps, quote)):
+            arrays[field] = np.array(column, dtype=np.float64)
+        return arrays
+
+    def _build_price_frame(self, timestamps: List[int], quote: Dict[str, List[Any]]) -> Any:
+        """Build a DataFrame from the NumPy columns, with a nullable integer volume column"""
+        import pandas as pd
+
+        arrays = self._build_price_arrays(timestamps, quote)
+        index = pd.DatetimeIndex(arrays.pop("timestamp"), name="timestamp").tz_localize("UTC")
+        frame = pd.DataFrame(arrays, index=index)
+        frame["volume"] = frame["volume"].round().astype("Int64")
+        return frame
+
+    def _stock_price_error(self, e: Exception) -> Dict[str, Any]:
+        """Convert an exception raised while fetching a price series into an error result"""
+        if isinstance(e, asyncio.TimeoutError):
             error_msg = f"Request timeout (timeout={self._timeout}s)"
             logger.error(error_msg)
             return {"success": False, "error": error_msg}
-        except aiohttp.ClientError as e:
+        if isinstance(e, aiohttp.ClientError):
             error_msg = f"HTTP request error: {str(e)}"
             logger.error(error_msg)
             return {"success": False, "error": error_msg}
-        except Exception as e:
-            logger.error(f"Error occurred while getting stock price data: {str(e)}")
-            logger.exception(e)
-            return {"success": False, "error": f"Unknown error: {str(e)}"}
+        logger.error(f"Error occurred while getting stock price data: {str(e)}")
+        logger.exception(e)
+        return {"success": False, "error": f"Unknown error: {str(e)}"}
 
     async def get_stock_news(self, symbol: str, region: str = "US", snippet_count: int = 10) -> Dict[str, Any]:
         """获取股票相关的新闻数据
@@ -204,57 +331,54 @@ class YahooFinanceSource(BaseAPI):
 
             # 发送POST请求
             try:
-                async with aiohttp.ClientSession(trust_env=True) as session:
-                    # 使用POST请求，并设置空数据体
-                    async with session.post(
-                        request_url,
-                        headers=self.headers,
-                        params=params,
-                        data="",  # load_more 逻辑，先不适配
-                        timeout=self._timeout,
-                    ) as response:
-                        response.raise_for_status()
-                        data = await response.json()
-
-                        # 提取并处理新闻数据 - 根据实际响应格式调整
-                        stream_items = []
-                        # 检查响应结构中的main.stream路径
-                        if data.get("data") and data["data"].get("main") and data["data"]["main"].get("stream"):
-                            stream_items = data["data"]["main"]["stream"]
-
-                        # 转换为简化的新闻对象列表
-                        simple_news = []
-                        for stream_item in stream_items:
-                            content = stream_item.get("content", {})
-                            if not content:
-                                continue
-
-                            # 获取链接
-                            link = ""
-                            click_through_url = content.get("clickThroughUrl", {})
-                            if click_through_url and click_through_url.get("url"):
-                                link = click_through_url["url"]
-
-                            # 获取发布者
-                            publisher = ""
-                            if content.get("provider") and content["provider"].get("displayName"):
-                                publisher = content["provider"]["displayName"]
-
-                            # 创建简化的新闻项
-                            news_item = {
-                                "title": content.get("title", ""),
-                                "publisher": publisher,
-                                "publish_date": content.get("pubDate", ""),
-                                "link": link,
-                                "uuid": content.get("id", ""),
-                                "content_type": content.get("contentType", ""),
-                                "thumbnail": self._extract_thumbnail(content.get("thumbnail", {})),
-                                "tickers": self._extract_tickers(content.get("finance", {})),
-                            }
-                            simple_news.append(news_item)
-
-                        # 返回结构化的新闻列表
-                        return {"success": True, "data": {"symbol": symbol, "simple_news": simple_news}}
+                # 使用POST请求，并设置空数据体
+                data = await self._request_json(
+                    "POST",
+                    request_url,
+                    headers=self.headers,
+                    params=params,
+                    data="",  # load_more 逻辑，先不适配
+                )
+
+                # 提取并处理新闻数据 - 根据实际响应格式调整
+                stream_items = []
+                # 检查响应结构中的main.stream路径
+                if data.get("data") and data["data"].get("main") and data["data"]["main"].get("stream"):
+                    stream_items = data["data"]["main"]["stream"]
+
+                # 转换为简化的新闻对象列表
+                simple_news = []
+                for stream_item in stream_items:
+                    content = stream_item.get("content", {})
+                    if not content:
+                        continue
+
+                    # 获取链接
+                    link = ""
+                    click_through_url = content.get("clickThroughUrl", {})
+                    if click_through_url and click_through_url.get("url"):
+                        link = click_through_url["url"]
+
+                    # 获取发布者
+                    publisher = ""
+                    if content.get("provider") and content["provider"].get("displayName"):
+                        publisher = content["provider"]["displayName"]
+
+                    # 创建简化的新闻项
+                    news_item = {
+                        "title": content.get("title", ""),
+                        "publisher": publisher,
+                        "publish_date": content.get("pubDate", ""),
+                        "link": link,
+                        "uuid": content.get("id", ""),
+                        "content_type": content.get("contentType", ""),
+                        "thumbnail": self._extract_thumbnail(content.get("thumbnail", {})),
+                        "tickers": self._extract_tickers(content.get("finance", {})),
+                    }
+                    simple_news.append(news_item)
+
+                # 返回结构化的新闻列表
+                return {"success": True, "data": {"symbol": symbol, "simple_news": simple_news}}
 
             except asyncio.TimeoutError:
                 error_msg = f"请求超时 (timeout={self._timeout}秒)"
@@ -315,6 +439,7 @@ class YahooFinanceSource(BaseAPI):
                     tickers.append(ticker_data["symbol"])
         return tickers
 
+    @cached(ttl=15 * 60, stale_ttl=60 * 60)
     async def get_stock_info(self, symbol: str) -> Dict[str, Any]:
         """Get basic stock information
 
@@ -356,11 +481,7 @@ class YahooFinanceSource(BaseAPI):
 
             # Send request
             try:
-                async with aiohttp.ClientSession(trust_env=True) as session:
-                    async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                        response.raise_for_status()
-                        data = await response.json()
-
+                data = await self._request_json("GET", request_url, headers=self.headers, params=params)
             except asyncio.TimeoutError:
                 error_msg = f"Request timeout (timeout={self._timeout}s)"
                 logger.error(error_msg)
@@ -416,8 +537,11 @@ class YahooFinanceSource(BaseAPI):
         end_date: str,
         interval: str = "1d",
         events: str = "",
+        max_concurrency: Optional[int] = None,
+        max_retries: int = 2,
+        output_format: str = "records",
     ) -> Dict[str, Any]:
-        """Get price data for multiple stocks
+        """Get price data for multiple stocks. Symbols are fetched concurrently, and transient failures are retried per symbol.
 
         Args:
             symbols(List[str]): Stock code list
@@ -425,6 +549,9 @@ class YahooFinanceSource(BaseAPI):
             end_date(str): End date in YYYY-MM-DD format
             interval(str): Time interval, options: 1m|2m|5m|15m|30m|60m|1d|1wk|1mo, default: 1d
             events(str): Event type, options: capitalGain|div|split|earn|history, default: empty
+            max_concurrency(Optional[int]): Maximum number of symbols fetched at the same time, default: 8
+            max_retries(int): Retries per symbol on timeouts, connection errors, 429 and 5xx responses, default: 2
+            output_format(str): Format of each symbol's "prices", options: records|numpy|pandas, default: records (see get_stock_price)
 
         Returns:
             Dict[str, Any]: Dictionary containing stock price data, e.g.
@@ -469,24 +596,30 @@ class YahooFinanceSource(BaseAPI):
             stocks_data = []
             failed_symbols = []
 
-            # Iterate over stock code list to get data for each stock
-            for symbol in symbols:
-                try:
-                    result = await self.get_stock_price(
-                        symbol=symbol, start_date=start_date, end_date=end_date, interval=interval, events=events
-                    )
-                    if result["success"]:
-                        stocks_data.append(result["data"])
-                    else:
-                        failed_symbols.append((symbol, result["error"]))
-                        logger.warning(f"Failed to get data for stock {symbol}: {result['error']}")
-                except Exception as e:
-                    failed_symbols.append((symbol, str(e)))
-                    logger.error(f"Error occurred while getting data for stock {symbol}: {str(e)}")
-                    logger.exception(e)
+            # Stream per-symbol results and restore input order
+            results = {}
+            async for result in self.iter_multiple_stocks_price(
+                symbols,
+                start_date,
+                end_date,
+                interval,
+                events,
+                max_concurrency=max_concurrency,
+                max_retries=max_retries,
+                output_format=output_format,
+            ):
+                results[result["symbol"]] = result
+
+            for symbol in dict.fromkeys(symbols):
+                result = results[symbol]
+                if result["success"]:
+                    stocks_data.append(result["data"])
+                else:
+                    failed_symbols.append((symbol, result["error"]))
+                    logger.warning(f"Failed to get data for stock {symbol}: {result['error']}")
 
             # If all stocks fail to get data
-            if len(failed_symbols) == len(symbols):
+            if len(failed_symbols) == len(results):
                 error_msg = "All stock data retrieval failed:\n" + "\n".join([f"{symbol}: {error}" for symbol, error in failed_symbols])
                 return {"success": False, "error": error_msg}
 
@@ -505,6 +638,57 @@ class YahooFinanceSource(BaseAPI):
             logger.exception(e)
             return {"success": False, "error": str(e)}
 
+    async def iter_multiple_stocks_price(
+        self,
+        symbols: List[str],
+        start_date: str,
+        end_date: str,
+        interval: str = "1d",
+        events: str = "",
+        max_concurrency: Optional[int] = None,
+        max_retries: int = 2,
+        output_format: str = "records",
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream price data for multiple stocks as each symbol finishes (completion order, not input order).
+        Use with `async for`, e.g. `async for item in client.yahoo_finance.iter_multiple_stocks_price(["AAPL", "MSFT"], "2024-01-01", "2024-02-01"):`
+
+        Args:
+            symbols(List[str]): Stock code list, duplicates are fetched once
+            start_date(str): Start date in YYYY-MM-DD format
+            end_date(str): End date in YYYY-MM-DD format
+            interval(str): Time interval, options: 1m|2m|5m|15m|30m|60m|1d|1wk|1mo, default: 1d
+            events(str): Event type, options: capitalGain|div|split|earn|history, default: empty
+            max_concurrency(Optional[int]): Maximum number of symbols fetched at the same time, default: 8
+            max_retries(int): Retries per symbol on timeouts, connection errors, 429 and 5xx responses, default: 2
+            output_format(str): Format of each symbol's "prices", options: records|numpy|pandas, default: records (see get_stock_price)
+
+        Yields:
+            Dict[str, Any]: One item per symbol, e.g.
+            {
+                "symbol": "AAPL",              # Stock code
+                "success": True,               # Whether successful
+                "data": {                      # If successful, same as get_stock_price data
+                    "symbol": "AAPL",
+                    "prices": [...]
+                },
+                "error": "..."                 # If failed, error message
+            }
+        """
+
+        # Retries happen in the request middleware (which also feeds the circuit breaker), once per attempt
+        policy = self.resilience_policy.replace(retry_attempts=max_retries + 1)
+
+        async def fetch(symbol: str) -> Dict[str, Any]:
+            try:
+                result = await self._fetch_stock_price(symbol, start_date, end_date, interval, events, output_format, policy)
+            except Exception as e:
+                result = self._stock_price_error(e)
+            return {"symbol": symbol, **result}
+
+        limit = max_concurrency or self._max_concurrency
+        async for _, result in iter_bounded(list(dict.fromkeys(symbols)), fetch, limit):
+            yield result
+
     async def get_stock_insights(self, symbol: str) -> Dict[str, Any]:
         """Get stock insight data, including technical analysis, valuation, and company snapshot
 
@@ -568,16 +752,12 @@ class YahooFinanceSource(BaseAPI):
             params = {"symbol": symbol}
 
             # Send request
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                try:
-                    async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                        # Check response status
-                        response.raise_for_status()
-                        data = await response.json()
-                except asyncio.TimeoutError:
-                    return {"success": False, "error": f"Request timeout (timeout={self._timeout}s)"}
-                except aiohttp.ClientError as e:
-                    return {"success": False, "error": f"HTTP request error: {str(e)}"}
+            try:
+                data = await self._request_json("GET", request_url, headers=self.headers, params=params)
+            except asyncio.TimeoutError:
+                return {"success": False, "error": f"Request timeout (timeout={self._timeout}s)"}
+            except aiohttp.ClientError as e:
+                return {"success": False, "error": f"HTTP request error: {str(e)}"}
 
             # Check if there is an error in API response
             if data.get("finance", {}).get("error"):
@@ -709,16 +889,12 @@ class YahooFinanceSource(BaseAPI):
                 params["lang"] = lang
 
             # Send request
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                try:
-                    async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                        # Check response status
-                        response.raise_for_status()
-                        data = await response.json()
-                except asyncio.TimeoutError:
-                    return {"success": False, "error": f"Request timeout (timeout={self._timeout}s)"}
-                except aiohttp.ClientError as e:
-                    return {"success": False, "error": f"HTTP request error: {str(e)}"}
+            try:
+                data = await self._request_json("GET", request_url, headers=self.headers, params=params)
+            except asyncio.TimeoutError:
+                return {"success": False, "error": f"Request timeout (timeout={self._timeout}s)"}
+            except aiohttp.ClientError as e:
+                return {"success": False, "error": f"HTTP request error: {str(e)}"}
 
             # Check if there is an error in API response
             if data.get("quoteSummary", {}).get("error"):
@@ -852,11 +1028,7 @@ class YahooFinanceSource(BaseAPI):
 
             # Send request
             try:
-                async with aiohttp.ClientSession(trust_env=True) as session:
-                    async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                        response.raise_for_status()
-                        data = await response.json()
-
+                data = await self._request_json("GET", request_url, headers=self.headers, params=params)
             except asyncio.TimeoutError:
                 error_msg = f"Request timeout (timeout={self._timeout}s)"
                 logger.error(error_msg)
@@ -1,18 +1,33 @@
 import asyncio
+import functools
+import hashlib
 import json
+import marshal
+import mmap
 import os
+import struct
 import uuid
-from typing import Any, Dict, List, Optional, cast
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, cast
+from weakref import WeakKeyDictionary
 
-import aiohttp
 from pydantic import BaseModel
 
 ENV_AGENT_NAME = "AGENT_NAME"
 ENV_FUNC_SERVER_PORT = "FUNC_SERVER_PORT"
+ENV_FUNC_BATCH_WINDOW_MS = "FUNC_BATCH_WINDOW_MS"
+ENV_FUNC_MANIFEST_CACHE_DIR = "FUNC_MANIFEST_CACHE_DIR"
 MCP_FUNCTION_LIST_JSON_FILE = "mcp_function_list.json"
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
 
 SERVER_PORT = 12306
 PROXY_TIMEOUT = 3600
+BATCH_MAX_SIZE = 64
+
+# 编译后的函数清单缓存: 魔数 + 源文件 mtime_ns + 源文件大小 + 源文件 sha256，其后为 marshal 序列化的索引
+_MANIFEST_MAGIC = b"FNMF" + struct.pack("<I", marshal.version)
+_MANIFEST_HEADER = struct.Struct("<8sqq32s")
 
 
 class ToolResult(BaseModel):
@@ -39,6 +54,37 @@ class FunctionProxy:
         return f"http://localhost:{self.server_port}"
 
     async def __call__(self, *args, **kwargs) -> ToolResult:
+        request = self._build_request(args, kwargs)
+
+        # 发出请求前的拦截
+        tool_result = self._intercept_request(self.name, request)
+        if tool_result is not None:
+            return tool_result
+
+        # 处于批量窗口内时，请求会与其他调用合并为一次 /execute_batch
+        batcher = _current_batcher()
+        if batcher is not None:
+            tool_result = await batcher.submit(self.get_server_url(), self.timeout, request)
+        else:
+            tool_result = await self._execute(request)
+
+        if tool_result.is_error:
+            return tool_result
+        return self._intercept_response(self.name, request, tool_result)
+
+    def stream(self, *args, **kwargs) -> "StreamingCall":
+        """
+        以流式方式调用函数，部分结果到达时即可消费
+
+        Example:
+            call = proxy.stream(query="AI")
+            async for partial in call:
+                print(partial)
+            print(call.result)
+        """
+        return StreamingCall(self, self._build_request(args, kwargs))
+
+    def _build_request(self, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Dict[str, Any]:
         call_params = kwargs.copy()
         args_len = len(args)
 
@@ -50,7 +96,7 @@ class FunctionProxy:
                 if i < self.params_len:
                     call_params[self.params[i]["name"]] = args[i]
 
-        request = {
+        return {
             "request_id": str(uuid.uuid4()),
             "function_name": self.origin_name or self.name,
             "function_kind": self.kind,
@@ -58,10 +104,8 @@ class FunctionProxy:
             "parameters": call_params,
         }
 
-        # 发出请求前的拦截
-        tool_result = self._intercept_request(self.name, request)
-        if tool_result is not None:
-            return tool_result
+    async def _execute(self, request: Dict[str, Any]) -> ToolResult:
+        import aiohttp  # 延迟导入，避免每个 agent 子进程在 import 阶段加载 aiohttp
 
         timeout = aiohttp.ClientTimeout(total=self.timeout)
         async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
@@ -70,20 +114,12 @@ class FunctionProxy:
                     if response.status != 200:
                         return ToolResult(is_error=True, message=f"Function call failed: {await response.text()}")
 
-                    result = await response.json()
-                    if result.get("is_error", False):
-                        return ToolResult(is_error=True, message=result.get("message", "Unknown error"))
-
-                    tool_result = ToolResult(is_error=False, message=result.get("message", "succeed"))
-                    return self._intercept_response(self.name, request, tool_result)
+                    return _to_tool_result(await response.json())
             except asyncio.TimeoutError:
                 error_msg = f"Timeout when calling function {self.name}"
                 return ToolResult(is_error=True, message=error_msg)
             except Exception as e:
-                import traceback
-
-                error_msg = f"Error: {str(e)}\nTraceback:\n{traceback.format_exc()}"
-                return ToolResult(is_error=True, message=error_msg)
+                return ToolResult(is_error=True, message=_format_exception(e))
 
     def _intercept_request(self, function_name: str, request: Dict[str, Any]) -> Optional[ToolResult]:
         if self.kind == "agent" and self.agent_name and "planner" not in self.agent_name:
@@ -97,14 +133,338 @@ class FunctionProxy:
         return result
 
 
+def _to_tool_result(result: Dict[str, Any]) -> ToolResult:
+    if result.get("is_error", False):
+        return ToolResult(is_error=True, message=result.get("message", "Unknown error"))
+    return ToolResult(is_error=False, message=result.get("message", "succeed"))
+
+
+def _format_exception(e: BaseException) -> str:
+    import traceback
+
+    return f"Error: {str(e)}\nTraceback:\n{traceback.format_exc()}"
+
+
+class StreamingCall:
+    """
+    流式函数调用
+
+    请求携带 stream 标记和 NDJSON Accept 头发往 /execute，服务端逐行返回
+    {"type": "partial", "message": ...}，最后一行为 {"type": "final", "is_error": ..., "message": ...}。
+    不支持流式的服务端直接返回普通 JSON，此时整体视为最终结果。
+    迭代结束后 result 为最终的 ToolResult。
+    """
+
+    def __init__(self, proxy: FunctionProxy, request: Dict[str, Any]):
+        self.proxy = proxy
+        self.request = {**request, "stream": True}
+        self.result: Optional[ToolResult] = None
+        self._iterator: Optional[AsyncIterator[str]] = None
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        if self._iterator is None:
+            self._iterator = self._iterate()
+        return self._iterator
+
+    async def final(self) -> ToolResult:
+        """消费剩余的部分结果并返回最终结果"""
+        async for _ in self:
+            pass
+        return cast(ToolResult, self.result)
+
+    async def _iterate(self) -> AsyncIterator[str]:
+        proxy = self.proxy
+        tool_result = proxy._intercept_request(proxy.name, self.request)
+        if tool_result is not None:
+            self.result = tool_result
+            return
+
+        try:
+            async for partial in self._read_stream():
+                yield partial
+        except asyncio.TimeoutError:
+            self.result = ToolResult(is_error=True, message=f"Timeout when calling function {proxy.name}")
+        except Exception as e:
+            self.result = ToolResult(is_error=True, message=_format_exception(e))
+
+        if self.result is None:
+            self.result = ToolResult(is_error=True, message=f"Function {proxy.name} stream ended without a final result")
+        elif not self.result.is_error:
+            self.result = proxy._intercept_response(proxy.name, self.request, self.result)
+
+    async def _read_stream(self) -> AsyncIterator[str]:
+        import aiohttp
+
+        proxy = self.proxy
+        timeout = aiohttp.ClientTimeout(total=proxy.timeout)
+        headers = {"Accept": f"{NDJSON_CONTENT_TYPE}, application/json"}
+        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
+            async with session.post(f"{proxy.get_server_url()}/execute", json=self.request, headers=headers) as response:
+                if response.status != 200:
+                    self.result = ToolResult(is_error=True, message=f"Function call failed: {await response.text()}")
+                    return
+
+                if response.content_type != NDJSON_CONTENT_TYPE:
+                    self.result = _to_tool_result(await response.json())
+                    return
+
+                # 自行按行切分：StreamReader 的逐行读取在单行超过缓冲区上限（2**17 字节）时会报 Chunk too big
+                buffer = bytearray()
+                async for chunk in response.content.iter_any():
+                    start = len(buffer)
+                    buffer += chunk
+                    end = buffer.find(b"\n", start)
+                    while end >= 0:
+                        partial = self._handle_line(bytes(buffer[:end]))
+                        del buffer[: end + 1]
+                        if partial is not None:
+                            yield partial
+                        end = buffer.find(b"\n")
+                partial = self._handle_line(bytes(buffer))
+                if partial is not None:
+                    yield partial
+
+    def _handle_line(self, line: bytes) -> Optional[str]:
+        line = line.strip()
+        if not line:
+            return None
+        event = json.loads(line)
+        if event.get("type") == "final":
+            self.result = _to_tool_result(event)
+            return None
+        return event.get("message", "")
+
+
+class _CallBatcher:
+    """
+    将短时间窗口内发出的多个函数调用合并为一次 /execute_batch 请求，
+    再按 request_id 把结果分发回各个等待中的调用方。
+    服务端不支持 /execute_batch（404/405）时，批次内的调用改为逐个并发请求 /execute
+    """
+
+    def __init__(self, window: float = 0.0, max_size: int = BATCH_MAX_SIZE):
+        self.window = window
+        self.max_size = max_size
+        # server_url -> [(request, timeout, future)]
+        self._pending: Dict[str, List[Tuple[Dict[str, Any], int, asyncio.Future]]] = {}
+        self._flush_handle: Optional[asyncio.Handle] = None
+        self._inflight: set[asyncio.Task] = set()
+
+    def submit(self, server_url: str, timeout: int, request: Dict[str, Any]) -> "asyncio.Future[ToolResult]":
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[ToolResult] = loop.create_future()
+        pending = self._pending.setdefault(server_url, [])
+        pending.append((request, timeout, future))
+
+        if len(pending) >= self.max_size:
+            self._flush_url(server_url)
+        elif self._flush_handle is None:
+            if self.window > 0:
+                self._flush_handle = loop.call_later(self.window, self.flush)
+            else:
+                # 同一轮事件循环中发出的调用都会落在同一个批次里
+                self._flush_handle = loop.call_soon(self.flush)
+        return future
+
+    def flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        for server_url in list(self._pending):
+            self._flush_url(server_url)
+
+    async def drain(self):
+        """发出所有待发送的调用，并等待进行中的批次完成"""
+        self.flush()
+        while self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    def _flush_url(self, server_url: str):
+        items = self._pending.pop(server_url, [])
+        if not items:
+            return
+        task = asyncio.get_running_loop().create_task(self._send(server_url, items))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _send(self, server_url: str, items: List[Tuple[Dict[str, Any], int, asyncio.Future]]):
+        results: Dict[str, ToolResult] = {}
+        try:
+            results = await self._post_batch(server_url, items)
+        except asyncio.TimeoutError:
+            names = ", ".join(sorted({request["function_name"] for request, _, _ in items}))
+            results = self._fail_all(items, f"Timeout when calling function {names}")
+        except Exception as e:
+            results = self._fail_all(items, _format_exception(e))
+        finally:
+            for request, _, future in items:
+                if future.done():
+                    continue
+                result = results.get(request["request_id"])
+                if result is None:
+                    result = ToolResult(is_error=True, message=f"No result returned for request {request['request_id']}")
+                future.set_result(result)
+
+    async def _post_batch(
+        self, server_url: str, items: List[Tuple[Dict[str, Any], int, asyncio.Future]]
+    ) -> Dict[str, ToolResult]:
+        import aiohttp
+
+        timeout = aiohttp.ClientTimeout(total=max(item_timeout for _, item_timeout, _ in items))
+        payload = {"requests": [request for request, _, _ in items]}
+        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
+            async with session.post(f"{server_url}/execute_batch", json=payload) as response:
+                if response.status in (404, 405):
+                    fallback = True
+                elif response.status != 200:
+                    return self._fail_all(items, f"Function call failed: {await response.text()}")
+                else:
+                    fallback = False
+                    body = await response.json()
+            if fallback:
+                results = await asyncio.gather(*(self._post_one(session, server_url, request) for request, _, _ in items))
+                return {request["request_id"]: result for (request, _, _), result in zip(items, results)}
+
+        return {result.get("request_id"): _to_tool_result(result) for result in body.get("results", [])}
+
+    @staticmethod
+    async def _post_one(session: Any, server_url: str, request: Dict[str, Any]) -> ToolResult:
+        try:
+            async with session.post(f"{server_url}/execute", json=request) as response:
+                if response.status != 200:
+                    return ToolResult(is_error=True, message=f"Function call failed: {await response.text()}")
+                return _to_tool_result(await response.json())
+        except asyncio.TimeoutError:
+            return ToolResult(is_error=True, message=f"Timeout when calling function {request['function_name']}")
+        except Exception as e:
+            return ToolResult(is_error=True, message=_format_exception(e))
+
+    @staticmethod
+    def _fail_all(items: List[Tuple[Dict[str, Any], int, asyncio.Future]], message: str) -> Dict[str, ToolResult]:
+        return {request["request_id"]: ToolResult(is_error=True, message=message) for request, _, _ in items}
+
+
+_batch_scope: ContextVar[Optional[_CallBatcher]] = ContextVar("function_call_batch", default=None)
+_implicit_batchers: "WeakKeyDictionary[asyncio.AbstractEventLoop, _CallBatcher]" = WeakKeyDictionary()
+
+
+def _current_batcher() -> Optional[_CallBatcher]:
+    batcher = _batch_scope.get()
+    if batcher is not None:
+        return batcher
+
+    # 通过环境变量开启隐式批量模式：窗口内的所有调用自动合并
+    window_ms = float(os.environ.get(ENV_FUNC_BATCH_WINDOW_MS, "0") or 0)
+    if window_ms <= 0:
+        return None
+    loop = asyncio.get_running_loop()
+    batcher = _implicit_batchers.get(loop)
+    if batcher is None:
+        batcher = _implicit_batchers[loop] = _CallBatcher(window=window_ms / 1000)
+    return batcher
+
+
+@asynccontextmanager
+async def batch(window: float = 0.0, max_size: int = BATCH_MAX_SIZE) -> AsyncIterator[_CallBatcher]:
+    """
+    在代码块内发出的函数调用会被合并为 /execute_batch 请求
+
+    Args:
+        window: 合并窗口（秒），默认 0 表示合并同一轮事件循环中发出的调用
+        max_size: 单个批次的最大调用数，达到后立即发送
+
+    Example:
+        async with batch():
+            results = await asyncio.gather(twitter_search_tweets("AI"), yahoo_get_stock_quote("AAPL"))
+    """
+    batcher = _CallBatcher(window=window, max_size=max_size)
+    token = _batch_scope.set(batcher)
+    try:
+        yield batcher
+    finally:
+        _batch_scope.reset(token)
+        await batcher.drain()
+
+
+def _manifest_cache_path(file_path: str) -> str:
+    cache_dir = os.environ.get(ENV_FUNC_MANIFEST_CACHE_DIR) or os.path.join(os.path.dirname(os.path.abspath(file_path)), "__pycache__")
+    return os.path.join(cache_dir, f"{os.path.basename(file_path)}.manifest")
+
+
+def _read_manifest(cache_path: str) -> Optional[Tuple[int, int, bytes, Dict[str, Dict[str, Any]]]]:
+    """读取编译后的清单缓存，返回 (mtime_ns, size, sha256, index)，缓存不存在或损坏时返回 None"""
+    try:
+        with open(cache_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if len(mm) < _MANIFEST_HEADER.size:
+                return None
+            magic, mtime_ns, size, digest = _MANIFEST_HEADER.unpack_from(mm)
+            if magic != _MANIFEST_MAGIC:
+                return None
+            with memoryview(mm) as view:
+                index = marshal.loads(view[_MANIFEST_HEADER.size :])
+            return mtime_ns, size, digest, index
+    except (OSError, ValueError, EOFError, TypeError):
+        return None
+
+
+def _write_manifest(cache_path: str, stat: os.stat_result, digest: bytes, index: Dict[str, Dict[str, Any]]):
+    """原子地写入清单缓存，目录不可写时静默跳过"""
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            f.write(_MANIFEST_HEADER.pack(_MANIFEST_MAGIC, stat.st_mtime_ns, stat.st_size, digest))
+            f.write(marshal.dumps(index))
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+
+@functools.lru_cache(maxsize=None)
+def load_function_index(file_path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    加载 function_list.json 并按函数名建立索引，同一文件在进程内只解析一次
+
+    解析结果会编译为二进制清单缓存（默认位于同目录的 __pycache__ 下），以源文件的
+    mtime、大小和 sha256 作为键，之后的进程启动直接 mmap 读取，跳过 JSON 解析。
+
+    Args:
+        file_path: function_list.json 路径
+
+    Returns:
+        Dict[str, Dict[str, Any]]: 函数名 -> 函数描述
+    """
+    cache_path = _manifest_cache_path(file_path)
+    stat = os.stat(file_path)
+    cached = _read_manifest(cache_path)
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[3]
+
+    with open(file_path, "rb") as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).digest()
+
+    if cached is not None and cached[2] == digest:
+        # 内容未变（仅 mtime 变化），刷新缓存头即可
+        index = cached[3]
+    else:
+        function_list = json.loads(raw.decode("utf-8"))
+        index = {
+            function_info["name"]: function_info
+            for function_info in function_list
+            if isinstance(function_info, dict) and "name" in function_info
+        }
+
+    _write_manifest(cache_path, stat, digest, index)
+    return index
+
+
 def load_function_proxys(file_path: str) -> tuple[List[Dict[str, Any]], Dict[str, FunctionProxy]]:
     # 加载 function_list.json 并创建 function proxies
-    with open(file_path, "r", encoding="utf-8") as f:
-        function_list = json.load(f)
-
-    proxies = {}
-    for function_info in function_list:
-        if isinstance(function_info, dict) and "name" in function_info:
-            proxies[function_info["name"]] = FunctionProxy(function_info)
+    function_index = load_function_index(file_path)
+    proxies = {name: FunctionProxy(function_info) for name, function_info in function_index.items()}
 
-    return function_list, proxies
+    return list(function_index.values()), proxies
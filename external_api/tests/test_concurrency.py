@@ -0,0 +1,24 @@
+import asyncio
+
+from external_api.data_sources.concurrency import AdaptiveLimiter
+
+
+def test_cancelled_woken_waiter_passes_slot_on():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial_limit=1, min_limit=1, max_limit=1)
+        started_at = await limiter.acquire()
+
+        waiter_a = asyncio.ensure_future(limiter.acquire())
+        waiter_b = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+
+        # release 唤醒 A，A 在恢复执行前被取消
+        limiter.release(started_at, "error")
+        waiter_a.cancel()
+
+        await asyncio.wait_for(waiter_b, timeout=1)
+        assert waiter_a.cancelled()
+        assert limiter.in_flight == 1
+        assert not limiter._waiters
+
+    asyncio.run(scenario())
@@ -0,0 +1,98 @@
+import asyncio
+
+from external_api.benchmarks.function_server import LocalFunctionServer
+from external_api.function_utils import FunctionProxy, batch
+
+
+def make_proxy(name: str, port: int) -> FunctionProxy:
+    proxy = FunctionProxy({"name": name, "parameters": [{"name": "query"}]})
+    proxy.server_port = port
+    return proxy
+
+
+def run_with_server(scenario, **server_options):
+    async def main():
+        server = LocalFunctionServer(latency=0, **server_options)
+        port = await server.start()
+        try:
+            return await scenario(server, port)
+        finally:
+            await server.stop()
+
+    return asyncio.run(main())
+
+
+def test_batched_calls_share_one_request_and_get_their_own_results():
+    async def scenario(server, port):
+        search = make_proxy("search", port)
+        async with batch():
+            results = await asyncio.gather(search("a"), search("b"), search(query="c"))
+        assert [result.message for result in results] == ['{"query": "a"}', '{"query": "b"}', '{"query": "c"}']
+        assert not any(result.is_error for result in results)
+        assert server.request_count == 1
+        assert server.call_count == 3
+
+    run_with_server(scenario)
+
+
+def test_error_in_batch_only_fails_that_call():
+    async def scenario(server, port):
+        search = make_proxy("search", port)
+        failing = make_proxy("raise_error", port)
+        async with batch():
+            ok, error = await asyncio.gather(search("a"), failing("b"))
+        assert not ok.is_error and ok.message == '{"query": "a"}'
+        assert error.is_error and error.message == "requested error"
+        assert server.request_count == 1
+
+    run_with_server(scenario)
+
+
+def test_batch_max_size_splits_requests():
+    async def scenario(server, port):
+        search = make_proxy("search", port)
+        async with batch(max_size=2):
+            results = await asyncio.gather(*(search(str(i)) for i in range(5)))
+        assert [result.message for result in results] == [f'{{"query": "{i}"}}' for i in range(5)]
+        assert server.request_count == 3
+
+    run_with_server(scenario)
+
+
+def test_task_done_is_intercepted_in_batch(capsys):
+    async def scenario(server, port):
+        task_done = make_proxy("task_done", port)
+        async with batch():
+            result = await task_done("finished")
+        assert not result.is_error
+
+    run_with_server(scenario)
+    assert 'task_done>>>{"message":"{\\"query\\": \\"finished\\"}","is_error":false}<<<task_done' in capsys.readouterr().out
+
+
+def test_batch_falls_back_to_execute_without_batch_endpoint():
+    async def scenario(server, port):
+        search = make_proxy("search", port)
+        failing = make_proxy("raise_error", port)
+        async with batch():
+            results = await asyncio.gather(search("a"), search("b"), failing("c"))
+        assert [(result.is_error, result.message) for result in results] == [
+            (False, '{"query": "a"}'),
+            (False, '{"query": "b"}'),
+            (True, "requested error"),
+        ]
+        # 每个调用单独请求 /execute
+        assert server.request_count == 3
+
+    run_with_server(scenario, batch_endpoint=False)
+
+
+def test_unreachable_server_fails_every_call_in_batch():
+    async def scenario(server, port):
+        await server.stop()
+        search = make_proxy("search", port)
+        async with batch():
+            results = await asyncio.gather(search("a"), search("b"))
+        assert all(result.is_error for result in results)
+
+    run_with_server(scenario)
@@ -0,0 +1,71 @@
+import asyncio
+
+from external_api.benchmarks.function_server import LocalFunctionServer
+from external_api.function_utils import FunctionProxy
+
+
+def make_proxy(name: str, port: int) -> FunctionProxy:
+    proxy = FunctionProxy({"name": name, "parameters": [{"name": "chunks"}, {"name": "size"}]})
+    proxy.server_port = port
+    return proxy
+
+
+def run_with_server(scenario):
+    async def main():
+        server = LocalFunctionServer(latency=0)
+        port = await server.start()
+        try:
+            return await scenario(port)
+        finally:
+            await server.stop()
+
+    return asyncio.run(main())
+
+
+def test_stream_yields_partials_then_final_result():
+    async def scenario(port):
+        call = make_proxy("search", port).stream(chunks=3)
+        partials = [partial async for partial in call]
+        assert partials == ["chunk 0", "chunk 1", "chunk 2"]
+        assert call.result is not None and not call.result.is_error
+        assert call.result.message == '{"chunks": 3}'
+
+    run_with_server(scenario)
+
+
+def test_stream_final_error():
+    async def scenario(port):
+        result = await make_proxy("raise_error", port).stream(chunks=1).final()
+        assert result.is_error and result.message == "requested error"
+
+    run_with_server(scenario)
+
+
+def test_stream_line_larger_than_read_buffer():
+    # 最终结果这一行约 300KB，超过 StreamReader 逐行读取的 2**17 字节上限
+    async def scenario(port):
+        call = make_proxy("large_result", port).stream(chunks=2, size=300_000)
+        partials = [partial async for partial in call]
+        assert partials == ["chunk 0", "chunk 1"]
+        assert call.result is not None and not call.result.is_error
+        assert call.result.message == "x" * 300_000
+
+    run_with_server(scenario)
+
+
+def test_non_streaming_call_with_large_result():
+    async def scenario(port):
+        result = await make_proxy("large_result", port)(0, 70_000)
+        assert not result.is_error and len(result.message) == 70_000
+
+    run_with_server(scenario)
+
+
+def test_stream_against_unreachable_server_reports_error():
+    async def scenario(port):
+        proxy = make_proxy("search", port)
+        return proxy
+
+    proxy = run_with_server(scenario)
+    result = asyncio.run(proxy.stream(chunks=1).final())
+    assert result.is_error
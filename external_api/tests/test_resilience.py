@@ -0,0 +1,165 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from external_api.data_sources.concurrency import CircuitOpenError
+from external_api.data_sources.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    ResiliencePolicy,
+    execute,
+    get_host_state,
+    reset_resilience_state,
+)
+
+HOST = "upstream.test"
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    reset_resilience_state()
+    yield
+    reset_resilience_state()
+
+
+def http_error(status: int) -> aiohttp.ClientResponseError:
+    return aiohttp.ClientResponseError(request_info=None, history=(), status=status)
+
+
+class FakeCall:
+    """按顺序返回 outcomes 中的结果，异常实例会被抛出"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+def policy(**changes) -> ResiliencePolicy:
+    options = dict(retry_attempts=3, retry_base_delay=0.001, retry_max_delay=0.001, hedge=False, breaker_failure_threshold=0)
+    options.update(changes)
+    return ResiliencePolicy(**options)
+
+
+def test_get_is_retried_on_retryable_errors():
+    call = FakeCall(http_error(503), aiohttp.ClientConnectionError(), {"ok": True})
+    assert asyncio.run(execute(HOST, "GET", call, policy())) == {"ok": True}
+    assert call.calls == 3
+    assert get_host_state(HOST).retries == 2
+
+
+def test_post_is_not_retried():
+    call = FakeCall(http_error(503), {"ok": True})
+    with pytest.raises(aiohttp.ClientResponseError):
+        asyncio.run(execute(HOST, "POST", call, policy()))
+    assert call.calls == 1
+
+
+def test_client_errors_are_not_retried():
+    call = FakeCall(http_error(404), {"ok": True})
+    with pytest.raises(aiohttp.ClientResponseError):
+        asyncio.run(execute(HOST, "GET", call, policy()))
+    assert call.calls == 1
+
+
+def test_retries_stop_after_retry_attempts():
+    call = FakeCall(http_error(500))
+    with pytest.raises(aiohttp.ClientResponseError):
+        asyncio.run(execute(HOST, "GET", call, policy(retry_attempts=2)))
+    assert call.calls == 2
+
+
+def test_breaker_opens_after_consecutive_failures_and_short_circuits():
+    breaker = policy(retry_attempts=1, breaker_failure_threshold=2, breaker_reset_timeout=60)
+    call = FakeCall(http_error(503))
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(aiohttp.ClientResponseError):
+                await execute(HOST, "GET", call, breaker)
+        with pytest.raises(CircuitOpenError):
+            await execute(HOST, "GET", call, breaker)
+
+    asyncio.run(scenario())
+    state = get_host_state(HOST)
+    assert state.state == OPEN
+    assert call.calls == 2
+    assert state.short_circuits == 1 and state.breaker_opens == 1
+
+
+def test_half_open_probe_success_closes_breaker():
+    breaker = policy(retry_attempts=1, breaker_failure_threshold=1, breaker_reset_timeout=0.05)
+
+    async def scenario():
+        with pytest.raises(aiohttp.ClientResponseError):
+            await execute(HOST, "GET", FakeCall(http_error(503)), breaker)
+        assert get_host_state(HOST).state == OPEN
+        await asyncio.sleep(0.06)
+
+        # 冷却结束后只放行一个探测请求，探测进行中的其他请求被拒绝
+        release = asyncio.Event()
+
+        async def slow_probe():
+            await release.wait()
+            return {"ok": True}
+
+        probe = asyncio.ensure_future(execute(HOST, "GET", slow_probe, breaker))
+        await asyncio.sleep(0)
+        assert get_host_state(HOST).state == HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            await execute(HOST, "GET", FakeCall({"ok": True}), breaker)
+        release.set()
+        assert await probe == {"ok": True}
+
+    asyncio.run(scenario())
+    assert get_host_state(HOST).state == CLOSED
+
+
+def test_half_open_probe_failure_reopens_breaker():
+    breaker = policy(retry_attempts=1, breaker_failure_threshold=1, breaker_reset_timeout=0.05)
+    call = FakeCall(http_error(503))
+
+    async def scenario():
+        with pytest.raises(aiohttp.ClientResponseError):
+            await execute(HOST, "GET", call, breaker)
+        await asyncio.sleep(0.06)
+        with pytest.raises(aiohttp.ClientResponseError):
+            await execute(HOST, "GET", call, breaker)
+        assert get_host_state(HOST).state == OPEN
+        with pytest.raises(CircuitOpenError):
+            await execute(HOST, "GET", call, breaker)
+
+    asyncio.run(scenario())
+    assert call.calls == 2
+    assert get_host_state(HOST).breaker_opens == 2
+
+
+def test_cancelled_probe_releases_half_open_slot():
+    breaker = policy(retry_attempts=1, breaker_failure_threshold=1, breaker_reset_timeout=0.05)
+
+    async def scenario():
+        with pytest.raises(aiohttp.ClientResponseError):
+            await execute(HOST, "GET", FakeCall(http_error(503)), breaker)
+        await asyncio.sleep(0.06)
+
+        async def hang():
+            await asyncio.sleep(10)
+
+        probe = asyncio.ensure_future(execute(HOST, "GET", hang, breaker))
+        await asyncio.sleep(0)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        # 被取消的探测不计入成败，下一个请求可以作为新的探测
+        assert await execute(HOST, "GET", FakeCall({"ok": True}), breaker) == {"ok": True}
+
+    asyncio.run(scenario())
+    assert get_host_state(HOST).state == CLOSED
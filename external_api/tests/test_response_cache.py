@@ -0,0 +1,147 @@
+import asyncio
+
+import pytest
+
+from external_api.data_sources import response_cache
+from external_api.data_sources.response_cache import ResponseCache, cached
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    cache = ResponseCache()
+    monkeypatch.setattr(response_cache, "_response_cache", cache)
+    return cache
+
+
+class FakeSource:
+    source_name = "fake"
+
+    def __init__(self, delay: float = 0.0, success: bool = True):
+        self.calls = 0
+        self.delay = delay
+        self.success = success
+
+    @cached(ttl=0.05, stale_ttl=0.5)
+    async def lookup(self, locationId: int, language: str = "en"):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {"success": self.success, "data": {"id": locationId, "call": self.calls}}
+
+    @cached(ttl=0.05)
+    async def lookup_no_stale(self, locationId: int):
+        self.calls += 1
+        return {"success": True, "data": {"call": self.calls}}
+
+
+def test_fresh_hit_within_ttl(fresh_cache):
+    async def scenario():
+        source = FakeSource()
+        first = await source.lookup(1)
+        second = await source.lookup(1, language="en")
+        assert first == second and source.calls == 1
+        # 返回的是副本，调用方修改不会影响缓存
+        second["data"]["id"] = "changed"
+        assert (await source.lookup(1))["data"]["id"] == 1
+
+    asyncio.run(scenario())
+    stats = fresh_cache.stats()["fake"]["lookup"]
+    assert stats["hits"] == 2 and stats["misses"] == 1
+
+
+def test_numeric_and_string_arguments_share_an_entry():
+    async def scenario():
+        source = FakeSource()
+        await source.lookup(123)
+        await source.lookup("123")
+        await source.lookup(locationId=123.0)
+        assert source.calls == 1
+
+    asyncio.run(scenario())
+
+
+def test_expired_entry_is_refetched():
+    async def scenario():
+        source = FakeSource()
+        await source.lookup_no_stale(1)
+        await asyncio.sleep(0.1)
+        result = await source.lookup_no_stale(1)
+        assert result["data"]["call"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_stale_entry_is_returned_and_refreshed_in_background(fresh_cache):
+    async def scenario():
+        source = FakeSource()
+        await source.lookup(1)
+        await asyncio.sleep(0.1)
+        stale = await source.lookup(1)
+        # 旧值立即返回，刷新在后台进行
+        assert stale["data"]["call"] == 1
+        await asyncio.sleep(0.01)
+        assert source.calls == 2
+        fresh = await source.lookup(1)
+        assert fresh["data"]["call"] == 2
+
+    asyncio.run(scenario())
+    assert fresh_cache.stats()["fake"]["lookup"]["stale_hits"] == 1
+
+
+def test_unsuccessful_results_are_not_cached():
+    async def scenario():
+        source = FakeSource(success=False)
+        await source.lookup(1)
+        await source.lookup(1)
+        assert source.calls == 2
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_misses_share_one_call():
+    async def scenario():
+        source = FakeSource(delay=0.05)
+        results = await asyncio.gather(*(source.lookup(1) for _ in range(5)))
+        assert source.calls == 1
+        assert all(result == results[0] for result in results)
+        # 每个调用方拿到独立的副本
+        results[0]["data"]["id"] = "changed"
+        assert results[1]["data"]["id"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_cancelling_the_leader_does_not_cancel_followers():
+    async def scenario():
+        source = FakeSource(delay=0.05)
+        leader = asyncio.ensure_future(source.lookup(1))
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(source.lookup(1))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+
+        result = await follower
+        assert leader.cancelled()
+        assert result["data"]["id"] == 1
+        assert source.calls == 1
+        # 请求本身没有被中断，结果已写入缓存
+        await source.lookup(1)
+        assert source.calls == 1
+
+    asyncio.run(scenario())
+
+
+def test_leader_exception_reaches_followers():
+    class FailingSource(FakeSource):
+        @cached(ttl=60)
+        async def lookup(self, locationId: int):
+            self.calls += 1
+            await asyncio.sleep(0.02)
+            raise RuntimeError("upstream failed")
+
+    async def scenario():
+        source = FailingSource()
+        results = await asyncio.gather(source.lookup(1), source.lookup(1), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert source.calls == 1
+
+    asyncio.run(scenario())
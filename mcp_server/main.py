@@ -5,69 +5,210 @@ Maneja las conexiones NCP y herramientas del sistema
 """
 
 import asyncio
+import itertools
 import logging
 import json
+import os
+import sys
 import aiohttp
 from aiohttp import web, WSMsgType
 from typing import Dict, List, Any
 from datetime import datetime
 
+# Máximo de solicitudes ejecutándose a la vez en una misma conexión
+DEFAULT_MAX_CONCURRENCY_PER_CONNECTION = 8
+
+
+def is_valid_request_id(request_id):
+    """Los request_id deben ser str o int (se usan como clave de las tareas en curso)"""
+    return isinstance(request_id, (str, int)) and not isinstance(request_id, bool)
+
+
+class ClientConnection:
+    """Estado de una conexión WebSocket: solicitudes en curso, límite de concurrencia y envío serializado"""
+
+    def __init__(self, ws, client_id, max_concurrency=DEFAULT_MAX_CONCURRENCY_PER_CONNECTION):
+        self.ws = ws
+        self.client_id = client_id
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self._send_lock = asyncio.Lock()
+        self._request_ids = itertools.count(1)
+        # Referencias a los envíos en segundo plano para que no se recolecten antes de terminar
+        self._pending_sends = set()
+        self.closing = False
+
+    def new_request_id(self):
+        """Genera un id para las solicitudes que no traen uno"""
+        return f"{self.client_id}-{next(self._request_ids)}"
+
+    async def send(self, payload):
+        """Envía una respuesta; los envíos de tareas concurrentes no se intercalan
+
+        Si la respuesta no se puede serializar a JSON se envía un error con el mismo request_id,
+        así el cliente siempre recibe una respuesta para su solicitud.
+        """
+        try:
+            message = json.dumps(payload)
+        except (TypeError, ValueError) as e:
+            logging.getLogger("silhouette.mcp_server").error(f"Respuesta no serializable a JSON: {e}")
+            message = json.dumps({
+                "request_id": payload.get("request_id"),
+                "success": False,
+                "error": f"La respuesta no se puede serializar a JSON: {str(e)}"
+            })
+        async with self._send_lock:
+            if self.ws.closed:
+                return
+            try:
+                await self.ws.send_str(message)
+            except ConnectionResetError:
+                # El cliente se desconectó mientras la solicitud se ejecutaba
+                pass
+
+    def send_later(self, payload):
+        """Envía una respuesta en segundo plano (p. ej. desde un done-callback)"""
+        task = asyncio.ensure_future(self.send(payload))
+        self._pending_sends.add(task)
+        task.add_done_callback(self._pending_sends.discard)
+
+    def cancel(self, request_id):
+        """Cancela una solicitud en curso, devuelve False si no existe"""
+        task = self.tasks.get(request_id)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    async def close(self):
+        """Cancela todas las solicitudes en curso de la conexión"""
+        self.closing = True
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
 class MCPServer:
     """Servidor MCP principal del framework"""
     
-    def __init__(self, host="0.0.0.0", port=8080):
+    def __init__(self, host="0.0.0.0", port=8080, max_concurrency_per_connection=DEFAULT_MAX_CONCURRENCY_PER_CONNECTION):
         self.host = host
         self.port = port
+        self.max_concurrency_per_connection = max_concurrency_per_connection
         self.logger = logging.getLogger("silhouette.mcp_server")
         self.connected_clients = set()
         self.tools_registry = {}
+        # Esquemas JSON de las herramientas registradas (ver register_tool), devueltos por list_tools
+        self.tool_schemas = {}
+        self._client_ids = itertools.count()
+        # Funciones que devuelven las métricas en formato Prometheus y JSON (ver set_metrics_exporters)
+        self.metrics_renderer = None
+        self.metrics_snapshot = None
         
     async def handle_ws_connection(self, request):
-        """Maneja conexiones WebSocket"""
+        """Maneja conexiones WebSocket
+
+        Cada mensaje se ejecuta como una tarea propia (hasta max_concurrency_per_connection a la vez),
+        así una herramienta lenta no bloquea los mensajes siguientes. Las respuestas se envían en el
+        orden en que terminan, etiquetadas con el request_id del mensaje.
+        """
         ws = web.WebSocketResponse()
         await ws.prepare(request)
         
-        client_id = f"client_{len(self.connected_clients)}"
-        self.connected_clients.add(ws)
+        client_id = f"client_{next(self._client_ids)}"
+        connection = ClientConnection(ws, client_id, self.max_concurrency_per_connection)
+        self.connected_clients.add(connection)
         self.logger.info(f"Cliente conectado: {client_id}")
         
         try:
             async for msg in ws:
                 if msg.type == WSMsgType.TEXT:
-                    await self.handle_message(ws, msg.data, client_id)
+                    await self.handle_message(connection, msg.data)
                 elif msg.type == WSMsgType.ERROR:
                     self.logger.error(f"Error WebSocket: {ws.exception()}")
                     
         except Exception as e:
             self.logger.error(f"Error en conexión WebSocket: {e}")
         finally:
-            self.connected_clients.discard(ws)
+            await connection.close()
+            self.connected_clients.discard(connection)
             self.logger.info(f"Cliente desconectado: {client_id}")
             
         return ws
     
-    async def handle_message(self, ws, message, client_id):
-        """Procesa mensajes del cliente"""
+    async def handle_message(self, connection, message):
+        """Procesa mensajes del cliente
+
+        Tipos de mensaje:
+            tool_call / status_request / list_tools: se ejecutan en segundo plano; request_id (o id) es
+                opcional, si falta se genera uno y se devuelve en la respuesta
+            cancel: cancela la solicitud en curso indicada por request_id
+        """
         try:
             data = json.loads(message)
             message_type = data.get("type")
-            
-            if message_type == "tool_call":
-                result = await self.execute_tool(data)
-                await ws.send_str(json.dumps(result))
-            elif message_type == "status_request":
-                result = await self.get_system_status()
-                await ws.send_str(json.dumps(result))
-            else:
-                await ws.send_str(json.dumps({
-                    "error": "Tipo de mensaje no reconocido",
-                    "received_type": message_type
-                }))
-                
         except Exception as e:
-            await ws.send_str(json.dumps({
-                "error": f"Error procesando mensaje: {str(e)}"
-            }))
+            await connection.send({"request_id": None, "error": f"Error procesando mensaje: {str(e)}"})
+            return
+
+        if message_type == "cancel":
+            request_id = data.get("request_id")
+            if not is_valid_request_id(request_id):
+                await connection.send({"request_id": None, "error": "request_id debe ser una cadena o un entero"})
+                return
+            if not connection.cancel(request_id):
+                await connection.send({
+                    "request_id": request_id,
+                    "error": f"Solicitud {request_id} no está en curso"
+                })
+            return
+
+        if message_type not in ("tool_call", "status_request", "list_tools"):
+            await connection.send({
+                "request_id": data.get("request_id", data.get("id")),
+                "error": "Tipo de mensaje no reconocido",
+                "received_type": message_type
+            })
+            return
+
+        request_id = data.get("request_id", data.get("id")) or connection.new_request_id()
+        if not is_valid_request_id(request_id):
+            await connection.send({"request_id": None, "error": "request_id debe ser una cadena o un entero"})
+            return
+        if request_id in connection.tasks:
+            await connection.send({"request_id": request_id, "error": f"La solicitud {request_id} ya está en curso"})
+            return
+        task = asyncio.ensure_future(self._run_request(connection, request_id, message_type, data))
+        connection.tasks[request_id] = task
+
+        def on_done(task):
+            connection.tasks.pop(request_id, None)
+            # La tarea puede cancelarse antes de empezar, así que la respuesta de cancelación se envía aquí
+            if task.cancelled() and not connection.closing:
+                connection.send_later({
+                    "request_id": request_id,
+                    "success": False,
+                    "cancelled": True,
+                    "error": "Solicitud cancelada"
+                })
+
+        task.add_done_callback(on_done)
+
+    async def _run_request(self, connection, request_id, message_type, data):
+        """Ejecuta una solicitud respetando el límite de concurrencia de la conexión y envía su respuesta"""
+        try:
+            async with connection.semaphore:
+                if message_type == "tool_call":
+                    result = await self.execute_tool(data)
+                elif message_type == "list_tools":
+                    result = self.list_tools()
+                else:
+                    result = await self.get_system_status()
+        except Exception as e:
+            result = {"success": False, "error": f"Error procesando mensaje: {str(e)}"}
+        await connection.send({"request_id": request_id, **result})
     
     async def execute_tool(self, data):
         """Ejecuta herramientas NCP"""
@@ -75,8 +216,8 @@ class MCPServer:
             tool_name = data.get("tool")
             parameters = data.get("parameters", {})
             
-            if tool_name in self.tools_registry:
-                tool_func = self.tools_registry[tool_name]
+            tool_func = self.tools_registry.get(tool_name)
+            if tool_func is not None:
                 result = await tool_func(parameters)
                 return {
                     "success": True,
@@ -102,21 +243,39 @@ class MCPServer:
         return {
             "status": "operational",
             "connected_clients": len(self.connected_clients),
+            "in_flight_requests": sum(len(connection.tasks) for connection in self.connected_clients),
             "registered_tools": len(self.tools_registry),
             "mcp_server": "active",
             "timestamp": datetime.now().isoformat()
         }
     
-    def register_tool(self, tool_name, tool_function):
-        """Registra una nueva herramienta"""
+    def register_tool(self, tool_name, tool_function, schema=None):
+        """Registra una nueva herramienta, opcionalmente con su esquema JSON (name, description, parameters)"""
         self.tools_registry[tool_name] = tool_function
+        if schema is not None:
+            self.tool_schemas[tool_name] = schema
         self.logger.info(f"Herramienta registrada: {tool_name}")
+
+    def register_tools(self, tools):
+        """Registra un diccionario nombre -> herramienta; las herramientas con atributo schema lo publican"""
+        for tool_name, tool_function in tools.items():
+            self.register_tool(tool_name, tool_function, getattr(tool_function, "schema", None))
+
+    def list_tools(self):
+        """Lista las herramientas registradas con sus esquemas"""
+        return {
+            "success": True,
+            "tools": [self.tool_schemas.get(name, {"name": name}) for name in self.tools_registry]
+        }
     
     async def start_server(self):
         """Inicia el servidor MCP"""
         app = web.Application()
         app.router.add_get('/ws', self.handle_ws_connection)
         app.router.add_get('/status', self.handle_status_request)
+        app.router.add_get('/tools', self.handle_tools_request)
+        app.router.add_get('/metrics', self.handle_metrics_request)
+        app.router.add_get('/metrics.json', self.handle_metrics_json_request)
         
         runner = web.AppRunner(app)
         await runner.setup()
@@ -133,20 +292,45 @@ class MCPServer:
         """Maneja solicitudes de estado HTTP"""
         return web.json_response(await self.get_system_status())
 
+    async def handle_tools_request(self, request):
+        """Maneja solicitudes HTTP del listado de herramientas"""
+        return web.json_response(self.list_tools())
+
+    def set_metrics_exporters(self, renderer, snapshot):
+        """Registra las funciones que exportan las métricas (texto Prometheus y snapshot JSON)"""
+        self.metrics_renderer = renderer
+        self.metrics_snapshot = snapshot
+
+    async def handle_metrics_request(self, request):
+        """Expone las métricas en formato de texto de Prometheus"""
+        if self.metrics_renderer is None:
+            raise web.HTTPNotFound(text="Métricas no disponibles")
+        return web.Response(body=self.metrics_renderer().encode("utf-8"),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    async def handle_metrics_json_request(self, request):
+        """Expone un snapshot JSON de las métricas"""
+        if self.metrics_snapshot is None:
+            raise web.HTTPNotFound(text="Métricas no disponibles")
+        return web.json_response(self.metrics_snapshot())
+
 async def main():
     """Función principal del MCP Server"""
     logging.basicConfig(level=logging.INFO)
     
     # Cargar herramientas NCP
     try:
-        import sys
-        sys.path.append('/workspace/external_api')
-        from data_sources.client import get_data_sources_client
-        mcp_tools_client = get_data_sources_client()
-        
-        # Registrar herramientas
+        # El paquete external_api está en la raíz del repositorio, junto a mcp_server
+        sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        from external_api.data_sources import metrics
+        from external_api.data_sources.client import get_client
+        from external_api.data_sources.tool_schema import build_tool_table
+
+        # Registrar herramientas: cada método público de cada fuente de datos es una herramienta
+        # <fuente>_<método>; los esquemas se generan una vez y los validadores se compilan aquí
         server = MCPServer()
-        # Aquí se registrarían las herramientas NCP específicas
+        server.set_metrics_exporters(metrics.render_prometheus, metrics.snapshot)
+        server.register_tools(build_tool_table(get_client()))
         
         await server.start_server()
         